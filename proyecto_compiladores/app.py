@@ -1,11 +1,18 @@
 # Importar clases y funciones del lexer, flask
+import json
+from itertools import chain
+
 from lexer import Token, TokenType, KEYWORDS, SINGLE_CHAR_TOKENS
-from lexer.lexer import Lexer, LexerError
-from parser import Parser, ParserError
-from flask import Flask, request, jsonify, render_template
+from lexer.lexer import Lexer
+from parser import IterativeParser
+from parser.export import iter_text, iter_json, chunked
+from flask import Flask, Response, request, render_template
 
 app = Flask(__name__)
 
+# Formatos del AST en la respuesta: texto indentado (el que muestra la interfaz) o el árbol en JSON
+AST_FORMATS = ('text', 'json')
+
 @app.route('/')
 def index(): 
     return render_template('index.html')
@@ -14,43 +21,89 @@ def index():
 def tokenize():
     data = request.json
     source_code = data.get('source_code', '')
+    ast_format = data.get('ast_format', 'text')
+    if ast_format not in AST_FORMATS:
+        return stream_json({'success': False, 'error': f"Formato de AST desconocido: {ast_format!r}"}, status=400)
+
+    # Los errores léxicos se emiten como tokens ERROR, así que el parser recorre todo el archivo
+    lexer = Lexer(source_code, engine="regex", recover=True)
+    tokens = lexer.tokenize_buffer()
+
+    # El parser se recupera de cada error sintáctico, así que se reportan todos de una vez. El
+    # iterativo no tiene límite de anidamiento; en JSON cada nodo lleva su tramo de tokens
+    ast, errors = IterativeParser(tokens, spans=ast_format == 'json').parse_with_recovery()
+
+    # La respuesta se genera por trozos: el AST completo nunca se arma como un solo str
+    if not errors and not lexer.errors:
+        header = "Todo salió bien. Árbol AST generado correctamente.\n"
+        return stream_json({'success': True, 'tokens': RawJSON(serialize_tokens(tokens)),
+                            'ast': RawJSON(serialize_ast(ast, ast_format, [header]))})
 
-    lexer = Lexer(source_code)
-    try:
-        tokens = lexer.tokenize()
-        parser = Parser(tokens)
-        ast = parser.parse()
-        
-        token_list = [
-            {'value': t.value, 'type': t.type.name, 'line': t.line, 'column': t.column}
-            for t in tokens
-        ]
-
-        ast_representation = format_ast(ast)
-        ast_representation = "Todo salió bien. Árbol AST generado correctamente." + "\n" + ast_representation
-
-        return jsonify({'success': True, 'tokens': token_list, 'ast': ast_representation})
-
-    except (LexerError, ParserError) as e:
-    # Recuperar tokens válidos acumulados dentro del lexer
-        token_list = [
-            {'value': t.value, 'type': t.type.name, 'line': t.line, 'column': t.column}
-            for t in getattr(lexer, 'tokens', [])
-        ]
-        ast_representation = "No se pudo generar el AST debido a errores, revisa el código." + "\n" + str(e) 
-        return jsonify({
-            'success': False,
-            'error': str(e),
-            'partial_tokens': token_list,
-            'ast': ast_representation
-
-        }), 400
+    # Diagnósticos léxicos y sintácticos en orden de aparición en el código fuente
+    diagnostics = sorted(
+        [(e.line, e.column, e.message, str(e)) for e in lexer.errors]
+        + [(e.token.line, e.token.column, e.message, str(e)) for e in errors],
+        key=lambda diagnostic: diagnostic[:2]
+    )
+    header = f"Se encontraron {len(lexer.errors)} errores léxicos y {len(errors)} errores sintácticos; AST parcial:" + "\n"
+    footer = "\n".join(text for *_, text in diagnostics)
+    return stream_json({
+        'success': False,
+        'error': diagnostics[0][3],
+        'errors': [serialize_error(message, line, column) for line, column, message, _ in diagnostics],
+        'partial_tokens': RawJSON(serialize_tokens(tokens)),
+        'ast': RawJSON(serialize_ast(ast, ast_format, [header], [footer]))
+    }, status=400)
+
+# Serializar los tokens para la tabla de la interfaz
+def serialize_tokens(buffer):
+    """Genera la lista JSON de los tokens de un TokenBuffer; línea y columna salen del LineIndex"""
+    yield '['
+    for i in range(len(buffer)):
+        line, column = buffer.position_at(i)
+        token = {'value': buffer.value_at(i), 'type': buffer.type_at(i).name, 'line': line, 'column': column}
+        yield json.dumps(token) if i == 0 else ', ' + json.dumps(token)
+    yield ']'
+    
+# Serializar el AST en el formato pedido
+def serialize_ast(ast, ast_format, header=(), footer=()):
+    """Genera el AST como una cadena JSON de texto (con 'header' y 'footer') o como el árbol JSON"""
+    if ast_format == 'json':
+        return iter_json(ast)
+    return json_string(chain(header, iter_text(ast), footer))
+    
+# Serializar un diagnóstico léxico o sintáctico
+def serialize_error(message, line, column):
+    return {'message': message, 'line': line, 'column': column}
+    
+# Cadena JSON generada por partes: cada trozo de texto se escapa por separado
+def json_string(pieces):
+    """Genera una cadena JSON con el texto de los fragmentos, sin unirlos en un solo str"""
+    yield '"'
+    for chunk in chunked(pieces):
+        yield json.dumps(chunk)[1:-1]
+    yield '"'
+    
+# Fragmentos de JSON ya formados
+class RawJSON:
+    """Valor de stream_json() que se escribe tal cual, fragmento por fragmento"""
+    def __init__(self, fragments):
+        self.fragments = fragments
     
-# Imprimir el AST de forma jerárquica
-def format_ast(node, indent=0):
-    """Imprime el AST de forma jerárquica"""
-    spacing = "  " * indent
-    return f"{spacing}{node.__class__.__name__}: {node}"
+# Respuesta JSON generada por trozos
+def stream_json(fields, status=200):
+    """Respuesta con un objeto JSON; los campos RawJSON aportan sus fragmentos y el resto pasa por json.dumps"""
+    def body():
+        separator = '{'
+        for name, value in fields.items():
+            yield f'{separator}{json.dumps(name)}: '
+            if isinstance(value, RawJSON):
+                yield from value.fragments
+            else:
+                yield json.dumps(value)
+            separator = ', '
+        yield '}'
+    return Response(chunked(body()), status=status, mimetype='application/json')
 
 
 if __name__ == "__main__":
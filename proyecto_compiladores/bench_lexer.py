@@ -0,0 +1,68 @@
+import sys
+import time
+import tracemalloc
+
+from lexer import Lexer
+
+
+TAMANOS_KB = [1, 10, 100, 1000, 10000]
+
+
+def medir(source, engine):
+    """Tiempo (s) de tokenizar el código fuente con el motor indicado"""
+    inicio = time.perf_counter()
+    Lexer(source, engine=engine).tokenize()
+    return time.perf_counter() - inicio
+
+
+def bench_literal_largo():
+    """Un único string literal o comentario que crece de 1 KB a 10 MB: el tiempo debe crecer linealmente"""
+    print("=" * 70)
+    print("LEXEMA ÚNICO DE TAMAÑO CRECIENTE")
+    print("=" * 70)
+    print(f"{'CASO':<10} | {'MOTOR':<6} | {'TAMAÑO':>9} | {'TIEMPO (ms)':>12} | {'µs / KB':>9}")
+    print("-" * 70)
+    for caso, apertura, cierre in (("string", '"', '"'), ("comentario", "//", "//")):
+        for kb in TAMANOS_KB:
+            # Contenido con saltos de línea para ejercitar también el cálculo de posiciones
+            contenido = ("x" * 63 + "\n") * (kb * 1024 // 64)
+            source = f"let s: string = {apertura}{contenido}{cierre};"
+            for engine in Lexer.ENGINES:
+                segundos = medir(source, engine)
+                print(f"{caso:<10} | {engine:<6} | {kb:>6} KB | {segundos * 1000:>12.2f} | {segundos * 1e6 / kb:>9.2f}")
+    print()
+
+
+def medir_memoria(construir):
+    """Bytes retenidos y pico de memoria (tracemalloc) al construir el resultado"""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    resultado = construir()
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, actual - base, pico - base
+
+
+def bench_memoria_tokens(total_tokens=1_000_000):
+    """Bytes por token de la lista de Token frente al TokenBuffer columnar"""
+    # Cada línea produce 4 tokens con identificadores y números distintos
+    source = "".join(f"v{i} = {i};\n" for i in range(total_tokens // 4))
+    print("=" * 70)
+    print(f"MEMORIA POR TOKEN ({total_tokens:,} tokens, fuente de {len(source) / 1e6:.1f} MB)")
+    print("=" * 70)
+    print(f"{'REPRESENTACIÓN':<22} | {'RETENIDO (MB)':>13} | {'PICO (MB)':>10} | {'BYTES / TOKEN':>13}")
+    print("-" * 70)
+    casos = (
+        ("list[Token]", lambda: Lexer(source, engine="regex").tokenize()),
+        ("TokenBuffer", lambda: Lexer(source, engine="regex").tokenize_buffer()),
+    )
+    for nombre, construir in casos:
+        tokens, retenido, pico = medir_memoria(construir)
+        print(f"{nombre:<22} | {retenido / 1e6:>13.1f} | {pico / 1e6:>10.1f} | {retenido / len(tokens):>13.1f}")
+        del tokens
+    print()
+
+
+if __name__ == "__main__":
+    bench_literal_largo()
+    bench_memoria_tokens(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
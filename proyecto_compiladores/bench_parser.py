@@ -0,0 +1,557 @@
+import gc
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+
+from lexer import Lexer, TokenType
+from parser import (Parser, IncrementalParse, ParallelParser, Arena, NodeVisitor, NodeTransformer, walk,
+                    iter_fields, ASTNode, ASTCache, NodeTable, iter_text, iter_json, Resolver)
+from parser.arena import NODE_CLASSES
+from parser.export import chunked
+from parser.ast_nodes import BinaryOp, FIELD_SHAPES
+from parser.parser import POSTFIX_OPERATORS, unspanned
+from parser.serialize import dumps, loads
+from ejemplos import (programa_grande, declaraciones_globales, errores_repetidos, ParserCascada, expresion_aleatoria,
+                      programa)
+
+
+OPERANDOS = {TokenType.ID, TokenType.NUM, TokenType.STRING_LIT, TokenType.TRUE, TokenType.FALSE}
+
+
+def fuente_expresiones(sentencias=2000, semilla=1):
+    """Función con muchas sentencias de expresión de entre 1 y 8 operandos"""
+    rng = random.Random(semilla)
+    return programa(expresion_aleatoria(rng, rng.randint(1, 8)) for _ in range(sentencias))
+
+
+def contar_llamadas(funcion):
+    """Número de llamadas a funciones Python hechas por funcion()"""
+    llamadas = 0
+
+    def perfil(frame, evento, arg):
+        nonlocal llamadas
+        if evento == "call":
+            llamadas += 1
+
+    sys.setprofile(perfil)
+    try:
+        funcion()
+    finally:
+        sys.setprofile(None)
+    return llamadas
+
+
+def medir(funcion, repeticiones=5):
+    """Mejor tiempo (s) de varias ejecuciones"""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def bench_expresiones(sentencias=2000):
+    """Llamadas por operando y tiempo del parser por precedencia frente a la cascada de métodos"""
+    tokens = Lexer(fuente_expresiones(sentencias), engine="regex").tokenize()
+    operandos = sum(token.type in OPERANDOS for token in tokens)
+    print("=" * 70)
+    print(f"EXPRESIONES ({sentencias:,} sentencias, {operandos:,} operandos, {len(tokens):,} tokens)")
+    print("=" * 70)
+    print(f"{'PARSER':<22} | {'LLAMADAS':>10} | {'LLAMADAS / OPERANDO':>19} | {'TIEMPO (ms)':>11}")
+    print("-" * 70)
+    for nombre, clase in (("cascada", ParserCascada), ("precedencia", Parser)):
+        llamadas = contar_llamadas(lambda: clase(tokens).parse())
+        segundos = medir(lambda: clase(tokens).parse())
+        print(f"{nombre:<22} | {llamadas:>10,} | {llamadas / operandos:>19.1f} | {segundos * 1000:>11.1f}")
+    print()
+
+
+def bench_por_token(funciones=3000):
+    """Costo por token del parser completo y de sus primitivas de selección de producción"""
+    tokens = Lexer(programa_grande(funciones), engine="regex").tokenize()
+    llamadas = contar_llamadas(lambda: Parser(tokens).parse())
+    segundos = medir(lambda: Parser(tokens).parse())
+    print("=" * 70)
+    print(f"COSTO POR TOKEN ({len(tokens):,} tokens)")
+    print("=" * 70)
+    print(f"Parser completo: {llamadas / len(tokens):.2f} llamadas / token, {segundos * 1e6 / len(tokens):.2f} µs / token")
+    print()
+
+    # Primitivas sobre un token 'return', que en la cadena if/elif de parse_stmt era el cuarto caso
+    parser = Parser(Lexer("return x;").tokenize())
+    token_type = parser.current_token.type
+    casos = (
+        ("match(T)", lambda: parser.match(TokenType.RETURN)),
+        ("check(T)", lambda: parser.check(TokenType.RETURN)),
+        ("match(T1, T2, T3)", lambda: parser.match(TokenType.LPAREN, TokenType.LBRACKET, TokenType.DOT)),
+        ("tipo in frozenset", lambda: token_type in POSTFIX_OPERATORS),
+        ("cadena de match()", lambda: parser.match(TokenType.LET) or parser.match(TokenType.IF)
+                                      or parser.match(TokenType.WHILE) or parser.match(TokenType.RETURN)),
+        ("tabla de despacho", lambda: parser.stmt_dispatch.get(token_type)),
+    )
+    print(f"{'PRIMITIVA':<22} | {'ns / llamada':>12}")
+    print("-" * 40)
+    for nombre, funcion in casos:
+        repeticiones = 200_000
+        mejor = min(timeit.repeat(funcion, number=repeticiones, repeat=5))
+        print(f"{nombre:<22} | {mejor * 1e9 / repeticiones:>12.0f}")
+    print()
+
+
+def bench_incremental(funciones=50_000, texto="b = b + 1; "):
+    """Latencia por pulsación del análisis incremental frente a re-tokenizar y re-analizar todo"""
+    fuente = programa_grande(funciones)
+    print("=" * 70)
+    print(f"ANÁLISIS INCREMENTAL ({fuente.count(chr(10)):,} líneas, {len(fuente):,} caracteres)")
+    print("=" * 70)
+    inicio = time.perf_counter()
+    buffer = Lexer(fuente, engine="regex").tokenize_buffer()
+    Parser(buffer).parse_with_recovery()
+    completo = time.perf_counter() - inicio
+    print(f"Tokenizar y analizar todo: {completo * 1000:,.0f} ms")
+
+    # Se escribe 'texto' carácter por carácter dentro de la función del medio del archivo
+    incremental = IncrementalParse(buffer)
+    anteriores = incremental.program.top_declarations
+    posicion = fuente.index("return", fuente.index(f"fn f{funciones // 2}("))
+    latencias = []
+    for i, caracter in enumerate(texto):
+        inicio = time.perf_counter()
+        incremental.edit(posicion + i, 0, caracter)
+        latencias.append(time.perf_counter() - inicio)
+    latencias.sort()
+    mediana = latencias[len(latencias) // 2]
+    print(f"Por pulsación ({len(texto)} pulsaciones): mediana {mediana * 1000:.1f} ms, "
+          f"máximo {latencias[-1] * 1000:.1f} ms ({completo / mediana:.0f}x)")
+
+    # Consultar el Program completo aplica los desplazamientos de tramos pendientes de la cola
+    inicio = time.perf_counter()
+    programa = incremental.program
+    tramos = time.perf_counter() - inicio
+    reutilizadas = sum(antes is ahora for antes, ahora in zip(anteriores, programa.top_declarations))
+    print(f"Declaraciones reutilizadas: {reutilizadas:,} de {len(programa.top_declarations):,}; "
+          f"actualizar sus tramos al consultar program: {tramos * 1000:,.0f} ms")
+    print()
+
+
+def bench_paralelo(funciones=20_000, trabajadores=None):
+    """Aceleración del análisis en paralelo según la cantidad de procesos trabajadores"""
+    fuente = programa_grande(funciones)
+    nucleos = os.cpu_count() or 1
+    if trabajadores is None:
+        trabajadores = [1]
+        while trabajadores[-1] < max(nucleos, 4):
+            trabajadores.append(trabajadores[-1] * 2)
+    print("=" * 70)
+    print(f"ANÁLISIS EN PARALELO ({funciones:,} funciones, {nucleos} núcleos disponibles)")
+    print("=" * 70)
+    print(f"{'TRABAJADORES':>12} | {'TIEMPO (ms)':>11} | {'ACELERACIÓN':>11}")
+    print("-" * 40)
+    secuencial = None
+    for cantidad in trabajadores:
+        tokens = Lexer(fuente, engine="regex").tokenize_buffer()
+        parser = Parser(tokens) if cantidad == 1 else ParallelParser(tokens, workers=cantidad)
+        segundos = medir(parser.parse, repeticiones=1)
+        secuencial = secuencial or segundos
+        print(f"{cantidad:>12} | {segundos * 1000:>11,.0f} | {secuencial / segundos:>10.2f}x")
+
+    # Trabajo que queda en el proceso principal: cortar, registrar identificadores y deserializar
+    parser = ParallelParser(Lexer(fuente, engine="regex").tokenize_buffer(), workers=2)
+    parser.parse_module_decl()
+    parser.parse_import_list()
+    inicio = time.perf_counter()
+    parser.split_top_decls(parser.pos)
+    parser.intern_identifiers(parser.pos)
+    preparar = time.perf_counter() - inicio
+    datos = pickle.dumps(Parser(Lexer(fuente, engine="regex").tokenize_buffer()).parse().top_declarations)
+    gc.disable()
+    try:
+        deserializar = medir(lambda: pickle.loads(datos), repeticiones=1)
+    finally:
+        gc.enable()
+    serial = (preparar + deserializar) / secuencial
+    print(f"En el proceso principal: cortar {preparar * 1000:,.0f} ms, deserializar {deserializar * 1000:,.0f} ms "
+          f"({serial:.0%} del análisis; aceleración máxima {1 / serial:.1f}x)")
+    print()
+
+
+def bench_outline(funciones=20_000):
+    """Análisis de esquema (cuerpos sin analizar) frente al análisis completo"""
+    fuente = programa_grande(funciones)
+    print("=" * 70)
+    print(f"ANÁLISIS DE ESQUEMA ({funciones:,} funciones, {len(fuente):,} caracteres)")
+    print("=" * 70)
+    tokens = Lexer(fuente, engine="regex").tokenize_buffer()
+    completo = medir(lambda: Parser(tokens).parse(), repeticiones=3)
+    esquema = medir(lambda: Parser(tokens).parse_outline(), repeticiones=3)
+    print(f"Análisis completo: {completo * 1000:,.0f} ms")
+    print(f"Sólo esquema:      {esquema * 1000:,.0f} ms ({completo / esquema:.1f}x)")
+
+    # Consultar un cuerpo sólo analiza esa función
+    programa = Parser(tokens).parse_outline()
+    cuerpo = programa.top_declarations[funciones // 2].body
+    inicio = time.perf_counter()
+    cuerpo.statements
+    print(f"Primer acceso a un cuerpo: {(time.perf_counter() - inicio) * 1000:.2f} ms")
+    print()
+
+
+def bench_tramos(funciones=20_000):
+    """Tiempo de análisis y memoria del AST sin y con los tramos (start, end) de los nodos"""
+    tokens = Lexer(programa_grande(funciones), engine="regex").tokenize_buffer()
+    print("=" * 70)
+    print(f"TRAMOS DE LOS NODOS ({funciones:,} funciones, {len(tokens):,} tokens)")
+    print("=" * 70)
+    print(f"{'TRAMOS':>8} | {'ANÁLISIS (ms)':>13} | {'AST (MB)':>8} | {'BYTES / NODO':>12} | {'ENTEROS':>9}")
+    print("-" * 64)
+    for spans in (False, True):
+        segundos = medir(lambda: Parser(tokens, spans=spans).parse(), repeticiones=3)
+        programa, memoria = memoria_retenida(lambda: Parser(tokens, spans=spans).parse())
+        # Cada tramo son dos referencias en el nodo; los int de una misma posición se comparten
+        todos = list(walk(programa))
+        enteros = {id(n.start): n.start for n in todos} | {id(n.end): n.end for n in todos}
+        propios = sum(1 for v in enteros.values() if not -5 <= v <= 256)
+        print(f"{'sí' if spans else 'no':>8} | {segundos * 1000:>13,.0f} | {memoria / 1e6:>8,.1f} | "
+              f"{memoria / len(todos):>12.0f} | {propios:>9,}")
+        del programa, todos, enteros
+    print()
+
+
+def tamano_nodo(nodo):
+    """Bytes del objeto nodo, incluido su __dict__ si lo tiene"""
+    return sys.getsizeof(nodo) + (sys.getsizeof(nodo.__dict__) if hasattr(nodo, "__dict__") else 0)
+
+
+def clases_con_dict():
+    """Las mismas dataclasses de los nodos sin slots=True (cada nodo guarda sus campos en un __dict__)"""
+    clases = {}
+    for cls in FIELD_SHAPES:
+        campos = []
+        for f in fields(cls):
+            opciones = {"compare": f.compare, "kw_only": f.kw_only}
+            if f.default is not MISSING:
+                opciones["default"] = f.default
+            campos.append((f.name, f.type, field(**opciones)))
+        clases[cls] = make_dataclass(cls.__name__, campos)
+    return clases
+
+
+def bench_nodos(funciones=59_000):
+    """Bytes por nodo, tamaño total de un AST de ~1M nodos y nodos construidos por segundo, con las
+    dataclasses con slots frente a las mismas sin slots (medidas en la misma ejecución)"""
+    tokens = Lexer(programa_grande(funciones), engine="regex").tokenize_buffer()
+    con_dict = clases_con_dict()
+
+    def analizar(clases):
+        parser = Parser(tokens)
+        if clases is not None:
+            # Los mismos métodos del parser construyen los nodos con las otras clases
+            parser.new = {cls: unspanned(otra) for cls, otra in clases.items()}
+        return parser.parse()
+
+    total = sum(1 for _ in walk(analizar(None)))
+    print("=" * 70)
+    print(f"MEMORIA DE LOS NODOS ({total:,} nodos)")
+    print("=" * 70)
+    print(f"{'NODOS':>9} | {'AST (MB)':>8} | {'BYTES / NODO':>12} | {'BINARYOP (B)':>12} | {'ANÁLISIS (s)':>12} | "
+          f"{'BINARYOP(...) (ns)':>18}")
+    print("-" * 88)
+    for nombre, clases in (("con dict", con_dict), ("slots", None)):
+        segundos = medir(lambda: analizar(clases), repeticiones=1)
+        programa, memoria = memoria_retenida(lambda: analizar(clases))
+        suma = programa.top_declarations[-1].body.statements[0].initial_value
+        clase_suma = BinaryOp if clases is None else clases[BinaryOp]
+        a, b = suma.left, suma.right
+        construir = min(timeit.repeat(lambda: clase_suma("+", a, b, start=0, end=3), number=200_000,
+                                      repeat=5)) / 200_000
+        # La memoria incluye listas, cadenas y enteros, que son los mismos con ambas clases
+        print(f"{nombre:>9} | {memoria / 1e6:>8,.1f} | {memoria / total:>12.0f} | {tamano_nodo(suma):>12} | "
+              f"{segundos:>12,.2f} | {construir * 1e9:>18.0f}")
+        del programa, suma
+    print()
+
+
+def memoria_retenida(construir):
+    """Resultado de construir() y los bytes que quedan ocupados al terminar"""
+    gc.collect()
+    tracemalloc.start()
+    resultado = construir()
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, memoria
+
+
+def memoria_pico(funcion):
+    """Resultado de funcion() y el pico de bytes asignados mientras corre"""
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcion()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, pico
+
+
+def bench_arena(funciones=20_000):
+    """AST de objetos frente a la Arena: memoria, construcción y recorrido completo"""
+    tokens = Lexer(programa_grande(funciones), engine="regex").tokenize_buffer()
+    programa, memoria_objetos = memoria_retenida(lambda: Parser(tokens).parse())
+    arena, memoria_arena = memoria_retenida(lambda: Arena.from_tokens(tokens))
+    total = len(arena)
+    print("=" * 70)
+    print(f"ARENA DEL AST ({total:,} nodos)")
+    print("=" * 70)
+    print(f"Memoria: objetos {memoria_objetos / 1e6:,.1f} MB ({memoria_objetos / total:.0f} B/nodo), "
+          f"arena {memoria_arena / 1e6:,.1f} MB ({memoria_arena / total:.0f} B/nodo), "
+          f"{memoria_objetos / memoria_arena:.1f}x menos")
+    analizar = medir(lambda: Parser(tokens).parse(), repeticiones=1)
+    construir = medir(lambda: Arena.from_tokens(tokens), repeticiones=1)
+    print(f"Construcción: parse() {analizar * 1000:,.0f} ms, Arena.from_tokens() {construir * 1000:,.0f} ms")
+
+    # Recorrido completo contando los nodos de cada clase
+    def contar_objetos():
+        cuenta = {}
+        for nodo in walk(programa):
+            cuenta[type(nodo)] = cuenta.get(type(nodo), 0) + 1
+        return cuenta
+
+    def contar_arena():
+        cuenta = {}
+        kinds = arena.kinds
+        for indice in arena.walk():
+            cuenta[kinds[indice]] = cuenta.get(kinds[indice], 0) + 1
+        return {NODE_CLASSES[kind]: n for kind, n in cuenta.items()}
+
+    assert contar_objetos() == contar_arena()
+    objetos = medir(contar_objetos, repeticiones=3)
+    plano = medir(contar_arena, repeticiones=3)
+    columna = medir(lambda: arena.kinds.tobytes().count(NODE_CLASSES.index(BinaryOp)), repeticiones=3)
+    print(f"Recorrido: objetos {objetos * 1000:,.0f} ms, arena {plano * 1000:,.0f} ms ({objetos / plano:.1f}x); "
+          f"contar BinaryOp sobre la columna: {columna * 1000:.2f} ms")
+    print()
+
+
+class VisitanteIngenuo:
+    """Visitante recursivo que busca visit_<Clase> con getattr en cada nodo (el esquema de ast.NodeVisitor)"""
+
+    def __init__(self):
+        self.identificadores = 0
+
+    def visit(self, node):
+        return getattr(self, "visit_" + node.__class__.__name__, self.generic_visit)(node)
+
+    def generic_visit(self, node):
+        for _, valor in iter_fields(node):
+            if isinstance(valor, list):
+                for hijo in valor:
+                    if isinstance(hijo, ASTNode):
+                        self.visit(hijo)
+            elif isinstance(valor, ASTNode):
+                self.visit(valor)
+
+    def visit_Identifier(self, node):
+        self.identificadores += 1
+
+
+class ContarIdentificadores(NodeVisitor):
+    def __init__(self):
+        self.identificadores = 0
+
+    def visit_Identifier(self, node):
+        self.identificadores += 1
+
+
+def bench_visitantes(funciones=20_000):
+    """Nodos visitados por segundo con walk(), NodeVisitor, NodeTransformer y un visitante con getattr por nodo"""
+    programa = Parser(Lexer(programa_grande(funciones), engine="regex").tokenize_buffer()).parse()
+    total = sum(1 for _ in walk(programa))
+    print("=" * 70)
+    print(f"VISITANTES ({total:,} nodos)")
+    print("=" * 70)
+    casos = [
+        ("walk()", lambda: sum(1 for _ in walk(programa))),
+        ("NodeVisitor", lambda: ContarIdentificadores().visit(programa)),
+        ("getattr por nodo", lambda: VisitanteIngenuo().visit(programa)),
+        ("NodeTransformer", lambda: NodeTransformer().visit(programa)),
+    ]
+    print(f"{'RECORRIDO':>18} | {'TIEMPO (ms)':>11} | {'NODOS/S':>12}")
+    print("-" * 48)
+    for nombre, recorrer in casos:
+        segundos = medir(recorrer, repeticiones=3)
+        print(f"{nombre:>18} | {segundos * 1000:>11,.0f} | {total / segundos:>12,.0f}")
+    print()
+
+
+def sin_recolector(funcion):
+    """funcion() con el recolector de ciclos detenido"""
+    def envuelta():
+        gc.disable()
+        try:
+            return funcion()
+        finally:
+            gc.enable()
+    return envuelta
+
+
+def bench_serializacion(funciones=20_000):
+    """Formato binario del AST frente a pickle (tamaño, escritura, lectura) y análisis con la caché en disco.
+    loads() detiene el recolector de ciclos mientras crea los nodos, así que la comparación con pickle
+    se hace en las mismas condiciones: las dos con el recolector detenido."""
+    fuente = programa_grande(funciones)
+    programa = Parser(Lexer(fuente, engine="regex").tokenize_buffer(), spans=True).parse()
+    total = sum(1 for _ in walk(programa))
+    datos_pickle = pickle.dumps(programa, pickle.HIGHEST_PROTOCOL)
+    datos = dumps(programa)
+    print("=" * 70)
+    print(f"SERIALIZACIÓN DEL AST ({total:,} nodos)")
+    print("=" * 70)
+    casos = [
+        # Referencia: pickle con el recolector activo, como se usa normalmente
+        ("pickle con gc", len(datos_pickle), lambda: pickle.dumps(programa, pickle.HIGHEST_PROTOCOL),
+         lambda: pickle.loads(datos_pickle)),
+        ("pickle", len(datos_pickle), sin_recolector(lambda: pickle.dumps(programa, pickle.HIGHEST_PROTOCOL)),
+         sin_recolector(lambda: pickle.loads(datos_pickle))),
+        ("binario", len(datos), sin_recolector(lambda: dumps(programa)), sin_recolector(lambda: loads(datos))),
+    ]
+    print(f"{'FORMATO':>14} | {'TAMAÑO (MB)':>11} | {'DUMP (ms)':>9} | {'LOAD (ms)':>9}")
+    print("-" * 53)
+    for nombre, tamano, escribir, leer in casos:
+        print(f"{nombre:>14} | {tamano / 1e6:>11.2f} | {medir(escribir, 3) * 1000:>9,.0f} | "
+              f"{medir(leer, 3) * 1000:>9,.0f}")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = ASTCache(directorio)
+        sin_cache = medir(lambda: Parser(Lexer(fuente, engine="regex").tokenize_buffer()).parse(), repeticiones=1)
+        cache.parse(fuente)
+        con_cache = medir(lambda: cache.parse(fuente), repeticiones=3)
+    print(f"Lexer + Parser: {sin_cache * 1000:,.0f} ms; desde la caché: {con_cache * 1000:,.0f} ms "
+          f"({sin_cache / con_cache:.1f}x)")
+    print()
+
+
+def fuente_generada(funciones):
+    """Código como el de un generador: funciones con nombres distintos y los mismos tipos, expresiones y cuerpos"""
+    return "module Generado;\n" + "".join(
+        f"fn g{i}(a: int, b: int) -> int {{ let c: int = a * b + 1; "
+        f"if (c > 10) {{ return c - 1; }} return a + b * 2; }}\n"
+        for i in range(funciones)
+    )
+
+
+def bench_hashcons(funciones=20_000):
+    """Nodos, memoria y tiempo de análisis con hash-consing (NodeTable) frente al árbol normal"""
+    print("=" * 70)
+    print("HASH-CONSING DE SUBÁRBOLES")
+    print("=" * 70)
+    print(f"{'FUENTE':>10} | {'NODOS':>9} | {'DISTINTOS':>9} | {'MEMORIA (MB)':>15} | {'PICO (MB)':>15} | "
+          f"{'ANÁLISIS (ms)':>15}")
+    print("-" * 90)
+    for nombre, fuente in (("plantilla", programa_grande(funciones)), ("generado", fuente_generada(funciones))):
+        tokens = Lexer(fuente, engine="regex").tokenize_buffer()
+        programa, memoria = memoria_retenida(lambda: Parser(tokens).parse())
+        compartido, memoria_compartida = memoria_retenida(lambda: Parser(tokens, nodes=NodeTable()).parse())
+        # El pico incluye la tabla: los nodos se internan al construirse, sin una copia normal intermedia
+        _, pico = memoria_pico(lambda: Parser(tokens).parse())
+        _, pico_compartido = memoria_pico(lambda: Parser(tokens, nodes=NodeTable()).parse())
+        total = sum(1 for _ in walk(programa))
+        distintos = len({id(nodo) for nodo in walk(compartido)})
+        normal = medir(lambda: Parser(tokens).parse(), repeticiones=1)
+        con_tabla = medir(lambda: Parser(tokens, nodes=NodeTable()).parse(), repeticiones=1)
+        print(f"{nombre:>10} | {total:>9,} | {distintos:>9,} | {memoria / 1e6:>6.1f} → {memoria_compartida / 1e6:>6.1f} | "
+              f"{pico / 1e6:>6.1f} → {pico_compartido / 1e6:>6.1f} | {normal * 1000:>6,.0f} → {con_tabla * 1000:>6,.0f}")
+        del programa, compartido
+
+    # Igualdad de dos análisis del mismo código: recorrido completo frente a identidad en la tabla
+    tokens = Lexer(fuente_generada(funciones), engine="regex").tokenize_buffer()
+    a, b = Parser(tokens).parse(), Parser(tokens).parse()
+    tabla = NodeTable()
+    c, d = Parser(tokens, nodes=tabla).parse(), Parser(tokens, nodes=tabla).parse()
+    print(f"Igualdad de dos Program: normal {medir(lambda: a == b, 3) * 1e3:,.1f} ms, "
+          f"compartido {medir(lambda: c == d, 3) * 1e6:,.2f} µs")
+    print()
+
+
+def bench_exportacion(funciones=20_000):
+    """Exportación completa del AST por trozos frente a armar un solo str, en tiempo y memoria pico"""
+    programa = Parser(Lexer(programa_grande(funciones), engine="regex").tokenize_buffer()).parse()
+    print("=" * 70)
+    print(f"EXPORTACIÓN DEL AST ({sum(1 for _ in walk(programa)):,} nodos)")
+    print("=" * 70)
+
+    def consumir(trozos):
+        # Como una respuesta HTTP: cada trozo se envía y se descarta
+        return sum(len(trozo) for trozo in trozos)
+
+    casos = [
+        ("repr() del Program", lambda: len(repr(programa))),
+        ("texto en un str", lambda: len("".join(iter_text(programa)))),
+        ("texto por trozos", lambda: consumir(chunked(iter_text(programa)))),
+        ("JSON en un str", lambda: len("".join(iter_json(programa)))),
+        ("JSON por trozos", lambda: consumir(chunked(iter_json(programa)))),
+    ]
+    print(f"{'SALIDA':>20} | {'TAMAÑO (MB)':>11} | {'TIEMPO (ms)':>11} | {'PICO (MB)':>9}")
+    print("-" * 62)
+    for nombre, exportar in casos:
+        tamano, pico = memoria_pico(exportar)
+        print(f"{nombre:>20} | {tamano / 1e6:>11.1f} | {medir(exportar, 3) * 1000:>11,.0f} | {pico / 1e6:>9.1f}")
+    print()
+
+
+def bench_recuperacion(tamanos=(1000, 4000, 16_000)):
+    """Tiempo de parse_with_recovery() según la cantidad de errores sintácticos"""
+    print("=" * 70)
+    print("RECUPERACIÓN DE ERRORES")
+    print("=" * 70)
+    print(f"{'ERRORES':>8} | {'TOKENS':>9} | {'TIEMPO (ms)':>11} | {'µs / ERROR':>10}")
+    print("-" * 48)
+    for repeticiones in tamanos:
+        tokens = Lexer(errores_repetidos(repeticiones), engine="regex").tokenize()
+        errores = len(Parser(tokens).parse_with_recovery()[1])
+        segundos = medir(lambda: Parser(tokens).parse_with_recovery(), repeticiones=3)
+        print(f"{errores:>8,} | {len(tokens):>9,} | {segundos * 1000:>11,.0f} | {segundos / errores * 1e6:>10.1f}")
+    print()
+
+
+def bench_resolucion(tamanos=(25_000, 50_000, 100_000)):
+    """Tiempo de la resolución de nombres según la cantidad de declaraciones globales"""
+    print("=" * 70)
+    print("RESOLUCIÓN DE NOMBRES")
+    print("=" * 70)
+    print(f"{'FUENTE':>10} | {'DECLARACIONES':>13} | {'NODOS':>10} | {'TIEMPO (ms)':>11} | {'NODOS/s':>10}")
+    print("-" * 67)
+    # Cada función de la plantilla es una declaración global y usa parámetros, lets y otra función;
+    # con ámbitos cada repetición declara una constante y una función con un nombre ocultado
+    fuentes = (("plantilla", programa_grande, 1), ("ámbitos", declaraciones_globales, 2))
+    for nombre, generar, por_repeticion in fuentes:
+        for declaraciones in tamanos:
+            fuente = generar(declaraciones // por_repeticion)
+            programa = Parser(Lexer(fuente, engine="regex").tokenize_buffer()).parse()
+            total = sum(1 for _ in walk(programa))
+            segundos = medir(lambda: Resolver().resolve(programa), repeticiones=1)
+            print(f"{nombre:>10} | {len(programa.top_declarations):>13,} | {total:>10,} | "
+                  f"{segundos * 1000:>11,.0f} | {total / segundos:>10,.0f}")
+            del programa
+    print()
+
+
+if __name__ == "__main__":
+    bench_expresiones(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
+    bench_por_token()
+    bench_incremental()
+    bench_paralelo()
+    bench_outline()
+    bench_tramos()
+    bench_nodos()
+    bench_arena()
+    bench_visitantes()
+    bench_serializacion()
+    bench_hashcons()
+    bench_exportacion()
+    bench_recuperacion()
+    bench_resolucion()
@@ -0,0 +1,222 @@
+from lexer import TokenType
+from parser import Parser, walk
+from parser.ast_nodes import Assignment, BinaryOp, UnaryOp, Expr
+
+
+# Programas de ejemplo y utilidades compartidas por las pruebas (test_*.py) y los benchmarks (bench_*.py).
+# No es un módulo de pruebas, así que importarlo no recolecta ni ejecuta pruebas de otros archivos.
+
+PROGRAMA = """
+module Geometria.Plano;
+
+import Math.Avanzado as MA;
+import Sistema;
+
+type Vector = int[];
+type Matriz = (Vector)[];
+
+struct Punto {
+    x: int,
+    y: int
+};
+
+const PI: int = 3.14159;
+let nombre: string = "plano";
+
+fn distancia(p1: Punto, p2: Punto) -> int {
+    let dx: int = p2.x - p1.x;
+    let dy: int = p2.y - p1.y;
+    if (dx >= 0 && dy <= 0 || !(dx == dy)) {
+        return dx * dx + dy * dy % 2;
+    } else {
+        while (dx < dy) { dx = dx + 1; }
+    }
+    return raiz(lista[0], -dx);
+}
+"""
+
+
+def programa_grande(repeticiones):
+    """Programa con muchas funciones a partir de la plantilla"""
+    funciones = "".join(
+        f"fn f{i}(a: int) -> int {{ let b: int = a * {i}; return b + f{i}(a - 1); }}\n"
+        for i in range(repeticiones)
+    )
+    return PROGRAMA + funciones
+
+
+def declaraciones_globales(repeticiones):
+    """Programa con 2 declaraciones globales por repetición (una constante y una función que la usa),
+    un nombre ocultado en un bloque y llamadas a la función siguiente, declarada más adelante"""
+    return "module M;\n" + "".join(
+        f"const c{i}: int = {i};\nfn f{i}(a: int) -> int {{ let b: int = a + c{i}; "
+        f"{{ let a: int = b; }} return f{(i + 1) % repeticiones}(b); }}\n"
+        for i in range(repeticiones)
+    )
+
+
+def errores_repetidos(repeticiones):
+    """Programa con 3 errores por repetición: 2 en el cuerpo de una función y 1 en un struct"""
+    funciones = "".join(f"fn f{i}(a: int) {{ let b: int = ; a = a + ; return a; }}\n" for i in range(repeticiones))
+    basura = "".join(f"struct S{i} {{ x int }};\n" for i in range(repeticiones))
+    return "module M;\n" + funciones + basura
+
+
+CON_ERRORES = """module M;
+import A.B as ;
+import C;
+fn f() { let x: int = ; x = 1; y = (2; return x }
+struct S { a: int b: int };
+const K: int = 3;
+fn h() { { x = 1;
+fn k() { }
+"""
+
+
+# Fragmentos para generar código fuente aleatorio, válido o no
+FRAGMENTOS_LEXICOS = [
+    'module', 'fn', 'let', 'int', 'true', 'false', 'returnx', 'x_1', 'ID9',
+    '0', '42', '3.', '3.14', '1e10', '2E-3', '7e+', '1.e', '8e',
+    '=', '==', '!', '!=', '<', '<=', '>', '>=', '&&', '||', '->', '-', '/',
+    '+', '*', '%', '.', ',', '(', ')', '{', '}', '[', ']', ':', ';',
+    '//nota//', '///', '"texto"', '"', '&', '|', '#', '@', '\x0b',
+    ' ', '  ', '\n', '\t', '\r\n',
+    'é', 'ñandú', '²', '½', '١٢', '€', 'Ⅻ', '_', 'µ',
+]
+
+
+# Fragmentos para editar un programa al azar
+FRAGMENTOS_EDICION = ['"', '"x"', ' ', '\n', '\n\n', 'x', '1', '=', ';', '{', '}', 'fn', 'struct', 'let', '(', ')', '+',
+                      'return', 'fn g() { }', ' fn h(a: int) { a = 1; }\n', 'const C: int = 2;', 'import A;']
+
+
+def tramos(nodo):
+    """(clase, inicio, fin) de cada nodo en preorden"""
+    return [(type(n).__name__, n.start, n.end) for n in walk(nodo)]
+
+
+class ParserCascada(Parser):
+    """Referencia: la cascada de un método por nivel de precedencia que reemplaza parse_expr"""
+    
+    def parse_expr(self) -> Expr:
+        """Expr → Assign"""
+        return self.parse_assign()
+    
+    def parse_assign(self) -> Expr:
+        """Assign → Or AssignTail"""
+        expr = self.parse_or()
+        
+        if self.match(TokenType.ASSIGN):
+            self.advance()
+            value = self.parse_assign()  # Asociatividad derecha
+            return Assignment(expr, value)
+        
+        return expr
+    
+    def parse_or(self) -> Expr:
+        """Or → And OrTail"""
+        left = self.parse_and()
+        
+        while self.match(TokenType.OR):
+            op = self.current_token.value
+            self.advance()
+            right = self.parse_and()
+            left = BinaryOp(op, left, right)
+        
+        return left
+    
+    def parse_and(self) -> Expr:
+        """And → Eq AndTail"""
+        left = self.parse_eq()
+        
+        while self.match(TokenType.AND):
+            op = self.current_token.value
+            self.advance()
+            right = self.parse_eq()
+            left = BinaryOp(op, left, right)
+        
+        return left
+    
+    def parse_eq(self) -> Expr:
+        """Eq → Rel EqTail"""
+        left = self.parse_rel()
+        
+        while self.match(TokenType.EQUAL, TokenType.NOT_EQUAL):
+            op = self.current_token.value
+            self.advance()
+            right = self.parse_rel()
+            left = BinaryOp(op, left, right)
+        
+        return left
+    
+    def parse_rel(self) -> Expr:
+        """Rel → Add RelTail"""
+        left = self.parse_add()
+        
+        while self.match(TokenType.LESS_THAN, TokenType.LESS_EQUAL,
+                         TokenType.GREATER_THAN, TokenType.GREATER_EQUAL):
+            op = self.current_token.value
+            self.advance()
+            right = self.parse_add()
+            left = BinaryOp(op, left, right)
+        
+        return left
+    
+    def parse_add(self) -> Expr:
+        """Add → Mul AddTail"""
+        left = self.parse_mul()
+        
+        while self.match(TokenType.PLUS, TokenType.MINUS):
+            op = self.current_token.value
+            self.advance()
+            right = self.parse_mul()
+            left = BinaryOp(op, left, right)
+        
+        return left
+    
+    def parse_mul(self) -> Expr:
+        """Mul → Unary MulTail"""
+        left = self.parse_unary()
+        
+        while self.match(TokenType.MULTIPLY, TokenType.DIVIDE, TokenType.MODULO):
+            op = self.current_token.value
+            self.advance()
+            right = self.parse_unary()
+            left = BinaryOp(op, left, right)
+        
+        return left
+    
+    def parse_unary(self) -> Expr:
+        """Unary → '!' Unary | '-' Unary | Postfix"""
+        if self.match(TokenType.NOT, TokenType.MINUS):
+            op = self.current_token.value
+            self.advance()
+            operand = self.parse_unary()
+            return UnaryOp(op, operand)
+        
+        return self.parse_postfix()
+    
+    def parse_postfix(self) -> Expr:
+        """Postfix → Primary PostfixTail"""
+        expr = self.parse_primary()
+        return self.parse_postfix_tail(expr)
+
+
+OPERANDOS = ['a', 'b1', '1', '2.5', '"s"', 'true', 'false', 'f(x, 1)', 'v[i + 1]', 'p.x.y', '(a = b)', 'g()']
+BINARIOS = ['=', '||', '&&', '==', '!=', '<', '<=', '>', '>=', '+', '-', '*', '/', '%']
+PREFIJOS = ['!', '-']
+
+
+def expresion_aleatoria(rng, longitud):
+    """Secuencia Prefijo* Operando (Binario Prefijo* Operando)* con 'longitud' operandos"""
+    partes = []
+    for i in range(longitud):
+        if i:
+            partes.append(rng.choice(BINARIOS))
+        partes.extend(rng.choice(PREFIJOS) for _ in range(rng.choice([0, 0, 0, 1, 2])))
+        partes.append(rng.choice(OPERANDOS))
+    return " ".join(partes)
+
+
+def programa(expresiones):
+    return "module M;\nfn f() {\n" + "".join(f"    {e};\n" for e in expresiones) + "}"
@@ -1,4 +1,9 @@
-from .tokens import Token, TokenType, KEYWORDS, SINGLE_CHAR_TOKENS
+from .tokens import Token, TokenType, KEYWORDS, SINGLE_CHAR_TOKENS, MULTI_CHAR_TOKENS, FIXED_TEXT
+from .symbols import SymbolTable
 from .lexer import Lexer, LexerError
+from .token_buffer import TokenBuffer
+from .line_index import LineIndex
+from .incremental import relex
 
-__all__ = ['Token', 'TokenType', 'KEYWORDS', 'SINGLE_CHAR_TOKENS', 'Lexer', 'LexerError']
\ No newline at end of file
+__all__ = ['Token', 'TokenType', 'KEYWORDS', 'SINGLE_CHAR_TOKENS', 'MULTI_CHAR_TOKENS', 'FIXED_TEXT',
+           'SymbolTable', 'Lexer', 'LexerError', 'TokenBuffer', 'LineIndex', 'relex']
\ No newline at end of file
@@ -0,0 +1,86 @@
+from array import array
+from bisect import bisect_left
+
+from .tokens import TokenType
+from .lexer import Lexer
+from .token_buffer import TokenBuffer
+
+
+def first_unclosed(buffer: TokenBuffer, stop: int) -> int:
+    """Índice del primer token ERROR antes de 'stop' que es un string o comentario sin cerrar, o 'stop'.
+    Esos errores dependen de todo el resto del código fuente (su cierre se busca hasta el final),
+    así que una edición posterior puede cerrarlos."""
+    starts, source = buffer.starts, buffer.source
+    kinds = buffer.kinds.tobytes()
+    error = bytes([TokenType.ERROR.value])
+    index = kinds.find(error, 0, stop)
+    while index >= 0:
+        if source[starts[index]:starts[index] + 1] in ('"', '/', b'"', b'/'):
+            return index
+        index = kinds.find(error, index + 1, stop)
+    return stop
+
+
+def relex(buffer: TokenBuffer, start: int, deleted: int, inserted: str, recover: bool = False) -> TokenBuffer:
+    """Re-tokeniza tras una edición (desplazamiento, longitud borrada, texto insertado).
+
+    Los tokens que terminan antes de la edición se reutilizan tal cual; el
+    escaneo se reanuda al final del último de ellos (un estado seguro, porque
+    el lexer nunca mira más de un carácter después de un token) y se detiene
+    en cuanto un token nuevo comienza, ya pasada la edición, en el mismo
+    desplazamiento que un token antiguo: desde ahí la entrada es idéntica, así
+    que el resto de tokens antiguos se copia desplazando su inicio. Una edición
+    que abre o cierra un string o un comentario simplemente extiende el escaneo
+    hasta que las dos secuencias vuelven a coincidir.
+
+    Con recover=True, como en Lexer, un lexema inválido (por ejemplo un string
+    a medio escribir) queda como un token ERROR en lugar de lanzar LexerError.
+    """
+    old_source = buffer.source
+    if not 0 <= start <= start + deleted <= len(old_source):
+        raise ValueError(f"Edición fuera del código fuente: inicio {start}, borrados {deleted}")
+    source = old_source[:start] + inserted + old_source[start + deleted:]
+    delta = len(inserted) - deleted
+    old_edit_end = start + deleted
+    new_edit_end = start + len(inserted)
+
+    kinds, starts, lengths = buffer.kinds, buffer.starts, buffer.lengths
+    last = len(kinds) - 1  # Índice del EOF
+
+    # Primer token que no termina estrictamente antes de la edición
+    first = bisect_left(starts, start, 0, last)
+    if first and starts[first - 1] + lengths[first - 1] >= start:
+        first -= 1
+    if recover:
+        first = first_unclosed(buffer, first)
+    restart = starts[first - 1] + lengths[first - 1] if first else 0
+
+    result = TokenBuffer(source, buffer.line_index.edited(source, start, deleted, inserted), buffer.symbols)
+    result.kinds = kinds[:first]
+    result.starts = starts[:first]
+    result.lengths = lengths[:first]
+    append = result.append
+    comment = TokenType.COMMENT
+
+    lexer = Lexer(source, engine="regex", symbols=buffer.symbols, recover=recover)
+    lexer.jump_to(restart)
+    resync = None
+    for token_type, token_start, token_end in lexer.scan_regex_positions():
+        if token_type is comment:
+            continue
+        if token_start >= new_edit_end:
+            old_start = token_start - delta
+            index = bisect_left(starts, old_start, first, last)
+            if index < last and starts[index] == old_start and old_start >= old_edit_end:
+                resync = index
+                break
+        append(token_type, token_start, token_end - token_start)
+
+    if resync is None:
+        append(TokenType.EOF, len(source), 0)
+    else:
+        # La cola intacta se copia; sólo cambian sus desplazamientos
+        result.kinds.extend(kinds[resync:])
+        result.starts.extend(array('q', [offset + delta for offset in starts[resync:]]))
+        result.lengths.extend(lengths[resync:])
+    return result
@@ -1,4 +1,11 @@
-from .tokens import Token, TokenType, KEYWORDS, SINGLE_CHAR_TOKENS
+import mmap
+from bisect import bisect_right
+
+from .tokens import Token, TokenType, KEYWORDS, SINGLE_CHAR_TOKENS, FIXED_TEXT, FIXED_LEXEMES
+from .regex_engine import ScanError, scan, resume_offset
+from .token_buffer import TokenBuffer
+from .line_index import LineIndex
+from .symbols import SymbolTable
 
 class LexerError(Exception):
     # Excepción para errores léxicos
@@ -10,22 +17,62 @@ class LexerError(Exception):
 
 class Lexer:
     # Analizador léxico de código fuente a tokens
-    def __init__(self, source_code):
+    # Motores disponibles: 'char' recorre carácter por carácter, 'regex' usa un patrón maestro compilado
+    # Con recover=True los lexemas inválidos se emiten como tokens ERROR y sus errores se acumulan en self.errors
+    ENGINES = ('char', 'regex')
+
+    def __init__(self, source_code, engine="char", symbols: SymbolTable = None, recover=False):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor léxico desconocido: '{engine}' (opciones: {', '.join(self.ENGINES)})")
+        if engine != "regex" and not isinstance(source_code, str):
+            raise ValueError("Sólo el motor 'regex' puede escanear código fuente en bytes")
         self.source = source_code
+        self.engine = engine
         self.pos = 0
-        self.line = 1
-        self.column = 1
         self.current_char = self.source[0] if self.source else None
+        # Línea y columna se calculan a partir del desplazamiento sólo cuando se necesitan
+        self.line_index = LineIndex(self.source)
+        # Tabla de símbolos de la compilación; puede compartirse entre varios lexers
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.recover = recover
+        self.errors = []
+
+    @classmethod
+    def from_path(cls, path, symbols: SymbolTable = None, recover=False):
+        """Crea un lexer sobre el archivo mapeado en memoria (UTF-8), sin leerlo ni decodificarlo completo.
+        Las posiciones de tokens y errores son las mismas que al escanear el texto decodificado."""
+        with open(path, 'rb') as file:
+            # mmap no admite archivos vacíos; el mapeo sobrevive al cierre del archivo
+            source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if file.seek(0, 2) else b''
+        return cls(source, engine="regex", symbols=symbols, recover=recover)
+
+    def close(self):
+        # Libera el mapeo en memoria creado por from_path (los tokens ya decodificados siguen siendo válidos)
+        if isinstance(self.source, mmap.mmap):
+            self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def line(self):
+        # Línea de la posición actual
+        return self.line_index.position(self.pos)[0]
+
+    @property
+    def column(self):
+        # Columna de la posición actual
+        return self.line_index.position(self.pos)[1]
+
+    def position(self, offset):
+        # Convierte un desplazamiento del codigo fuente en (linea, columna)
+        return self.line_index.position(offset)
 
     def advance(self):
         # Avanza al siguiente caracter en el codigo fuente
-        # Si el caracter actual es un salto de linea, incrementa la linea y resetea la columna
-        if self.current_char == '\n':
-            self.line += 1
-            self.column = 1
-        # Si no, simplemente avanza la posicion y la columna
-        else:
-            self.column += 1
         self.pos += 1
         # Actualiza el caracter actual, o lo pone en None si se llega al final del codigo fuente
         self.current_char = self.source[self.pos] if self.pos < len(self.source) else None
@@ -35,6 +82,11 @@ class Lexer:
         peek_pos = self.pos + offset
         return self.source[peek_pos] if peek_pos < len(self.source) else None
 
+    def jump_to(self, end):
+        # Avanza directamente hasta el desplazamiento 'end'
+        self.pos = end
+        self.current_char = self.source[end] if end < len(self.source) else None
+
     def skip_whitespace(self):
         """Ignora espacios en blanco, tabs y saltos de línea"""
         while self.current_char and self.current_char in ' \t\n\r':
@@ -42,101 +94,80 @@ class Lexer:
     
     def read_comment(self):
         """Lee un comentario //texto//"""
-        start_line = self.line
-        start_col = self.column
-        
-        # Consumir el primer //
-        self.advance()  # primer /
-        self.advance()  # segundo /
+        start_line, start_col = self.position(self.pos)
+        start = self.pos
         
-        comment_text = ""
+        # Buscar el cierre // después de la apertura
+        close = self.source.find('//', start + 2)
+        if close == -1:
+            raise LexerError("Comentario no cerrado (se esperaba ' // ')", start_line, start_col)
         
-        # Leer hasta encontrar el cierre //
-        while self.current_char:
-            if self.current_char == '/' and self.peek() == '/':
-                # Encontramos el cierre
-                self.advance()  # primer /
-                self.advance()  # segundo /
-                return Token(TokenType.COMMENT, f"//{comment_text}//", start_line, start_col)
-            else:
-                comment_text += self.current_char
-                self.advance()
-        
-        # Si llegamos aquí, no se cerró el comentario
-        raise LexerError("Comentario no cerrado (se esperaba ' // ')", start_line, start_col)
+        self.jump_to(close + 2)
+        return Token(TokenType.COMMENT, self.source[start:self.pos], start_line, start_col)
     
     def read_string(self):
         """Lee un string literal "texto" """
-        start_line = self.line
-        start_col = self.column
+        start_line, start_col = self.position(self.pos)
+        start = self.pos
         
-        self.advance()  # Consumir la comilla inicial "
-        string_value = ""
-        
-        while self.current_char and self.current_char != '"':
-            string_value += self.current_char
-            self.advance()
-        
-        if self.current_char == '"':
-            self.advance()  # Consumir la comilla final "
-            return Token(TokenType.STRING_LIT, f'"{string_value}"', start_line, start_col)
-        else:
+        # Buscar la comilla final "
+        close = self.source.find('"', start + 1)
+        if close == -1:
             raise LexerError("String literal no cerrado (se esperaba ' \" ')", start_line, start_col)
+        
+        self.jump_to(close + 1)
+        return Token(TokenType.STRING_LIT, self.source[start:self.pos], start_line, start_col)
     
     def read_number(self):
         """Lee un número: entero, decimal o notación científica"""
-        start_line = self.line
-        start_col = self.column
-        num_str = ""
+        start_line, start_col = self.position(self.pos)
+        start = self.pos
         
         # Parte entera
         while self.current_char and self.current_char.isdigit():
-            num_str += self.current_char
             self.advance()
         
         # Parte decimal (opcional)
         if self.current_char == '.':
-            num_str += self.current_char
             self.advance()
             
             while self.current_char and self.current_char.isdigit():
-                num_str += self.current_char
                 self.advance()
         
         # Notación científica (opcional)
         if self.current_char and self.current_char in 'eE':
-            num_str += self.current_char
             self.advance()
             
             # Signo opcional
             if self.current_char and self.current_char in '+-':
-                num_str += self.current_char
                 self.advance()
             
             # Exponente (debe tener al menos un dígito)
             if not (self.current_char and self.current_char.isdigit()):
+                num_str = self.source[start:self.pos]
                 raise LexerError(f"Número en notación científica inválido: ' {num_str} '", start_line, start_col)
             
             while self.current_char and self.current_char.isdigit():
-                num_str += self.current_char
                 self.advance()
         
-        return Token(TokenType.NUM, num_str, start_line, start_col)
+        return Token(TokenType.NUM, self.source[start:self.pos], start_line, start_col)
     
     def read_identifier(self):
         """Lee un identificador o palabra reservada"""
-        start_line = self.line
-        start_col = self.column
-        id_str = ""
+        start_line, start_col = self.position(self.pos)
+        start = self.pos
         
         # Debe comenzar con letra (ya validado antes de llamar)
         while self.current_char and (self.current_char.isalnum() or self.current_char == '_'):
-            id_str += self.current_char
             self.advance()
         
         # Verificar si es palabra reservada
-        token_type = KEYWORDS.get(id_str, TokenType.ID)
-        return Token(token_type, id_str, start_line, start_col)
+        id_str = self.source[start:self.pos]
+        token_type = KEYWORDS.get(id_str)
+        if token_type is not None:
+            return Token(token_type, FIXED_LEXEMES[id_str], start_line, start_col)
+        name, symbol = self.symbols.intern(id_str)
+        return Token(TokenType.ID, name, start_line, start_col, symbol)
     
     def get_next_token(self):
         """Obtiene el siguiente token del código fuente"""
@@ -146,9 +177,6 @@ class Lexer:
                 self.skip_whitespace()
                 continue
             
-            start_line = self.line
-            start_col = self.column
-            
             # Comentarios //texto//
             if self.current_char == '/' and self.peek() == '/':
                 return self.read_comment()
@@ -165,53 +193,56 @@ class Lexer:
             if self.current_char.isalpha():
                 return self.read_identifier()
             
+            # Los lectores anteriores calculan su propia posición; aquí sólo quedan operadores
+            start_line, start_col = self.position(self.pos)
+            
             # Operadores compuestos y de asignación
             if self.current_char == '=':
                 self.advance()
                 if self.current_char == '=':
                     self.advance()
-                    return Token(TokenType.EQUAL, "==", start_line, start_col)
-                return Token(TokenType.ASSIGN, "=", start_line, start_col)
+                    return Token(TokenType.EQUAL, FIXED_TEXT[TokenType.EQUAL], start_line, start_col)
+                return Token(TokenType.ASSIGN, FIXED_TEXT[TokenType.ASSIGN], start_line, start_col)
             
             if self.current_char == '!':
                 self.advance()
                 if self.current_char == '=':
                     self.advance()
-                    return Token(TokenType.NOT_EQUAL, "!=", start_line, start_col)
-                return Token(TokenType.NOT, "!", start_line, start_col)
+                    return Token(TokenType.NOT_EQUAL, FIXED_TEXT[TokenType.NOT_EQUAL], start_line, start_col)
+                return Token(TokenType.NOT, FIXED_TEXT[TokenType.NOT], start_line, start_col)
             
             if self.current_char == '<':
                 self.advance()
                 if self.current_char == '=':
                     self.advance()
-                    return Token(TokenType.LESS_EQUAL, "<=", start_line, start_col)
-                return Token(TokenType.LESS_THAN, "<", start_line, start_col)
+                    return Token(TokenType.LESS_EQUAL, FIXED_TEXT[TokenType.LESS_EQUAL], start_line, start_col)
+                return Token(TokenType.LESS_THAN, FIXED_TEXT[TokenType.LESS_THAN], start_line, start_col)
             
             if self.current_char == '>':
                 self.advance()
                 if self.current_char == '=':
                     self.advance()
-                    return Token(TokenType.GREATER_EQUAL, ">=", start_line, start_col)
-                return Token(TokenType.GREATER_THAN, ">", start_line, start_col)
+                    return Token(TokenType.GREATER_EQUAL, FIXED_TEXT[TokenType.GREATER_EQUAL], start_line, start_col)
+                return Token(TokenType.GREATER_THAN, FIXED_TEXT[TokenType.GREATER_THAN], start_line, start_col)
             
             if self.current_char == '&':
                 self.advance()
                 if self.current_char == '&':
                     self.advance()
-                    return Token(TokenType.AND, "&&", start_line, start_col)
+                    return Token(TokenType.AND, FIXED_TEXT[TokenType.AND], start_line, start_col)
                 raise LexerError(f"Carácter inesperado: '&' (se esperaba ' && ')", start_line, start_col)
             
             if self.current_char == '|':
                 self.advance()
                 if self.current_char == '|':
                     self.advance()
-                    return Token(TokenType.OR, "||", start_line, start_col)
+                    return Token(TokenType.OR, FIXED_TEXT[TokenType.OR], start_line, start_col)
                 raise LexerError(f"Carácter inesperado: '|' (se esperaba ' || ')", start_line, start_col)
             
             if self.current_char == '-' and self.peek() == '>':
                 self.advance()  # consumir '-'
                 self.advance()  # consumir '>'
-                return Token(TokenType.ARROW, "->", start_line, start_col)
+                return Token(TokenType.ARROW, FIXED_TEXT[TokenType.ARROW], start_line, start_col)
             
             # Operadores y delimitadores de un solo carácter
             if self.current_char in SINGLE_CHAR_TOKENS:
@@ -223,27 +254,121 @@ class Lexer:
             raise LexerError(f"Carácter no reconocido: ' {self.current_char} '", start_line, start_col)
         
         # Fin del archivo
-        return Token(TokenType.EOF, "", self.line, self.column)
+        return Token(TokenType.EOF, "", *self.position(self.pos))
+    
+    def scan_chars(self):
+        """Genera los tokens del motor por caracteres"""
+        while self.current_char:
+            try:
+                yield self.get_next_token()
+            except LexerError as e:
+                if not self.recover:
+                    raise
+                # El lexema inválido abarca lo mismo que en el motor de patrón maestro
+                start = self.line_index.offset(e.line, e.column)
+                end = resume_offset(self.source, start)
+                self.errors.append(e)
+                self.jump_to(end)
+                yield Token(TokenType.ERROR, self.source[start:end], e.line, e.column)
+    
+    def scan_regex(self):
+        """Genera los tokens del motor de patrón maestro con las mismas posiciones que el motor por caracteres"""
+        source = self.source
+        intern = self.symbols.intern
+        symbol_ids = self.symbols.ids
+        names = self.symbols.names
+        fixed_text = FIXED_LEXEMES.get
+        identifier = TokenType.ID
+        if not isinstance(source, str):
+            # Sobre bytes cada lexema se decodifica por separado; la columna se cuenta en caracteres
+            position = self.position
+            for token_type, start, end in self.scan_regex_positions():
+                line, column = position(start)
+                if token_type is identifier:
+                    name, symbol = intern(source[start:end].decode('utf-8'))
+                    yield Token(token_type, name, line, column, symbol)
+                else:
+                    value = source[start:end].decode('utf-8')
+                    yield Token(token_type, fixed_text(value, value), line, column)
+            return
+        
+        # Los tokens llegan en orden, así que la línea se avanza sobre la tabla de inicios de línea
+        line_starts = self.line_index.line_starts
+        line = bisect_right(line_starts, self.pos)
+        next_line_start = line_starts[line] if line < len(line_starts) else len(source) + 1
+        
+        for token_type, start, end in self.scan_regex_positions():
+            if start >= next_line_start:
+                line = bisect_right(line_starts, start, line)
+                next_line_start = line_starts[line] if line < len(line_starts) else len(source) + 1
+            column = start - line_starts[line - 1] + 1
+            value = source[start:end]
+            if token_type is identifier:
+                # Todas las ocurrencias de un identificador comparten el str de la tabla de símbolos
+                symbol = symbol_ids.get(value)
+                if symbol is None:
+                    symbol = intern(value)[1]
+                yield Token(token_type, names[symbol], line, column, symbol)
+            else:
+                # Palabras reservadas y operadores reutilizan su texto fijo
+                yield Token(token_type, fixed_text(value, value), line, column)
+    
+    def scan_positions(self):
+        """Genera tuplas (tipo, inicio, fin) del motor seleccionado, incluidos los comentarios"""
+        if self.engine == "regex":
+            yield from self.scan_regex_positions()
+            return
+        
+        eof = TokenType.EOF
+        for token in self.scan_chars():
+            if token.type is eof:
+                return
+            # El valor de cada token es exactamente el lexema, así que termina en la posición actual
+            yield token.type, self.pos - len(token.value), self.pos
+    
+    def scan_regex_positions(self):
+        """Escanea con el patrón maestro; las posiciones sólo se calculan para los errores"""
+        pos = self.pos
+        while True:
+            try:
+                yield from scan(self.source, pos)
+                break
+            except ScanError as e:
+                error = LexerError(e.message, *self.position(e.offset))
+                if not self.recover:
+                    raise error from None
+                # El escaneo se reanuda tras el lexema inválido
+                self.errors.append(error)
+                yield TokenType.ERROR, e.offset, e.end
+                pos = e.end
+        
+        # Dejar el lexer al final del código fuente, igual que el motor por caracteres
+        self.pos = len(self.source)
+        self.current_char = None
+    
+    def iter_tokens(self):
+        """Genera los tokens uno a uno (sin comentarios) terminando siempre en EOF, sin materializar la lista"""
+        scanner = self.scan_regex() if self.engine == "regex" else self.scan_chars()
+        comment = TokenType.COMMENT
+        eof = TokenType.EOF
+        
+        for token in scanner:
+            # No emitir comentarios
+            if token.type is comment:
+                continue
+            yield token
+            if token.type is eof:
+                return
+        
+        # Asegurar que siempre haya un token EOF
+        yield Token(TokenType.EOF, "", *self.position(self.pos))
     
     def tokenize(self):
         """Tokeniza todo el código fuente y retorna la lista de tokens"""
         self.tokens = []
         
         try:
-            while self.current_char:
-                token = self.get_next_token()
-                
-                # No almacenar comentarios en la lista de tokens
-                if token.type != TokenType.COMMENT:
-                    self.tokens.append(token)
-                
-                if token.type == TokenType.EOF:
-                    break
-            
-            # Asegurar que siempre haya un token EOF
-            if not self.tokens or self.tokens[-1].type != TokenType.EOF:
-                self.tokens.append(Token(TokenType.EOF, "", self.line, self.column))
-            
+            self.tokens.extend(self.iter_tokens())
             return self.tokens
         
         except LexerError as e:
@@ -256,6 +381,20 @@ class Lexer:
                 print("   (ninguno)")
             raise
     
+    def tokenize_buffer(self):
+        """Tokeniza todo el código fuente en un TokenBuffer columnar (sin comentarios, terminado en EOF).
+        Si ocurre un error léxico, self.buffer conserva los tokens reconocidos hasta ese punto."""
+        buffer = self.buffer = TokenBuffer(self.source, self.line_index, self.symbols)
+        append = buffer.append
+        comment = TokenType.COMMENT
+        
+        for token_type, start, end in self.scan_positions():
+            if token_type is not comment:
+                append(token_type, start, end - start)
+        
+        append(TokenType.EOF, self.pos, 0)
+        return buffer
+    
     @staticmethod
     def print_tokens(tokens):
         """Imprime la tabla de tokens de forma formateada"""
@@ -0,0 +1,86 @@
+import re
+from array import array
+from bisect import bisect_right
+
+
+NEWLINE = re.compile('\n')
+NEWLINE_BYTES = re.compile(b'\n')
+
+
+class LineIndex:
+    """Tabla ordenada de los desplazamientos donde comienza cada línea.
+
+    Se construye perezosamente la primera vez que se pide una posición, y
+    convierte un desplazamiento en (línea, columna) con una búsqueda binaria,
+    de modo que el escaneo no necesita contar líneas y columnas carácter por
+    carácter.
+
+    Sobre un código fuente en bytes (UTF-8) los desplazamientos son en bytes,
+    pero la columna se sigue contando en caracteres, igual que sobre un str.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.binary = not isinstance(source, str)
+        self._line_starts = None
+        # Última línea encontrada: las consultas suelen llegar en orden creciente
+        self._last_line = 1
+        # Si la última línea es ASCII, la columna es la diferencia de desplazamientos
+        self._last_ascii = True
+
+    @property
+    def line_starts(self):
+        """Desplazamientos de inicio de línea (el primero siempre es 0), en un array compacto de 8 bytes por línea"""
+        if self._line_starts is None:
+            self._line_starts = array('q', [0])
+            newline = NEWLINE_BYTES if self.binary else NEWLINE
+            self._line_starts.extend(m.end() for m in newline.finditer(self.source))
+            self._last_ascii = self._line_is_ascii(1)
+        return self._line_starts
+
+    def edited(self, source, start, deleted, inserted):
+        """LineIndex de 'source', resultado de una edición sobre este código fuente.
+        Si la tabla ya estaba construida se deriva de ella sin buscar de nuevo cada salto de línea."""
+        index = LineIndex(source)
+        if self._line_starts is not None:
+            line_starts = self._line_starts
+            newline = NEWLINE_BYTES if index.binary else NEWLINE
+            delta = len(inserted) - deleted
+            # Se conservan las líneas que empiezan hasta la edición y se desplazan las posteriores
+            line_starts_new = line_starts[:bisect_right(line_starts, start)]
+            line_starts_new.extend(start + m.end() for m in newline.finditer(inserted))
+            line_starts_new.extend([offset + delta for offset in line_starts[bisect_right(line_starts, start + deleted):]])
+            index._line_starts = line_starts_new
+            index._last_ascii = index._line_is_ascii(1)
+        return index
+
+    def _line_is_ascii(self, line):
+        # Sólo las líneas en bytes con caracteres multibyte requieren decodificar para la columna
+        if not self.binary:
+            return True
+        line_starts = self._line_starts
+        end = line_starts[line] if line < len(line_starts) else len(self.source)
+        return self.source[line_starts[line - 1]:end].isascii()
+
+    def position(self, offset):
+        """Convierte un desplazamiento en (línea, columna), ambas desde 1"""
+        line_starts = self.line_starts
+        line = self._last_line
+        if offset < line_starts[line - 1] or (line < len(line_starts) and offset >= line_starts[line]):
+            line = self._last_line = bisect_right(line_starts, offset)
+            self._last_ascii = self._line_is_ascii(line)
+        if self._last_ascii:
+            return line, offset - line_starts[line - 1] + 1
+        return line, len(self.source[line_starts[line - 1]:offset].decode('utf-8', 'replace')) + 1
+
+    def offset(self, line, column):
+        """Convierte (línea, columna) en desplazamiento"""
+        start = self.line_starts[line - 1]
+        if self._line_is_ascii(line):
+            return start + column - 1
+        text = self.source[start:start + 4 * (column - 1)].decode('utf-8', 'ignore')
+        return start + len(text[:column - 1].encode('utf-8'))
+
+    def __len__(self):
+        """Número de líneas del código fuente"""
+        return len(self.line_starts)
@@ -0,0 +1,228 @@
+import re
+
+from .tokens import TokenType, KEYWORDS, SINGLE_CHAR_TOKENS, MULTI_CHAR_TOKENS
+
+
+class ScanError(Exception):
+    # Error de escaneo ubicado por desplazamiento; el Lexer lo traduce a LexerError.
+    # end es el desplazamiento donde puede reanudarse el escaneo (fin del lexema inválido)
+    def __init__(self, message, offset, end=None):
+        self.message = message
+        self.offset = offset
+        self.end = offset + 1 if end is None else end
+        super().__init__(message)
+
+
+# Operadores reconocidos por el patrón maestro (los de dos caracteres van primero)
+OPERATOR_TOKENS = {
+    '=': TokenType.ASSIGN,
+    '!': TokenType.NOT,
+    '<': TokenType.LESS_THAN,
+    '>': TokenType.GREATER_THAN,
+    **SINGLE_CHAR_TOKENS,
+    **MULTI_CHAR_TOKENS,
+}
+
+
+# Grupos del patrón maestro, en el orden en que se prueban las alternativas
+(ID_GROUP, NUM_GROUP, COMMENT_GROUP, COMMENT_OPEN_GROUP, MULTI_OP_GROUP,
+ SINGLE_OP_GROUP, STRING_GROUP, STRING_OPEN_GROUP, OTHER_GROUP) = range(1, 10)
+
+
+def build_master_pattern(binary=False):
+    """Construye la alternancia única que reconoce cualquier lexema en una sola pasada.
+    Con binary=True el patrón opera sobre bytes (la gramática fuera de strings y comentarios es ASCII)."""
+    multi_ops = sorted((op for op in OPERATOR_TOKENS if len(op) > 1), key=len, reverse=True)
+    single_ops = ''.join(re.escape(op) for op in OPERATOR_TOKENS if len(op) == 1)
+    parts = [
+        r'[A-Za-z][A-Za-z0-9_]*',
+        # El exponente se acepta vacío aquí y se valida después para reportar el error
+        r'[0-9]+(?:\.[0-9]*)?(?:[eE][+-]?[0-9]*)?',
+        # El comentario va antes que los operadores para que '//' no se lea como dos '/';
+        # el contenido no admite '//', así que cierra en la primera aparición como el motor por caracteres
+        r'//[^/]*(?:/[^/]+)*//',
+        r'//',
+        '|'.join(re.escape(op) for op in multi_ops),
+        f'[{single_ops}]',
+        r'"[^"]*"',
+        r'"',
+        r'[^ \t\n\r]',
+    ]
+    # Los espacios en blanco se consumen como prefijo de cada coincidencia
+    regex = r'[ \t\n\r]*(?:' + '|'.join(f'({part})' for part in parts) + ')'
+    return re.compile(regex.encode('ascii') if binary else regex, re.DOTALL)
+
+
+MASTER_PATTERN = build_master_pattern()
+MASTER_PATTERN_BYTES = build_master_pattern(binary=True)
+
+# Tablas equivalentes con llaves en bytes para escanear archivos mapeados en memoria
+KEYWORDS_BYTES = {keyword.encode('ascii'): token_type for keyword, token_type in KEYWORDS.items()}
+OPERATOR_TOKENS_BYTES = {op.encode('ascii'): token_type for op, token_type in OPERATOR_TOKENS.items()}
+
+# Bytes que pueden formar parte de un número o identificador (incluido cualquier byte no ASCII)
+WORD_RUN_BYTES = re.compile(rb'[A-Za-z0-9_.+\-\x80-\xff]*')
+
+
+def read_word(source, pos):
+    """Lee un número o identificador con las reglas Unicode del motor por caracteres"""
+    length = len(source)
+    char = source[pos]
+
+    if char.isdigit():
+        end = pos
+        while end < length and source[end].isdigit():
+            end += 1
+        if end < length and source[end] == '.':
+            end += 1
+            while end < length and source[end].isdigit():
+                end += 1
+        if end < length and source[end] in 'eE':
+            end += 1
+            if end < length and source[end] in '+-':
+                end += 1
+            if not (end < length and source[end].isdigit()):
+                raise ScanError(f"Número en notación científica inválido: ' {source[pos:end]} '", pos, end)
+            while end < length and source[end].isdigit():
+                end += 1
+        return TokenType.NUM, end
+
+    if char.isalpha():
+        end = pos + 1
+        while end < length and (source[end].isalnum() or source[end] == '_'):
+            end += 1
+        return KEYWORDS.get(source[pos:end], TokenType.ID), end
+
+    return None, pos
+
+
+def unexpected_char(char, pos, end):
+    """Error para un carácter que no inicia ningún lexema"""
+    if char in '&|':
+        raise ScanError(f"Carácter inesperado: '{char}' (se esperaba ' {char * 2} ')", pos, end)
+    raise ScanError(f"Carácter no reconocido: ' {char} '", pos, end)
+
+
+def read_other(source, pos):
+    """Resuelve el caso poco frecuente de un carácter fuera de las alternativas ASCII"""
+    token_type, end = read_word(source, pos) if source[pos] >= '\x80' else (None, pos)
+    if token_type is None:
+        unexpected_char(source[pos], pos, pos + 1)
+    return token_type, end
+
+
+def read_word_bytes(source, pos):
+    """Versión de read_word para bytes: decodifica sólo el tramo que puede formar la palabra.
+
+    El tramo termina en un byte ASCII que no puede continuar un número ni un
+    identificador, así que read_word sobre el texto decodificado es exacto.
+    """
+    run_end = WORD_RUN_BYTES.match(source, pos).end()
+    text = source[pos:run_end].decode('utf-8')
+    try:
+        token_type, end = read_word(text, 0)
+    except ScanError as e:
+        raise ScanError(e.message, pos, pos + len(text[:e.end].encode('utf-8'))) from None
+    if token_type is None:
+        return None, pos
+    return token_type, pos + len(text[:end].encode('utf-8'))
+
+
+def read_other_bytes(source, pos):
+    """Versión de read_other para bytes"""
+    if source[pos] < 0x80:
+        unexpected_char(chr(source[pos]), pos, pos + 1)
+    token_type, end = read_word_bytes(source, pos)
+    if token_type is None:
+        char = WORD_RUN_BYTES.match(source, pos).group().decode('utf-8')[0]
+        unexpected_char(char, pos, pos + len(char.encode('utf-8')))
+    return token_type, end
+
+
+# Tablas de cada variante: patrón, palabras reservadas, operadores, primer valor no ASCII,
+# caracteres que no pueden cerrar un número, salto de línea y lectores de los casos lentos
+SCAN_TABLES = {
+    False: (MASTER_PATTERN, KEYWORDS, OPERATOR_TOKENS, '\x80', 'eE+-', '\n', read_word, read_other),
+    True: (MASTER_PATTERN_BYTES, KEYWORDS_BYTES, OPERATOR_TOKENS_BYTES, 0x80, b'eE+-', b'\n',
+           read_word_bytes, read_other_bytes),
+}
+
+
+def scan(source, pos=0):
+    """Genera tuplas (tipo, inicio, fin) para cada lexema, incluidos los comentarios.
+
+    El patrón maestro sólo cubre el caso ASCII; cuando un número o identificador
+    toca un carácter no ASCII se relee con `read_word` para conservar exactamente
+    la semántica de isdigit()/isalpha() del motor por caracteres. El código
+    fuente puede ser str o un objeto de bytes (bytes, mmap); en ese caso los
+    desplazamientos son en bytes.
+    """
+    pattern, keywords, operators, high, exponent, newline, slow_word, slow_other = \
+        SCAN_TABLES[not isinstance(source, str)]
+    finditer = pattern.finditer
+    identifier = TokenType.ID
+    number = TokenType.NUM
+    comment = TokenType.COMMENT
+    string = TokenType.STRING_LIT
+    length = len(source)
+
+    while pos < length:
+        for m in finditer(source, pos):
+            group = m.lastindex
+            start = m.start(group)
+            end = m.end()
+
+            if group <= NUM_GROUP:
+                if end < length and source[end] >= high:
+                    # Un carácter no ASCII puede continuar el lexema: se relee y se
+                    # reinicia la búsqueda si el lexema creció
+                    token_type, pos = slow_word(source, start)
+                    yield token_type, start, pos
+                    if pos != end:
+                        break
+                    continue
+                if group == ID_GROUP:
+                    token_type = keywords.get(m.group(group), identifier)
+                elif source[end - 1] in exponent:
+                    raise ScanError(f"Número en notación científica inválido: ' {_text(m.group(group))} '", start, end)
+                else:
+                    token_type = number
+            elif group <= SINGLE_OP_GROUP and group != COMMENT_OPEN_GROUP:
+                token_type = comment if group == COMMENT_GROUP else operators[m.group(group)]
+            elif group == STRING_GROUP:
+                token_type = string
+            elif group == COMMENT_OPEN_GROUP:
+                raise ScanError("Comentario no cerrado (se esperaba ' // ')", start, _line_end(source, start, newline))
+            elif group == STRING_OPEN_GROUP:
+                raise ScanError("String literal no cerrado (se esperaba ' \" ')", start, _line_end(source, start, newline))
+            else:
+                token_type, pos = slow_other(source, start)
+                yield token_type, start, pos
+                if pos != end:
+                    break
+                continue
+
+            yield token_type, start, end
+        else:
+            return
+
+
+def _line_end(source, pos, newline):
+    # Un comentario o string sin cerrar se descarta hasta el fin de su línea
+    end = source.find(newline, pos)
+    return len(source) if end < 0 else end
+
+
+def resume_offset(source, pos):
+    """Desplazamiento donde se reanuda el escaneo tras el lexema inválido que empieza en pos"""
+    try:
+        for _ in scan(source, pos):
+            break
+    except ScanError as e:
+        return e.end
+    return pos + 1
+
+
+def _text(lexeme):
+    # Los lexemas de números son ASCII en ambas variantes
+    return lexeme if isinstance(lexeme, str) else lexeme.decode('ascii')
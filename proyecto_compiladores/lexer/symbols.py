@@ -0,0 +1,34 @@
+class SymbolTable:
+    """Tabla de símbolos de una compilación: internaliza el texto de los identificadores.
+
+    Cada identificador distinto recibe un id entero pequeño (en orden de
+    aparición) y todas sus ocurrencias comparten el mismo str, de modo que las
+    fases posteriores pueden comparar identificadores por id en lugar de por
+    igualdad de cadenas.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def intern(self, name):
+        """Retorna (texto compartido, id) del identificador, registrándolo si es nuevo"""
+        symbol = self.ids.get(name)
+        if symbol is None:
+            symbol = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return self.names[symbol], symbol
+
+    def lookup(self, name):
+        """Id del identificador, o None si nunca se ha visto"""
+        return self.ids.get(name)
+
+    def name(self, symbol):
+        """Texto del identificador con el id indicado"""
+        return self.names[symbol]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
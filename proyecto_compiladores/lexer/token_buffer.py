@@ -0,0 +1,78 @@
+from array import array
+from collections.abc import Sequence
+
+from .tokens import Token, TokenType, FIXED_TEXT
+from .line_index import LineIndex
+from .symbols import SymbolTable
+
+
+# TokenType indexado por su valor (auto() empieza en 1)
+TOKEN_TYPES = (None, *TokenType)
+
+
+class TokenBuffer(Sequence):
+    """Tokens almacenados por columnas en arrays compactos.
+
+    Cada token ocupa un byte de tipo, su desplazamiento de inicio y su longitud;
+    el valor se obtiene como un slice del código fuente, la línea y la columna
+    se calculan con el LineIndex, y los objetos Token sólo se crean cuando se
+    indexa el buffer. Si el código fuente está en bytes (un archivo mapeado
+    en memoria) sólo se decodifican los lexemas que se consultan. Los tokens
+    con texto fijo comparten su str y los identificadores se internalizan en
+    la tabla de símbolos al materializarse.
+    """
+
+    def __init__(self, source, line_index: LineIndex = None, symbols: SymbolTable = None):
+        self.source = source
+        self.binary = not isinstance(source, str)
+        self.line_index = line_index if line_index is not None else LineIndex(source)
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.kinds = array('B')
+        self.starts = array('q')
+        self.lengths = array('I')
+
+    def append(self, token_type: TokenType, start: int, length: int):
+        """Agrega un token al final del buffer"""
+        self.kinds.append(token_type.value)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        token_type = TOKEN_TYPES[self.kinds[index]]
+        line, column = self.line_index.position(self.starts[index])
+        if token_type is TokenType.ID:
+            name, symbol = self.symbols.intern(self.value_at(index))
+            return Token(token_type, name, line, column, symbol)
+        return Token(token_type, self.value_at(index), line, column)
+
+    def type_at(self, index: int) -> TokenType:
+        """Tipo del token sin materializar el Token"""
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def value_at(self, index: int) -> str:
+        """Lexema del token: su texto fijo o un slice del código fuente"""
+        fixed = FIXED_TEXT.get(TOKEN_TYPES[self.kinds[index]])
+        if fixed is not None:
+            return fixed
+        start = self.starts[index]
+        value = self.source[start:start + self.lengths[index]]
+        return value.decode('utf-8') if self.binary else value
+
+    def symbol_at(self, index: int):
+        """Id en la tabla de símbolos si el token es un identificador, o None"""
+        if self.kinds[index] != TokenType.ID.value:
+            return None
+        return self.symbols.intern(self.value_at(index))[1]
+
+    def position_at(self, index: int):
+        """(línea, columna) del token, calculadas a partir de su desplazamiento"""
+        return self.line_index.position(self.starts[index])
+
+    def nbytes(self) -> int:
+        """Bytes ocupados por las columnas (sin contar el código fuente)"""
+        return sum(column.itemsize * len(column) for column in (self.kinds, self.starts, self.lengths))
@@ -1,5 +1,6 @@
 from enum import Enum, auto
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 
 class TokenType(Enum):
     # Literales
@@ -68,6 +69,10 @@ class TokenType(Enum):
     COMMENT = auto()       # //texto//
     EOF = auto()           # Fin de archivo
     ERROR = auto()         # Token de error
+    
+    # Los miembros son únicos, así que basta el hash por identidad; el de Enum se
+    # calcula en Python y pesa en cada búsqueda en las tablas indexadas por tipo
+    __hash__ = object.__hash__
 
 
 @dataclass
@@ -77,6 +82,8 @@ class Token:
     value: str
     line: int
     column: int
+    # Id del identificador en la tabla de símbolos (sólo tokens ID)
+    symbol: Optional[int] = field(default=None, compare=False)
     
     # Representa el token como una cadena legible
     def __str__(self):
@@ -122,4 +129,33 @@ SINGLE_CHAR_TOKENS = {
     ']': TokenType.RBRACKET,
     ':': TokenType.COLON,
     ';': TokenType.SEMICOLON,
-}
\ No newline at end of file
+}
+
+# Operadores de dos caracteres
+MULTI_CHAR_TOKENS = {
+    '==': TokenType.EQUAL,
+    '!=': TokenType.NOT_EQUAL,
+    '<=': TokenType.LESS_EQUAL,
+    '>=': TokenType.GREATER_EQUAL,
+    '&&': TokenType.AND,
+    '||': TokenType.OR,
+    '->': TokenType.ARROW,
+}
+
+# Texto fijo de cada tipo de token cuyo lexema es siempre el mismo; los tokens
+# de estos tipos comparten este str en lugar de crear uno nuevo por ocurrencia
+FIXED_TEXT = {
+    token_type: text
+    for table in (KEYWORDS, SINGLE_CHAR_TOKENS, MULTI_CHAR_TOKENS)
+    for text, token_type in table.items()
+}
+FIXED_TEXT.update({
+    TokenType.ASSIGN: '=',
+    TokenType.NOT: '!',
+    TokenType.LESS_THAN: '<',
+    TokenType.GREATER_THAN: '>',
+})
+
+# El mismo texto indexado por el lexema: obtiene el str compartido a partir de un slice
+# sin pasar por el hash de TokenType, que en Enum se calcula en Python
+FIXED_LEXEMES = {text: text for text in FIXED_TEXT.values()}
@@ -1,14 +1,27 @@
 from .ast_nodes import *
 from .parser import Parser, ParserError
+from .token_stream import TokenLookahead
+from .iterative import IterativeParser
+from .incremental import IncrementalParse
+from .parallel import ParallelParser
+from .arena import Arena, NodeView
+from .visitor import NodeVisitor, NodeTransformer, walk, iter_child_nodes
+from .serialize import ASTCache
+from .hashcons import NodeTable, SharedNode
+from .export import iter_text, iter_json
+from .resolver import Resolver, ResolutionError, Binding
 
 __all__ = [
     # Parser
-    'Parser', 'ParserError',
+    'Parser', 'ParserError', 'TokenLookahead', 'IterativeParser', 'IncrementalParse', 'ParallelParser',
+    'Arena', 'NodeView', 'NodeVisitor', 'NodeTransformer', 'walk', 'iter_child_nodes', 'ASTCache',
+    'NodeTable', 'SharedNode', 'iter_text', 'iter_json', 'Resolver', 'ResolutionError', 'Binding',
     # AST Nodes
     'ASTNode', 'Program', 'ModuleDecl', 'QualID', 'ImportDecl',
     'TypeDecl', 'StructDecl', 'Field', 'ConstDecl', 'FunDecl', 'Param',
     'SimpleType', 'ArrayType', 'FunctionType',
-    'LetDecl', 'ExprStmt', 'IfStmt', 'WhileStmt', 'ReturnStmt', 'Block',
+    'LetDecl', 'ExprStmt', 'IfStmt', 'WhileStmt', 'ReturnStmt', 'Block', 'LazyBlock',
     'NumLiteral', 'StringLiteral', 'BoolLiteral', 'Identifier', 'ParenExpr',
-    'BinaryOp', 'UnaryOp', 'FunctionCall', 'ArrayAccess', 'MemberAccess', 'Assignment'
+    'BinaryOp', 'UnaryOp', 'FunctionCall', 'ArrayAccess', 'MemberAccess', 'Assignment',
+    'ErrorNode', 'iter_fields'
 ]
\ No newline at end of file
@@ -0,0 +1,279 @@
+from array import array
+from typing import Iterator, List, Optional
+
+from lexer import TokenType
+from .ast_nodes import *
+from .hashcons import SHARED_CLASSES
+from .parser import Parser, IMPORT_SYNC
+
+
+# Clase de cada código de la columna 'kinds'
+NODE_CLASSES = tuple(FIELD_SHAPES)
+NODE_KINDS = {cls: kind for kind, cls in enumerate(NODE_CLASSES)}
+# Un LazyBlock se guarda como el Block que resulta de analizarlo, y un nodo compartido como su clase base
+NODE_KINDS[LazyBlock] = NODE_KINDS[Block]
+NODE_KINDS.update({shared: NODE_KINDS[cls] for cls, shared in SHARED_CLASSES.items()})
+# Campos de cada código, en el orden de NODE_CLASSES
+KIND_FIELDS = tuple(NODE_FIELDS[cls] for cls in NODE_CLASSES)
+
+
+class Arena:
+    """AST plano: cada nodo es un índice en columnas array paralelas, sin un objeto por nodo.
+    
+    Los nodos se numeran en preorden, así que el subárbol del nodo i son los
+    índices [i, subtree_ends[i]) y recorrerlo es recorrer un range. Por nodo
+    se guardan su clase (kinds, código en NODE_CLASSES), su tramo de tokens
+    (starts, ends), su padre (parents, -1 en la raíz) y dónde empiezan sus
+    campos en 'edges' (fields). Cada campo ocupa en 'edges' lo que indica
+    FIELD_SHAPES: el índice de un hijo (-1 si es None), la cantidad de una
+    lista seguida de sus elementos, o índices en 'constants' para nombres,
+    operadores, literales e ids de símbolo (cada valor distinto se guarda
+    una vez). NodeView da acceso a los nodos por nombre de campo y to_node()
+    reconstruye los objetos de ast_nodes.
+    """
+    
+    def __init__(self):
+        self.kinds = array('B')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.parents = array('i')
+        self.subtree_ends = array('i')
+        self.fields = array('i')
+        self.edges = array('i')
+        self.constants = []
+        self.constant_ids = {}
+        # Errores de from_tokens(..., recover=True); None si el análisis no se recupera
+        self.errors = None
+    
+    @classmethod
+    def from_program(cls, program: ASTNode) -> 'Arena':
+        """Arena con el árbol de objetos 'program' (cualquier nodo sirve de raíz)"""
+        arena = cls()
+        arena.add(program)
+        return arena
+    
+    @classmethod
+    def from_tokens(cls, tokens, parser_class=Parser, recover: bool = False) -> 'Arena':
+        """Analiza los tokens y construye la Arena declaración por declaración.
+        
+        Como Parser.iter_top_decls(), cada declaración se pasa a la Arena en
+        cuanto está completa y sus objetos se liberan, así que nunca existe el
+        árbol de objetos completo. Con recover=True los errores quedan en
+        self.errors, como en parse_with_recovery().
+        """
+        arena = cls()
+        # Los tramos de la Arena son columnas de enteros: guardarlos no cuesta un int por nodo
+        parser = parser_class(tokens, spans=True)
+        root = arena.append_node(Program, 0, -1, -1)
+        if recover:
+            parser.errors = []
+            module_decl = parser.parse_recovering(parser.parse_module_decl, IMPORT_SYNC)
+        else:
+            module_decl = parser.parse_module_decl()
+        module_decl = arena.add(module_decl, root)
+        imports = array('i', [arena.add(node, root) for node in parser.iter_import_list()])
+        declarations = array('i', [arena.add(node, root) for node in parser.iter_top_list()])
+        arena.ends[root] = parser.pos
+        if not recover:
+            parser.expect(TokenType.EOF)
+        
+        # Los campos del Program se escriben al final, cuando ya se conocen sus hijos
+        edges = arena.edges
+        arena.fields[root] = len(edges)
+        edges.append(module_decl)
+        edges.append(len(imports))
+        edges.extend(imports)
+        edges.append(len(declarations))
+        edges.extend(declarations)
+        arena.subtree_ends[root] = len(arena.kinds)
+        arena.errors = parser.errors
+        return arena
+    
+    def __len__(self):
+        return len(self.kinds)
+    
+    @property
+    def root(self) -> 'NodeView':
+        """Vista del primer nodo (el Program)"""
+        return NodeView(self, 0)
+    
+    def view(self, index: int) -> 'NodeView':
+        """Vista del nodo 'index'"""
+        return NodeView(self, index)
+    
+    def constant(self, value) -> int:
+        """Índice del valor en 'constants', agregándolo si es nuevo (-1 para None)"""
+        if value is None:
+            return -1
+        # Fuera de los str el tipo es parte de la clave: True == 1 pero son constantes distintas
+        key = value if value.__class__ is str else (value.__class__, value)
+        index = self.constant_ids.get(key)
+        if index is None:
+            index = self.constant_ids[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+    
+    def append_node(self, cls, start: int, end: int, parent: int) -> int:
+        """Agrega las columnas de un nodo sin campos ni subárbol todavía y retorna su índice"""
+        index = len(self.kinds)
+        self.kinds.append(NODE_KINDS[cls])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.parents.append(parent)
+        self.subtree_ends.append(index + 1)
+        self.fields.append(len(self.edges))
+        return index
+    
+    def add(self, node: ASTNode, parent: int = -1) -> int:
+        """Agrega el subárbol de objetos 'node' en preorden y retorna el índice de su raíz"""
+        edges = self.edges
+        constant = self.constant
+        root = len(self.kinds)
+        # (nodo, índice del padre, posición de 'edges' que recibe su índice); None cierra un subárbol
+        pending = [(node, parent, -1)]
+        while pending:
+            item = pending.pop()
+            if item[0] is None:
+                self.subtree_ends[item[1]] = len(self.kinds)
+                continue
+            node, parent, slot = item
+            index = self.append_node(type(node), node.start, node.end, parent)
+            if slot >= 0:
+                edges[slot] = index
+            
+            children = []
+            for name, shape in KIND_FIELDS[self.kinds[index]]:
+                value = getattr(node, name)
+                if shape == NODE:
+                    if value is not None:
+                        children.append((value, index, len(edges)))
+                    edges.append(-1)
+                elif shape == NODES:
+                    edges.append(len(value))
+                    for child in value:
+                        children.append((child, index, len(edges)))
+                        edges.append(-1)
+                elif shape == VALUE:
+                    edges.append(constant(value))
+                else:
+                    edges.append(len(value))
+                    edges.extend(array('i', [constant(v) for v in value]))
+            
+            pending.append((None, index, -1))
+            pending.extend(reversed(children))
+        return root
+    
+    def walk(self, index: int = 0) -> range:
+        """Índices del subárbol del nodo 'index' en preorden"""
+        return range(index, self.subtree_ends[index])
+    
+    def field_values(self, index: int) -> list:
+        """Valores de los campos del nodo: índices de hijos (None si falta), listas de índices y constantes"""
+        edges, constants = self.edges, self.constants
+        position = self.fields[index]
+        values = []
+        for _, shape in KIND_FIELDS[self.kinds[index]]:
+            entry = edges[position]
+            position += 1
+            if shape == NODE:
+                values.append(entry if entry >= 0 else None)
+            elif shape == VALUE:
+                values.append(constants[entry] if entry >= 0 else None)
+            else:
+                items = edges[position:position + entry]
+                position += entry
+                values.append(list(items) if shape == NODES else [constants[i] for i in items])
+        return values
+    
+    def to_node(self, index: int = 0) -> ASTNode:
+        """Reconstruye los objetos de ast_nodes del subárbol del nodo 'index'"""
+        # En preorden los hijos tienen índices mayores que su padre: construyendo del
+        # último al primero, los hijos de cada nodo ya existen cuando se construye
+        end = self.subtree_ends[index]
+        built = [None] * (end - index)
+        kinds, starts, ends = self.kinds, self.starts, self.ends
+        for current in reversed(range(index, end)):
+            args = []
+            for (_, shape), value in zip(KIND_FIELDS[kinds[current]], self.field_values(current)):
+                if shape == NODE:
+                    args.append(built[value - index] if value is not None else None)
+                elif shape == NODES:
+                    args.append([built[child - index] for child in value])
+                else:
+                    args.append(value)
+            built[current - index] = NODE_CLASSES[kinds[current]](*args, start=starts[current], end=ends[current])
+        return built[0]
+
+
+class NodeView:
+    """Cursor sobre un nodo de una Arena: sus campos se leen por nombre, como en ast_nodes.
+    
+    Un campo de nodo retorna otra NodeView (o None), uno de lista retorna una
+    lista de NodeView y uno de valor retorna la constante.
+    """
+    __slots__ = ('arena', 'index')
+    
+    def __init__(self, arena: Arena, index: int):
+        self.arena = arena
+        self.index = index
+    
+    @property
+    def kind(self) -> type:
+        """Clase de ast_nodes del nodo"""
+        return NODE_CLASSES[self.arena.kinds[self.index]]
+    
+    @property
+    def start(self) -> int:
+        return self.arena.starts[self.index]
+    
+    @property
+    def end(self) -> int:
+        return self.arena.ends[self.index]
+    
+    @property
+    def parent(self) -> Optional['NodeView']:
+        parent = self.arena.parents[self.index]
+        return NodeView(self.arena, parent) if parent >= 0 else None
+    
+    def __getattr__(self, name: str):
+        arena = self.arena
+        for (field_name, shape), value in zip(KIND_FIELDS[arena.kinds[self.index]], arena.field_values(self.index)):
+            if field_name == name:
+                if shape == NODE:
+                    return NodeView(arena, value) if value is not None else None
+                if shape == NODES:
+                    return [NodeView(arena, child) for child in value]
+                return value
+        raise AttributeError(f"{self.kind.__name__} no tiene el campo '{name}'")
+    
+    def children(self) -> List['NodeView']:
+        """Hijos directos en el orden de sus campos"""
+        arena = self.arena
+        children = []
+        for (_, shape), value in zip(KIND_FIELDS[arena.kinds[self.index]], arena.field_values(self.index)):
+            if shape == NODE and value is not None:
+                children.append(NodeView(arena, value))
+            elif shape == NODES:
+                children.extend(NodeView(arena, child) for child in value)
+        return children
+    
+    def walk(self) -> Iterator['NodeView']:
+        """El nodo y todos sus descendientes en preorden"""
+        arena = self.arena
+        for index in arena.walk(self.index):
+            yield NodeView(arena, index)
+    
+    def to_node(self) -> ASTNode:
+        """Objetos de ast_nodes del subárbol"""
+        return self.arena.to_node(self.index)
+    
+    def __eq__(self, other):
+        if isinstance(other, NodeView):
+            return self.arena is other.arena and self.index == other.index
+        return NotImplemented
+    
+    def __hash__(self):
+        return hash((id(self.arena), self.index))
+    
+    def __repr__(self):
+        return f"{self.kind.__name__}#{self.index}"
@@ -1,24 +1,46 @@
-from dataclasses import dataclass
-from typing import List, Optional
-from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, fields
+from typing import Iterator, List, Optional, Tuple
 
 
 # ============================================================================
 # CLASE BASE PARA TODOS LOS NODOS DEL AST
 # ============================================================================
 
-class ASTNode(ABC):
-    """Clase base abstracta para todos los nodos del AST"""
-    @abstractmethod
-    def __repr__(self):
-        pass
+@dataclass(slots=True)
+class ASTNode:
+    """Clase base para todos los nodos del AST.
+    
+    start y end delimitan el tramo de tokens del nodo: índice de su primer
+    token e índice siguiente al último (-1 si el nodo no lo creó un Parser
+    con spans=True). No participan en la igualdad.
+    
+    Todos los nodos son dataclasses con __slots__: no tienen __dict__, así que
+    los campos se recorren con iter_fields() en lugar de vars().
+    """
+    start: int = field(default=-1, compare=False, kw_only=True)
+    end: int = field(default=-1, compare=False, kw_only=True)
+    
+    def __reduce__(self):
+        # Los campos posicionales van al constructor y el tramo como estado: más compacto
+        # y rápido que el estado por omisión de los __slots__ (un dict por nodo)
+        return type(self), tuple([getattr(self, name) for name in self.__match_args__]), (self.start, self.end)
+    
+    def __setstate__(self, state):
+        self.start, self.end = state
+
+
+def iter_fields(node: ASTNode) -> Iterator[Tuple[str, object]]:
+    """Genera (nombre, valor) de cada campo del nodo, sin su tramo (como ast.iter_fields)"""
+    # __match_args__ son los campos posicionales de la dataclass; start y end son kw_only
+    for name in node.__match_args__:
+        yield name, getattr(node, name)
 
 
 # ============================================================================
 # PROGRAMA Y DECLARACIONES DE NIVEL SUPERIOR
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Program(ASTNode):
     """Nodo raíz: module QualID ';' ImportList TopList EOF"""
     module_decl: 'ModuleDecl'
@@ -29,7 +51,7 @@ class Program(ASTNode):
         return f"Program(module={self.module_decl}, imports={self.imports}, decls={self.top_declarations})"
 
 
-@dataclass
+@dataclass(slots=True)
 class ModuleDecl(ASTNode):
     """module QualID ';'"""
     qualified_id: 'QualID'
@@ -38,7 +60,7 @@ class ModuleDecl(ASTNode):
         return f"Module({self.qualified_id})"
 
 
-@dataclass
+@dataclass(slots=True)
 class QualID(ASTNode):
     """ID ('.' ID)*"""
     identifiers: List[str]
@@ -47,7 +69,7 @@ class QualID(ASTNode):
         return ".".join(self.identifiers)
 
 
-@dataclass
+@dataclass(slots=True)
 class ImportDecl(ASTNode):
     """import QualID AsOpt ';'"""
     qualified_id: 'QualID'
@@ -63,7 +85,7 @@ class ImportDecl(ASTNode):
 # DECLARACIONES DE NIVEL SUPERIOR (TopDecl)
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class TypeDecl(ASTNode):
     """type ID '=' Type ';'"""
     name: str
@@ -73,7 +95,7 @@ class TypeDecl(ASTNode):
         return f"TypeDecl({self.name} = {self.type_expr})"
 
 
-@dataclass
+@dataclass(slots=True)
 class StructDecl(ASTNode):
     """struct ID '{' FieldList '}' ';'"""
     name: str
@@ -83,7 +105,7 @@ class StructDecl(ASTNode):
         return f"StructDecl({self.name}, fields={self.fields})"
 
 
-@dataclass
+@dataclass(slots=True)
 class Field(ASTNode):
     """ID ':' Type"""
     name: str
@@ -93,7 +115,7 @@ class Field(ASTNode):
         return f"{self.name}: {self.field_type}"
 
 
-@dataclass
+@dataclass(slots=True)
 class ConstDecl(ASTNode):
     """const ID ':' Type '=' Expr ';'"""
     name: str
@@ -104,7 +126,7 @@ class ConstDecl(ASTNode):
         return f"Const({self.name}: {self.const_type} = {self.value})"
 
 
-@dataclass
+@dataclass(slots=True)
 class FunDecl(ASTNode):
     """fn ID '(' ParamListOpt ')' RetType Block"""
     name: str
@@ -116,7 +138,7 @@ class FunDecl(ASTNode):
         return f"Function({self.name}, params={self.parameters}, return={self.return_type})"
 
 
-@dataclass
+@dataclass(slots=True)
 class Param(ASTNode):
     """ID ':' Type"""
     name: str
@@ -130,16 +152,18 @@ class Param(ASTNode):
 # TIPOS (Type)
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class SimpleType(ASTNode):
     """int | bool | string | QualID | '(' Type ')'"""
     type_name: str  # 'int', 'bool', 'string', o un QualID
+    # Declaración del tipo (o del import de su QualID), anotada por Resolver
+    binding: Optional['Binding'] = field(default=None, compare=False, kw_only=True)
     
     def __repr__(self):
         return self.type_name
 
 
-@dataclass
+@dataclass(slots=True)
 class ArrayType(ASTNode):
     """'[' ']' Type"""
     element_type: 'Type'
@@ -148,7 +172,7 @@ class ArrayType(ASTNode):
         return f"[]{self.element_type}"
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionType(ASTNode):
     """'(' ParamTypeList ')' '->' Type"""
     param_types: List['Type']
@@ -167,7 +191,7 @@ Type = SimpleType | ArrayType | FunctionType
 # STATEMENTS (Stmt)
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class LetDecl(ASTNode):
     """let ID ':' Type LetTail"""
     name: str
@@ -180,7 +204,7 @@ class LetDecl(ASTNode):
         return f"Let({self.name}: {self.var_type})"
 
 
-@dataclass
+@dataclass(slots=True)
 class ExprStmt(ASTNode):
     """Expr ';'"""
     expression: 'Expr'
@@ -189,7 +213,7 @@ class ExprStmt(ASTNode):
         return f"ExprStmt({self.expression})"
 
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt(ASTNode):
     """if '(' Expr ')' Stmt ElseOpt"""
     condition: 'Expr'
@@ -202,7 +226,7 @@ class IfStmt(ASTNode):
         return f"If({self.condition}, then={self.then_stmt})"
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt(ASTNode):
     """while '(' Expr ')' Stmt"""
     condition: 'Expr'
@@ -212,7 +236,7 @@ class WhileStmt(ASTNode):
         return f"While({self.condition}, body={self.body})"
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnStmt(ASTNode):
     """return Expr ';' | return ';'"""
     value: Optional['Expr']
@@ -223,7 +247,7 @@ class ReturnStmt(ASTNode):
         return "Return()"
 
 
-@dataclass
+@dataclass(slots=True)
 class Block(ASTNode):
     """'{' StmtList '}'"""
     statements: List['Stmt']
@@ -232,6 +256,53 @@ class Block(ASTNode):
         return f"Block({len(self.statements)} statements)"
 
 
+class LazyBlock(Block):
+    """Block de una función omitido por Parser.parse_outline().
+    
+    Guarda la clase de parser, los tokens y el tramo de sus llaves; las
+    sentencias se analizan la primera vez que se consultan, con tramos si
+    'spans'. Se compara igual que un Block con las mismas sentencias.
+    """
+    __slots__ = ('_pending', '_statements')
+    
+    def __init__(self, parser_class, tokens, start: int, end: int, spans: bool = True):
+        self._pending = (parser_class, tokens, start, spans)
+        self._statements = None
+        self.start, self.end = (start, end) if spans else (-1, -1)
+    
+    @property
+    def statements(self) -> List['Stmt']:
+        if self._pending is not None:
+            parser_class, tokens, start, spans = self._pending
+            parser = parser_class(tokens, spans=spans)
+            parser.seek(start)
+            self._statements = parser.parse_block().statements
+            self._pending = None
+        return self._statements
+    
+    @statements.setter
+    def statements(self, statements: List['Stmt']):
+        self._statements = statements
+        self._pending = None
+    
+    @property
+    def parsed(self) -> bool:
+        """Indica si las sentencias ya se analizaron"""
+        return self._pending is None
+    
+    def __eq__(self, other):
+        if isinstance(other, Block):
+            return self.statements == other.statements
+        return NotImplemented
+    
+    def __repr__(self):
+        return super().__repr__() if self.parsed else "Block(sin analizar)"
+    
+    def __reduce__(self):
+        # Se serializa como un Block ya analizado: los tokens no viajan con el nodo
+        return Block, (self.statements,), (self.start, self.end)
+
+
 # Alias para facilitar el uso
 Stmt = LetDecl | ExprStmt | IfStmt | WhileStmt | ReturnStmt | Block
 
@@ -241,7 +312,7 @@ Stmt = LetDecl | ExprStmt | IfStmt | WhileStmt | ReturnStmt | Block
 # ============================================================================
 
 # Expresiones Primarias
-@dataclass
+@dataclass(slots=True)
 class NumLiteral(ASTNode):
     """NUM"""
     value: str
@@ -250,7 +321,7 @@ class NumLiteral(ASTNode):
         return f"Num({self.value})"
 
 
-@dataclass
+@dataclass(slots=True)
 class StringLiteral(ASTNode):
     """STRING"""
     value: str
@@ -259,7 +330,7 @@ class StringLiteral(ASTNode):
         return f"String({self.value})"
 
 
-@dataclass
+@dataclass(slots=True)
 class BoolLiteral(ASTNode):
     """true | false"""
     value: bool
@@ -268,16 +339,20 @@ class BoolLiteral(ASTNode):
         return f"Bool({self.value})"
 
 
-@dataclass
+@dataclass(slots=True)
 class Identifier(ASTNode):
     """ID"""
     name: str
+    # Id en la tabla de símbolos del lexer, para comparar identificadores sin comparar cadenas
+    symbol: Optional[int] = field(default=None, compare=False)
+    # Declaración a la que se refiere, anotada por Resolver
+    binding: Optional['Binding'] = field(default=None, compare=False, kw_only=True)
     
     def __repr__(self):
         return f"Id({self.name})"
 
 
-@dataclass
+@dataclass(slots=True)
 class ParenExpr(ASTNode):
     """'(' Expr ')'"""
     expression: 'Expr'
@@ -287,7 +362,7 @@ class ParenExpr(ASTNode):
 
 
 # Expresiones Binarias
-@dataclass
+@dataclass(slots=True)
 class BinaryOp(ASTNode):
     """Operación binaria: left op right"""
     operator: str
@@ -299,7 +374,7 @@ class BinaryOp(ASTNode):
 
 
 # Expresiones Unarias
-@dataclass
+@dataclass(slots=True)
 class UnaryOp(ASTNode):
     """Operación unaria: op operand"""
     operator: str
@@ -310,11 +385,14 @@ class UnaryOp(ASTNode):
 
 
 # Llamada a función
-@dataclass
+@dataclass(slots=True)
 class FunctionCall(ASTNode):
     """ID '(' ArgListOpt ')'"""
     function_name: str
     arguments: List['Expr']
+    symbol: Optional[int] = field(default=None, compare=False)
+    # Declaración de la función llamada, anotada por Resolver
+    binding: Optional['Binding'] = field(default=None, compare=False, kw_only=True)
     
     def __repr__(self):
         args = ", ".join(str(arg) for arg in self.arguments)
@@ -322,7 +400,7 @@ class FunctionCall(ASTNode):
 
 
 # Acceso a array
-@dataclass
+@dataclass(slots=True)
 class ArrayAccess(ASTNode):
     """Expr '[' Expr ']'"""
     array: 'Expr'
@@ -333,7 +411,7 @@ class ArrayAccess(ASTNode):
 
 
 # Acceso a miembro
-@dataclass
+@dataclass(slots=True)
 class MemberAccess(ASTNode):
     """Expr '.' ID"""
     object: 'Expr'
@@ -344,7 +422,7 @@ class MemberAccess(ASTNode):
 
 
 # Asignación
-@dataclass
+@dataclass(slots=True)
 class Assignment(ASTNode):
     """Expr '=' Expr"""
     target: 'Expr'
@@ -364,4 +442,75 @@ Expr = (NumLiteral | StringLiteral | BoolLiteral | Identifier |
 # DECLARACIÓN DE TOP-LEVEL
 # ============================================================================
 
-TopDecl = TypeDecl | StructDecl | ConstDecl | FunDecl | LetDecl
\ No newline at end of file
+TopDecl = TypeDecl | StructDecl | ConstDecl | FunDecl | LetDecl
+
+
+# ============================================================================
+# NODO DE ERROR (recuperación de errores sintácticos)
+# ============================================================================
+
+@dataclass(slots=True)
+class ErrorNode(ASTNode):
+    """Construcción que no pudo analizarse; ocupa su lugar en el AST parcial"""
+    message: str
+    line: int
+    column: int
+    
+    def __repr__(self):
+        return f"Error({self.message} en {self.line}:{self.column})"
+
+
+# ============================================================================
+# FORMA DE LOS CAMPOS (para recorridos y representaciones del AST)
+# ============================================================================
+
+NODE = 0        # Un nodo hijo, o None
+NODES = 1       # Lista de nodos hijos
+VALUE = 2       # Valor que no es un nodo (nombre, operador, literal, id de símbolo), o None
+VALUES = 3      # Lista de valores
+
+# Forma de los campos de cada clase, en el orden de iter_fields()
+FIELD_SHAPES = {
+    Program: (NODE, NODES, NODES),
+    ModuleDecl: (NODE,),
+    QualID: (VALUES,),
+    ImportDecl: (NODE, VALUE),
+    TypeDecl: (VALUE, NODE),
+    StructDecl: (VALUE, NODES),
+    Field: (VALUE, NODE),
+    ConstDecl: (VALUE, NODE, NODE),
+    FunDecl: (VALUE, NODES, NODE, NODE),
+    Param: (VALUE, NODE),
+    SimpleType: (VALUE,),
+    ArrayType: (NODE,),
+    FunctionType: (NODES, NODE),
+    LetDecl: (VALUE, NODE, NODE),
+    ExprStmt: (NODE,),
+    IfStmt: (NODE, NODE, NODE),
+    WhileStmt: (NODE, NODE),
+    ReturnStmt: (NODE,),
+    Block: (NODES,),
+    NumLiteral: (VALUE,),
+    StringLiteral: (VALUE,),
+    BoolLiteral: (VALUE,),
+    Identifier: (VALUE, VALUE),
+    ParenExpr: (NODE,),
+    BinaryOp: (VALUE, NODE, NODE),
+    UnaryOp: (VALUE, NODE),
+    FunctionCall: (VALUE, NODES, VALUE),
+    ArrayAccess: (NODE, NODE),
+    MemberAccess: (NODE, VALUE),
+    Assignment: (NODE, NODE),
+    ErrorNode: (VALUE, VALUE, VALUE),
+}
+
+# (nombre, forma) de los campos de cada clase, en el orden de iter_fields(). Es la tabla de
+# campos que usan la Arena, el formato binario, los visitantes, NodeTable y la exportación
+NODE_FIELDS = {cls: tuple(zip(cls.__match_args__, shapes)) for cls, shapes in FIELD_SHAPES.items()}
+
+# Anotaciones de las pasadas semánticas de cada clase: campos kw_only fuera de FIELD_SHAPES
+# (no se serializan ni participan en la igualdad) que en un nodo nuevo valen None
+ANNOTATION_FIELDS = {
+    cls: tuple(f.name for f in fields(cls) if f.kw_only and f.name not in ('start', 'end'))
+    for cls in FIELD_SHAPES
+}
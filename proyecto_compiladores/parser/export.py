@@ -0,0 +1,125 @@
+import json
+from typing import Iterable, Iterator
+
+from .ast_nodes import ASTNode, NODE, NODES, VALUE
+from .arena import NODE_CLASSES, NODE_KINDS, KIND_FIELDS
+
+
+# ============================================================================
+# EXPORTACIÓN JERÁRQUICA DEL AST POR FRAGMENTOS
+# ============================================================================
+#
+# iter_text() e iter_json() recorren el árbol completo con una pila (sin recursión,
+# así que la profundidad no está limitada) y generan fragmentos pequeños en lugar de
+# concatenar un solo str; chunked() los agrupa en trozos de tamaño acotado para
+# escribirlos en un archivo o enviarlos en una respuesta HTTP.
+
+# Caracteres por trozo de chunked()
+CHUNK_SIZE = 1 << 16
+# Niveles de indentación de iter_text(); más adentro la línea lleva su profundidad como prefijo,
+# para que el texto crezca con la cantidad de nodos y no con el cuadrado de la profundidad
+MAX_INDENT = 32
+
+
+def chunked(pieces: Iterable[str], size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Agrupa los fragmentos en trozos de al menos 'size' caracteres (el último puede ser menor)"""
+    batch = []
+    length = 0
+    for piece in pieces:
+        batch.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(batch)
+            batch.clear()
+            length = 0
+    if batch:
+        yield ''.join(batch)
+
+
+def iter_text(node: ASTNode, indent: str = "  ") -> Iterator[str]:
+    """Genera el árbol como texto indentado, una línea por nodo (o lista vacía) en preorden.
+    
+    Cada línea es 'campo: Clase(valor=..., ...)'; los elementos de una lista
+    se rotulan 'campo[i]: ' y un hijo ausente se muestra como None. Pasados
+    MAX_INDENT niveles la indentación no crece y la línea empieza con
+    '[profundidad] '.
+    """
+    # Pendientes: (nodo, None o () si es una lista vacía; profundidad; rótulo)
+    pending = [(node, 0, '')]
+    pop, extend = pending.pop, pending.extend
+    while pending:
+        current, depth, label = pop()
+        spacing = indent * depth if depth < MAX_INDENT else f"{indent * MAX_INDENT}[{depth}] "
+        if current is None:
+            yield f"{spacing}{label}None\n"
+            continue
+        if current.__class__ is tuple:
+            yield f"{spacing}{label}[]\n"
+            continue
+        
+        kind = NODE_KINDS[current.__class__]
+        values = []
+        children = []
+        depth += 1
+        for name, shape in KIND_FIELDS[kind]:
+            value = getattr(current, name)
+            if shape == NODE:
+                children.append((value, depth, name + ': '))
+            elif shape == NODES:
+                if value:
+                    children.extend([(child, depth, f'{name}[{i}]: ') for i, child in enumerate(value)])
+                else:
+                    children.append(((), depth, name + ': '))
+            elif shape == VALUE:
+                values.append(f"{name}={value!r}")
+            else:
+                # Un nodo compartido guarda sus listas como tuplas
+                values.append(f"{name}={list(value)!r}")
+        
+        name = NODE_CLASSES[kind].__name__
+        yield f"{spacing}{label}{name}({', '.join(values)})\n" if values else f"{spacing}{label}{name}\n"
+        children.reverse()
+        extend(children)
+
+
+def iter_json(node: ASTNode) -> Iterator[str]:
+    """Genera el árbol como JSON: cada nodo es un objeto con "type", "start", "end" y sus campos"""
+    dumps = json.dumps
+    # Pendientes: un nodo por escribir, None (null) o un fragmento ya formado
+    pending = [node]
+    pop, extend = pending.pop, pending.extend
+    while pending:
+        item = pop()
+        if item.__class__ is str:
+            yield item
+            continue
+        if item is None:
+            yield 'null'
+            continue
+        
+        kind = NODE_KINDS[item.__class__]
+        head = [f'{{"type": "{NODE_CLASSES[kind].__name__}", "start": {item.start}, "end": {item.end}']
+        # Los valores van en el encabezado; los hijos se apilan entre sus fragmentos
+        children = []
+        for name, shape in KIND_FIELDS[kind]:
+            value = getattr(item, name)
+            if shape == NODE:
+                children.append(f', "{name}": ')
+                children.append(value)
+            elif shape == NODES:
+                if not value:
+                    children.append(f', "{name}": []')
+                    continue
+                children.append(f', "{name}": [')
+                for i, child in enumerate(value):
+                    if i:
+                        children.append(', ')
+                    children.append(child)
+                children.append(']')
+            else:
+                head.append(f', "{name}": {dumps(value)}')
+        children.append('}')
+        
+        yield ''.join(head)
+        children.reverse()
+        extend(children)
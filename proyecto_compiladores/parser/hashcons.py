@@ -0,0 +1,203 @@
+from dataclasses import FrozenInstanceError, fields
+from functools import partial
+from typing import Dict
+
+from .ast_nodes import ASTNode, LazyBlock, Block, FIELD_SHAPES, NODE_FIELDS, ANNOTATION_FIELDS, NODE, NODES, VALUE
+
+
+class SharedNode:
+    """Base de los nodos creados por NodeTable: inmutables y con hash estructural.
+    
+    Un nodo compartido puede aparecer en muchos lugares del árbol (o de varios
+    árboles), así que no se modifica: asignar un campo lanza
+    FrozenInstanceError y las listas de hijos son tuplas. Su tramo es -1,
+    porque no tiene una posición única. El hash se calcula una vez a partir de
+    la estructura y, dentro de una misma NodeTable, dos nodos son iguales sólo
+    si son el mismo objeto: la igualdad y el hash cuestan O(1) y los nodos
+    sirven de clave para memorizar resultados de pasadas posteriores.
+    """
+    __slots__ = ()
+    
+    # Clase de ast_nodes de la que es versión compartida (la define shared_class())
+    node_class = None
+    
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"Los nodos compartidos son inmutables: no se puede asignar '{name}'")
+    
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"Los nodos compartidos son inmutables: no se puede borrar '{name}'")
+    
+    def __hash__(self):
+        return self._hash
+    
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, SharedNode) and self._hash != other._hash:
+            return False
+        if not isinstance(other, ASTNode):
+            return NotImplemented
+        return structurally_equal(self, other)
+    
+    def __reduce__(self):
+        # Una copia serializada es un árbol normal, con listas (pickle conserva los subárboles compartidos)
+        values = [getattr(self, name) for name in self.__match_args__]
+        return self.node_class, tuple([list(v) if v.__class__ is tuple else v for v in values])
+
+
+# Campos de cada clase que participan en su igualdad
+COMPARED_FIELDS = {cls: tuple(f.name for f in fields(cls) if f.compare) for cls in FIELD_SHAPES}
+
+
+def shared_class(cls: type) -> type:
+    """Subclase compartida de la clase de nodo (con el mismo nombre, para repr() y los visitantes)"""
+    return type(cls.__name__, (SharedNode, cls), {
+        '__slots__': ('_hash',),
+        '__qualname__': cls.__qualname__,
+        '__module__': cls.__module__,
+        'node_class': cls,
+    })
+
+
+# Clase compartida de cada clase de nodo
+SHARED_CLASSES: Dict[type, type] = {cls: shared_class(cls) for cls in FIELD_SHAPES}
+# Clase de ast_nodes de cada clase de nodo: la base de un nodo compartido y Block para un LazyBlock
+BASE_CLASSES = {cls: cls for cls in FIELD_SHAPES}
+BASE_CLASSES.update({shared: cls for cls, shared in SHARED_CLASSES.items()})
+BASE_CLASSES[LazyBlock] = Block
+
+
+def node_class(node: ASTNode) -> type:
+    """Clase de ast_nodes del nodo (la base de un nodo compartido, Block para un LazyBlock)"""
+    cls = node.__class__
+    return BASE_CLASSES.get(cls) or next(base for base in cls.__mro__ if base in FIELD_SHAPES)
+
+
+def structurally_equal(a: ASTNode, b: ASTNode) -> bool:
+    """Igualdad de dataclass entre nodos normales y compartidos (las listas se comparan con las tuplas)"""
+    cls = node_class(a)
+    if node_class(b) is not cls:
+        return False
+    for name in COMPARED_FIELDS[cls]:
+        x, y = getattr(a, name), getattr(b, name)
+        if isinstance(x, (list, tuple)):
+            if not isinstance(y, (list, tuple)) or len(x) != len(y) or any(u != v for u, v in zip(x, y)):
+                return False
+        elif x != y:
+            return False
+    return True
+
+
+class NodeTable:
+    """Tabla de nodos compartidos (hash-consing) de una compilación, como SymbolTable para los identificadores.
+    
+    Cada estructura distinta existe una sola vez. La clave de un nodo es su
+    clase, sus valores y la identidad de sus hijos (que ya son compartidos),
+    de modo que buscarlo cuesta O(campos) y no O(tamaño del subárbol).
+    
+    Un Parser con una NodeTable construye cada nodo con new() (a través de
+    constructors()): la tabla se consulta antes de crear el nodo, así que un
+    subárbol repetido nunca se construye dos veces. intern() convierte un
+    árbol ya construido, por ejemplo el que llega de otro proceso.
+    """
+    
+    def __init__(self):
+        self.nodes = {}
+        # Nodos entregados por new() o intern() que ya estaban en la tabla
+        self.reused = 0
+    
+    def __len__(self):
+        return len(self.nodes)
+    
+    def __contains__(self, node):
+        if not isinstance(node, SharedNode):
+            return False
+        cls = node.node_class
+        key, _ = self.key(cls, [getattr(node, name) for name, _ in NODE_FIELDS[cls]])
+        return self.nodes.get(key) is node
+    
+    @staticmethod
+    def key(cls: type, values) -> tuple:
+        """Clave de búsqueda de un nodo de la clase con esos valores (sus hijos ya compartidos) y los
+        valores con las listas como tuplas. La clave es la clase, los valores (con su tipo fuera de
+        los str) y la identidad de los hijos."""
+        key = [cls]
+        stored = []
+        for (_, shape), value in zip(NODE_FIELDS[cls], values):
+            if shape == NODE:
+                key.append(id(value))
+            elif shape == NODES:
+                value = tuple(value)
+                key.append(tuple(map(id, value)))
+            elif shape == VALUE:
+                # True == 1 pero son valores distintos
+                key.append(value if value.__class__ is str else (value.__class__, value))
+            else:
+                value = tuple(value)
+                key.append(value)
+            stored.append(value)
+        return tuple(key), stored
+    
+    def constructors(self) -> dict:
+        """Constructor de cada clase de nodo, con la firma de la clase, para Parser.new.
+        Lo guarda el parser y no la tabla, para no formar un ciclo que la retenga tras el análisis."""
+        return {cls: partial(self.new, cls) for cls in FIELD_SHAPES}
+    
+    def new(self, cls: type, *values, start: int = -1, end: int = -1) -> SharedNode:
+        """Nodo compartido de la clase con esos valores, cuyos hijos ya son de la tabla: el que ya
+        estaba o uno nuevo. El tramo se ignora: un nodo compartido no tiene una posición única."""
+        key, stored = self.key(cls, values)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = self.create(cls, stored)
+        else:
+            self.reused += 1
+        return node
+    
+    def intern(self, node: ASTNode) -> ASTNode:
+        """Versión compartida de un árbol ya construido (los subárboles repetidos quedan como un solo objeto)"""
+        # Nodos por compartir en preorden, sin entrar en los que ya son de la tabla
+        order = []
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            if current is None or current in self:
+                continue
+            order.append(current)
+            for name, shape in NODE_FIELDS[node_class(current)]:
+                if shape == NODE:
+                    pending.append(getattr(current, name))
+                elif shape == NODES:
+                    pending.extend(getattr(current, name))
+        
+        # Del último al primero, cada nodo se procesa después de todos sus descendientes
+        # (id del nodo original → nodo compartido; los originales siguen vivos mientras tanto)
+        shared_nodes = {}
+        get = shared_nodes.get
+        for current in reversed(order):
+            cls = node_class(current)
+            values = []
+            for name, shape in NODE_FIELDS[cls]:
+                value = getattr(current, name)
+                if shape == NODE:
+                    value = get(id(value), value)
+                elif shape == NODES:
+                    value = [get(id(child), child) for child in value]
+                values.append(value)
+            shared_nodes[id(current)] = self.new(cls, *values)
+        return get(id(node), node)
+    
+    @staticmethod
+    def create(cls: type, values: list) -> SharedNode:
+        """Nodo compartido de la clase con los valores de sus campos (los hijos ya compartidos)"""
+        node = object.__new__(SHARED_CLASSES[cls])
+        set_field = object.__setattr__
+        for (name, _), value in zip(NODE_FIELDS[cls], values):
+            set_field(node, name, value)
+        set_field(node, 'start', -1)
+        set_field(node, 'end', -1)
+        for name in ANNOTATION_FIELDS[cls]:
+            set_field(node, name, None)
+        # Los hijos aportan su hash ya calculado, así que cuesta O(campos)
+        set_field(node, '_hash', hash((cls.__name__, *[getattr(node, name) for name in COMPARED_FIELDS[cls]])))
+        return node
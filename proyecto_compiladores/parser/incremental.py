@@ -0,0 +1,166 @@
+from array import array
+from bisect import bisect_left
+from itertools import compress
+from typing import List
+
+from lexer import TokenBuffer, TokenType, relex
+from .ast_nodes import ASTNode, Program, TopDecl
+from .parser import Parser, ParserError, IMPORT_SYNC, TOP_LEVEL_SYNC
+from .visitor import walk
+
+
+def shift_spans(node: ASTNode, delta: int):
+    """Desplaza 'delta' tokens el tramo del nodo y los de todos sus descendientes"""
+    for descendant in walk(node):
+        descendant.start += delta
+        descendant.end += delta
+
+
+class IncrementalParse:
+    """Program de un TokenBuffer que tras cada edición sólo re-analiza las declaraciones afectadas.
+    
+    Para cada declaración de nivel superior se guarda su tramo (inicio de su
+    primer token y fin del último, en las columnas span_starts y span_ends) y
+    los errores que produjo. Una edición re-tokeniza con relex() en modo
+    recuperación (un string a medio escribir es un token ERROR, no un
+    LexerError) y vuelve a analizar desde la primera declaración que toca
+    la edición hasta que el parser llega, ya pasada la edición, al
+    inicio desplazado de una declaración antigua: desde ahí los tokens son
+    idénticos, así que los objetos FunDecl, StructDecl, etc. de la cola se
+    reutilizan. El análisis siempre se recupera de los errores, como
+    parse_with_recovery(); el resultado es igual al de analizar todo de nuevo.
+    
+    Los tramos de tokens (start, end) de los nodos reutilizados no se
+    corrigen en cada edición, porque recorrer la cola costaría más que la
+    edición: token_shifts guarda el desplazamiento pendiente de cada
+    declaración. Por eso edit() no retorna el Program: declaration() aplica
+    el desplazamiento de una declaración y program los de todas antes de
+    entregarlo, así que ningún nodo se ve con un tramo desactualizado.
+    """
+    
+    def __init__(self, buffer: TokenBuffer, parser_class=Parser):
+        self.parser_class = parser_class
+        self.parse_all(buffer)
+    
+    @property
+    def errors(self) -> List[ParserError]:
+        """Errores sintácticos en orden, como los de parse_with_recovery()"""
+        return self.header_errors + [error for errors in self.decl_errors for error in errors]
+    
+    def declaration(self, index: int) -> TopDecl:
+        """Declaración 'index' con los tramos de sus nodos al día"""
+        shift = self.token_shifts[index]
+        if shift:
+            shift_spans(self.declarations[index], shift)
+            self.token_shifts[index] = 0
+        return self.declarations[index]
+    
+    @property
+    def program(self) -> Program:
+        """Program actual, con los tramos de todos sus nodos al día"""
+        return self.update_spans()
+    
+    def update_spans(self) -> Program:
+        """Aplica los desplazamientos pendientes a todas las declaraciones y retorna el Program"""
+        for index in compress(range(len(self.declarations)), self.token_shifts):
+            self.declaration(index)
+        return self._program
+    
+    def new_parser(self, pos: int = 0) -> Parser:
+        """Parser en modo recuperación, con tramos, posicionado en el token 'pos' del buffer actual"""
+        parser = self.parser_class(self.buffer, spans=True)
+        parser.errors = []
+        parser.seek(pos)
+        return parser
+    
+    def parse_all(self, buffer: TokenBuffer):
+        """Analiza el buffer completo"""
+        self.buffer = buffer
+        parser = self.new_parser()
+        self.module_decl = parser.parse_recovering(parser.parse_module_decl, IMPORT_SYNC)
+        self.imports = parser.parse_import_list()
+        self.header_errors = parser.errors
+        
+        self.declarations, self.decl_errors = [], []
+        self.span_starts, self.span_ends = array('q'), array('q')
+        self.token_shifts = array('q')
+        for decl, (decl_start, decl_end), errors, _ in self.parse_decls(parser.pos):
+            self.declarations.append(decl)
+            self.span_starts.append(decl_start)
+            self.span_ends.append(decl_end)
+            self.decl_errors.append(errors)
+            self.token_shifts.append(0)
+        self._program = Program(self.module_decl, self.imports, self.declarations, start=0, end=len(buffer) - 1)
+    
+    def parse_decls(self, pos: int):
+        """Genera (declaración, tramo, errores, índice del siguiente token) desde el token 'pos' hasta EOF"""
+        parser = self.new_parser(pos)
+        starts, lengths = self.buffer.starts, self.buffer.lengths
+        while parser.current_token is not None and not parser.check(TokenType.EOF):
+            first = parser.pos
+            decl = parser.parse_recovering(parser.parse_top_decl, TOP_LEVEL_SYNC, False)
+            last = parser.pos - 1
+            yield decl, (starts[first], starts[last] + lengths[last]), parser.errors, parser.pos
+            parser.errors = []
+    
+    def edit(self, start: int, deleted: int, inserted: str):
+        """Aplica una edición (desplazamiento, longitud borrada, texto insertado); el resultado queda en program"""
+        buffer = relex(self.buffer, start, deleted, inserted, recover=True)
+        span_starts, span_ends = self.span_starts, self.span_ends
+        # Una edición en el encabezado (module e imports) o un encabezado con errores se analiza completo
+        if self.header_errors or not span_starts or start <= span_starts[0]:
+            self.parse_all(buffer)
+            return
+        
+        # Primera declaración que no termina antes de la edición. Una declaración con
+        # errores pudo mirar el token siguiente a su tramo, así que también se repite
+        lo = bisect_left(span_ends, start)
+        while lo and self.decl_errors[lo - 1]:
+            lo -= 1
+        boundary = span_ends[lo - 1] if lo else span_starts[0]
+        
+        token_delta = len(buffer) - len(self.buffer)
+        self.buffer = buffer
+        starts = buffer.starts
+        delta = len(inserted) - deleted
+        declarations = self.declarations[:lo]
+        decl_errors = self.decl_errors[:lo]
+        new_starts = span_starts[:lo]
+        new_ends = span_ends[:lo]
+        token_shifts = self.token_shifts[:lo]
+        
+        # Declaraciones antiguas que empiezan después de la edición y pueden reutilizarse
+        count = len(span_starts)
+        reuse = bisect_left(span_starts, start + deleted)
+        for decl, (decl_start, decl_end), errors, next_pos in self.parse_decls(bisect_left(starts, boundary)):
+            declarations.append(decl)
+            decl_errors.append(errors)
+            new_starts.append(decl_start)
+            new_ends.append(decl_end)
+            token_shifts.append(0)
+            offset = starts[next_pos] - delta
+            while reuse < count and span_starts[reuse] < offset:
+                reuse += 1
+            if reuse < count and span_starts[reuse] == offset:
+                break
+        else:
+            reuse = count
+        
+        # Cola intacta: se reutilizan sus declaraciones y se desplazan sus tramos
+        base = len(declarations)
+        declarations.extend(self.declarations[reuse:])
+        decl_errors.extend(self.decl_errors[reuse:])
+        new_starts.extend(array('q', [offset + delta for offset in span_starts[reuse:]]))
+        new_ends.extend(array('q', [offset + delta for offset in span_ends[reuse:]]))
+        token_shifts.extend(array('q', [shift + token_delta for shift in self.token_shifts[reuse:]]))
+        # Las que tienen errores se re-analizan para que las posiciones de sus errores
+        # y ErrorNode correspondan al código nuevo
+        for index in compress(range(base, len(declarations)), self.decl_errors[reuse:]):
+            declarations[index], (new_starts[index], new_ends[index]), decl_errors[index], _ = next(
+                self.parse_decls(bisect_left(starts, new_starts[index])))
+            token_shifts[index] = 0
+        
+        self.declarations, self.decl_errors = declarations, decl_errors
+        self.span_starts, self.span_ends = new_starts, new_ends
+        self.token_shifts = token_shifts
+        self._program = Program(self.module_decl, self.imports, declarations, start=0, end=len(buffer) - 1)
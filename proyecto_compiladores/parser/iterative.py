@@ -0,0 +1,224 @@
+from lexer import TokenType
+from .ast_nodes import *
+from .parser import Parser, ParserError, BINARY_PRECEDENCE, UNARY_OPERATORS, STMT_LIST_END, STMT_SYNC, DECL_ONLY
+
+
+# Contextos que abre una expresión: '(' agrupador, argumentos de una llamada e índice '[ ]'
+GROUP, CALL, INDEX = range(3)
+
+# Sentencias pendientes de su cuerpo: bloque abierto, 'if' sin su Stmt, 'else' sin su Stmt y 'while'
+BLOCK, THEN, ELSE, WHILE = range(4)
+
+
+class IterativeParser(Parser):
+    """Parser que reemplaza la recursión de expresiones, sentencias y tipos por pilas explícitas.
+    
+    Construye los mismos árboles y reporta los mismos errores que Parser, pero
+    la profundidad de anidamiento ('(', '!', '=', bloques, cadenas de
+    'else if') sólo está limitada por la memoria y no por el límite de
+    recursión de Python.
+    """
+    
+    # ========================================================================
+    # EXPRESIONES
+    # ========================================================================
+    
+    def parse_expr(self, min_precedence: int = 1) -> Expr:
+        """Expr por precedencia de operadores con pilas de operandos y operadores.
+        
+        Cada '(' agrupador, llamada o índice abierto guarda las pilas del
+        contexto exterior y empieza unas nuevas; al cerrarse, la expresión
+        reducida pasa a ser el operando del contexto exterior.
+        """
+        precedence_of = BINARY_PRECEDENCE.get
+        primary_dispatch = self.primary_dispatch
+        contexts = []       # (tipo, dato, operandos, operadores, precedencia mínima) de cada contexto exterior
+        operands = []       # Operandos izquierdos pendientes del contexto actual
+        operators = []      # (precedencia, token) pendientes; (None, token, inicio) para prefijos
+        floor = min_precedence
+        expr = None         # Operando en curso; None mientras falte leerlo
+        
+        while True:
+            if expr is None:
+                # Operadores prefijos y '(' agrupadores antes del operando
+                token = self.current_token
+                while token is not None and (token.type in UNARY_OPERATORS or token.type is TokenType.LPAREN):
+                    start = self.pos
+                    self.advance()
+                    if token.type is TokenType.LPAREN:
+                        contexts.append((GROUP, start, operands, operators, floor))
+                        operands, operators, floor = [], [], 1
+                    else:
+                        operators.append((None, token, start))
+                    token = self.current_token
+                
+                parse = primary_dispatch.get(token.type) if token is not None else None
+                if parse is None:
+                    raise ParserError("Se esperaba una expresión primaria (ID, número, string, true, false, o '(')", token)
+                expr = parse(self)
+                continue
+            
+            token = self.current_token
+            token_type = token.type if token is not None else None
+            
+            # Sufijos: llamada, índice y acceso a miembro
+            if token_type is TokenType.LPAREN:
+                self.advance()
+                if self.check(TokenType.RPAREN):
+                    self.advance()
+                    expr = self.make_call(expr, [])
+                else:
+                    contexts.append((CALL, (expr, []), operands, operators, floor))
+                    operands, operators, floor, expr = [], [], 1, None
+                continue
+            if token_type is TokenType.LBRACKET:
+                self.advance()
+                contexts.append((INDEX, expr, operands, operators, floor))
+                operands, operators, floor, expr = [], [], 1, None
+                continue
+            if token_type is TokenType.DOT:
+                self.advance()
+                expr = self.new[MemberAccess](expr, self.expect(TokenType.ID).value, start=expr.start, end=self.pos)
+                continue
+            
+            # Operando completo: los prefijos pendientes enlazan más fuerte que cualquier binario
+            while operators and operators[-1][0] is None:
+                _, operator, start = operators.pop()
+                expr = self.new[UnaryOp](operator.value, expr, start=start, end=expr.end)
+            
+            precedence = precedence_of(token_type)
+            if precedence is not None and precedence >= floor:
+                # '=' asocia a la derecha: sólo se reducen operadores de precedencia estrictamente mayor
+                right_assoc = token_type is TokenType.ASSIGN
+                while operators and (operators[-1][0] > precedence
+                                     or (operators[-1][0] == precedence and not right_assoc)):
+                    expr = self.reduce(operands.pop(), operators.pop()[1], expr)
+                operands.append(expr)
+                operators.append((precedence, token))
+                self.advance()
+                expr = None
+                continue
+            
+            # Fin de la expresión del contexto actual
+            while operators:
+                expr = self.reduce(operands.pop(), operators.pop()[1], expr)
+            if not contexts:
+                return expr
+            
+            kind, data, operands, operators, floor = contexts.pop()
+            if kind == GROUP:
+                self.expect(TokenType.RPAREN)
+                expr = self.new[ParenExpr](expr, start=data, end=self.pos)
+            elif kind == INDEX:
+                self.expect(TokenType.RBRACKET)
+                expr = self.new[ArrayAccess](data, expr, start=data.start, end=self.pos)
+            else:
+                callee, args = data
+                args.append(expr)
+                if self.check(TokenType.COMMA):
+                    # Siguiente argumento en un contexto nuevo de la misma llamada
+                    self.advance()
+                    contexts.append((CALL, data, operands, operators, floor))
+                    operands, operators, floor, expr = [], [], 1, None
+                    continue
+                self.expect(TokenType.RPAREN)
+                expr = self.make_call(callee, args)
+    
+    def reduce(self, left: Expr, operator, right: Expr) -> Expr:
+        """Aplica un operador binario pendiente"""
+        if operator.type is TokenType.ASSIGN:
+            return self.new[Assignment](left, right, start=left.start, end=right.end)
+        return self.new[BinaryOp](operator.value, left, right, start=left.start, end=right.end)
+    
+    # ========================================================================
+    # TIPOS
+    # ========================================================================
+    
+    def parse_type(self) -> Type:
+        """Type con los '(' Type ')' anidados contados en lugar de recursivos"""
+        depth = 0
+        while self.check(TokenType.LPAREN):
+            self.advance()
+            depth += 1
+        
+        type_expr = self.parse_simple_type()
+        type_expr = self.parse_arr_or_fun_type(type_expr)
+        for _ in range(depth):
+            self.expect(TokenType.RPAREN)
+            type_expr = self.parse_arr_or_fun_type(type_expr)
+        return type_expr
+    
+    # ========================================================================
+    # STATEMENTS
+    # ========================================================================
+    
+    def parse_block(self) -> Block:
+        """Block → '{' StmtList '}'"""
+        if not self.check(TokenType.LBRACE):
+            self.expect(TokenType.LBRACE)
+        return self.parse_stmt()
+    
+    def parse_stmt(self) -> Stmt:
+        """Stmt con los bloques, 'if' y 'while' abiertos en una pila en lugar de recursivos"""
+        stack = []          # [tipo, dato, inicio] de cada sentencia que espera su contenido
+        stmt_dispatch = self.stmt_dispatch
+        recovering = self.errors is not None
+        
+        while True:
+            token = self.current_token
+            token_type = token.type if token is not None else None
+            start = self.pos
+            
+            try:
+                # Un bloque abierto que no recibe más sentencias se cierra; al recuperar,
+                # una declaración de nivel superior (salvo let) también lo cierra como en parse_stmt_list
+                if stack and stack[-1][0] == BLOCK and (token is None or token_type in STMT_LIST_END
+                                                        or (recovering and token_type in DECL_ONLY)):
+                    _, statements, start = stack.pop()
+                    self.expect(TokenType.RBRACE)
+                    stmt = self.new[Block](statements, start=start, end=self.pos)
+                elif token_type is TokenType.LBRACE:
+                    self.advance()
+                    stack.append([BLOCK, [], start])
+                    continue
+                elif token_type is TokenType.IF or token_type is TokenType.WHILE:
+                    self.advance()
+                    self.expect(TokenType.LPAREN)
+                    condition = self.parse_expr()
+                    self.expect(TokenType.RPAREN)
+                    stack.append([THEN if token_type is TokenType.IF else WHILE, condition, start])
+                    continue
+                else:
+                    parse = stmt_dispatch.get(token_type)
+                    stmt = parse(self) if parse is not None else self.parse_expr_stmt()
+            except ParserError as e:
+                # La sentencia fallida completa (con sus 'if' y 'while' abiertos) se reemplaza
+                # por un ErrorNode en el bloque que la contiene, igual que parse_recovering
+                while stack and stack[-1][0] != BLOCK:
+                    start = stack.pop()[2]
+                if not recovering or not stack:
+                    raise
+                self.record_error(e)
+                self.synchronize(STMT_SYNC)
+                stmt = self.error_node(e, start)
+            
+            # La sentencia completa se entrega a las que la contienen mientras éstas se completen
+            while stack:
+                frame = stack[-1]
+                if frame[0] == BLOCK:
+                    frame[1].append(stmt)
+                    break
+                if frame[0] == THEN and self.check(TokenType.ELSE):
+                    self.advance()
+                    frame[0], frame[1] = ELSE, (frame[1], stmt)
+                    break
+                stack.pop()
+                kind, data, start = frame
+                if kind == THEN:
+                    stmt = self.new[IfStmt](data, stmt, None, start=start, end=self.pos)
+                elif kind == ELSE:
+                    stmt = self.new[IfStmt](*data, stmt, start=start, end=self.pos)
+                else:
+                    stmt = self.new[WhileStmt](data, stmt, start=start, end=self.pos)
+            else:
+                return stmt
@@ -0,0 +1,168 @@
+import gc
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterator, List, Optional, Tuple
+
+from lexer import TokenBuffer, TokenType
+from .ast_nodes import TopDecl
+from .hashcons import NodeTable
+from .parser import Parser, ParserError, TOP_LEVEL_SYNC
+
+
+# Tokens que pueden abrir una declaración de nivel superior o cambiar la profundidad de llaves
+BOUNDARY_KINDS = re.compile(b'[' + re.escape(bytes(sorted(
+    t.value for t in TOP_LEVEL_SYNC | {TokenType.LBRACE, TokenType.RBRACE}
+))) + b']')
+LBRACE, RBRACE = TokenType.LBRACE.value, TokenType.RBRACE.value
+
+# Buffer completo de cada proceso trabajador; se reconstruye una sola vez al iniciarlo
+_worker_buffer = None
+
+
+def worker_state(buffer: TokenBuffer) -> tuple:
+    """Partes del buffer que recibe cada trabajador: el código fuente, las columnas y los identificadores.
+    Un mmap no se puede serializar, así que de un archivo mapeado se envía una copia de sus bytes
+    (los desplazamientos de los tokens son en bytes y siguen siendo válidos)."""
+    source = buffer.source[:] if buffer.binary else buffer.source
+    return source, buffer.kinds, buffer.starts, buffer.lengths, buffer.symbols.names
+
+
+def _init_worker(source, kinds, starts, lengths, names):
+    global _worker_buffer
+    _worker_buffer = TokenBuffer(source)
+    _worker_buffer.kinds, _worker_buffer.starts, _worker_buffer.lengths = kinds, starts, lengths
+    # Los ids de los identificadores son los del proceso principal
+    for name in names:
+        _worker_buffer.symbols.intern(name)
+
+
+def _parse_chunk(bounds: Tuple[int, int], spans: bool = False) -> Optional[List[TopDecl]]:
+    """Analiza en un trabajador las declaraciones de los tokens [inicio, fin); None si hay algún error.
+    El parser recorre el buffer completo, así que los tramos de los nodos son índices globales."""
+    first, last = bounds
+    parser = Parser(_worker_buffer, spans=spans)
+    parser.seek(first)
+    declarations = []
+    try:
+        while parser.pos < last:
+            declarations.append(parser.parse_top_decl())
+    except ParserError:
+        return None
+    # Una declaración que no termina en el límite del bloque se deja al análisis en secuencia
+    return declarations if parser.pos == last else None
+
+
+class ParallelParser(Parser):
+    """Parser que analiza las declaraciones de nivel superior en varios procesos.
+    
+    El módulo y los imports se analizan en el proceso principal; el resto del
+    TokenBuffer se corta en las palabras de nivel superior (fn, struct, const,
+    let, type) que aparecen fuera de toda llave, los tramos se agrupan en
+    bloques de tamaño similar y cada bloque se analiza en un
+    ProcessPoolExecutor. Si un bloque tiene errores, el análisis continúa en
+    secuencia desde ese bloque, así que el Program y los errores (con sus
+    posiciones) son exactamente los de Parser, también en parse_with_recovery().
+    
+    Los trabajadores reciben el código fuente y las columnas del buffer, no
+    el TokenBuffer, así que funciona con cualquier método de inicio de
+    procesos (mp_context), también sobre un archivo mapeado en memoria. Cortar,
+    registrar los identificadores y deserializar los resultados queda en el
+    proceso principal: es cerca de un 20% de un análisis en secuencia, así
+    que la aceleración no supera unas 5x aunque haya más núcleos.
+    """
+    
+    def __init__(self, tokens: TokenBuffer, workers: Optional[int] = None, chunks_per_worker: int = 4,
+                 nodes: Optional[NodeTable] = None, mp_context=None, spans: bool = False):
+        if not isinstance(tokens, TokenBuffer):
+            raise ValueError("ParallelParser sólo acepta un TokenBuffer")
+        super().__init__(tokens, nodes=nodes, spans=spans)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self.mp_context = mp_context
+    
+    def split_top_decls(self, first: int) -> List[Tuple[int, int]]:
+        """Bloques [inicio, fin) de declaraciones completas con cantidades de tokens similares"""
+        kinds = self.tokens.kinds
+        eof = len(kinds) - 1
+        starts = [first]
+        depth = 0
+        for m in BOUNDARY_KINDS.finditer(kinds.tobytes(), first + 1, eof):
+            kind = kinds[m.start()]
+            if kind == LBRACE:
+                depth += 1
+            elif kind == RBRACE:
+                depth -= 1
+            elif depth == 0:
+                starts.append(m.start())
+        
+        # Se cierra un bloque cada vez que se supera su parte proporcional de los tokens
+        count = min(len(starts), self.workers * self.chunks_per_worker)
+        size = (eof - first) / count
+        bounds = []
+        chunk_start = first
+        for start in starts[1:]:
+            if start - first >= size * (len(bounds) + 1):
+                bounds.append((chunk_start, start))
+                chunk_start = start
+        bounds.append((chunk_start, eof))
+        return bounds
+    
+    def intern_identifiers(self, first: int):
+        """Registra los identificadores en orden de aparición, de modo que los ids coinciden con los del análisis en secuencia"""
+        buffer = self.tokens
+        source, starts, lengths = buffer.source, buffer.starts, buffer.lengths
+        intern = buffer.symbols.intern
+        identifier = bytes([TokenType.ID.value])
+        for m in re.finditer(re.escape(identifier), buffer.kinds.tobytes()[first:]):
+            index = first + m.start()
+            start = starts[index]
+            value = source[start:start + lengths[index]]
+            intern(value.decode('utf-8') if buffer.binary else value)
+    
+    def iter_top_list(self) -> Iterator[TopDecl]:
+        """Genera cada TopDecl de TopList, analizadas en paralelo por bloques"""
+        first = self.pos
+        if self.current_token is None or self.check(TokenType.EOF):
+            return
+        bounds = self.split_top_decls(first)
+        if self.workers < 2 or len(bounds) < 2:
+            yield from super().iter_top_list()
+            return
+        
+        self.intern_identifiers(first)
+        pool = ProcessPoolExecutor(self.workers, mp_context=self.mp_context, initializer=_init_worker,
+                                   initargs=worker_state(self.tokens))
+        try:
+            results = pool.map(partial(_parse_chunk, spans=self.spans), bounds)
+            for chunk_start, chunk_end in bounds:
+                declarations = self.receive(results)
+                if declarations is None:
+                    # Desde el primer bloque con errores se continúa en secuencia: los
+                    # anteriores terminaron limpios, así que el estado es el mismo
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.seek(chunk_start)
+                    yield from super().iter_top_list()
+                    return
+                yield from declarations
+            self.seek(chunk_end)
+        finally:
+            pool.shutdown(cancel_futures=True)
+    
+    def receive(self, results: Iterator[Optional[List[TopDecl]]]) -> Optional[List[TopDecl]]:
+        """Siguiente resultado de los trabajadores, con sus nodos compartidos en la tabla del parser.
+        Los resultados se deserializan aquí; con el recolector de ciclos activo, crear millones de
+        nodos dispara colecciones que cuestan varias veces la deserialización. El recolector se
+        detiene sólo mientras tanto, no mientras el llamador consume las declaraciones."""
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            declarations = next(results)
+            # Los trabajadores construyen nodos normales; se comparten aquí, con la tabla del parser
+            if declarations is None or self.nodes is None:
+                return declarations
+            return [self.nodes.intern(d) for d in declarations]
+        finally:
+            if gc_enabled:
+                gc.enable()
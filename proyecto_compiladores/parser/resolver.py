@@ -0,0 +1,266 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .ast_nodes import (ASTNode, Program, ImportDecl, TypeDecl, StructDecl, ConstDecl, FunDecl, LetDecl, Block,
+                        LazyBlock, SimpleType, Identifier, FunctionCall)
+from .hashcons import SharedNode
+from .visitor import reversed_children
+
+
+class ResolutionError(Exception):
+    """Excepción para errores de nombres: no declarados, duplicados o usados como lo que no son"""
+    def __init__(self, message, node, line=None, column=None):
+        self.message = message
+        self.node = node
+        self.line = line
+        self.column = column
+        if line is None:
+            super().__init__(f"Error semántico: {message}")
+        else:
+            super().__init__(f"Error semántico en línea {line}, columna {column}: {message}")
+
+
+# Tipos predefinidos: no tienen declaración
+BUILTIN_TYPES = frozenset({'int', 'bool', 'string'})
+
+# Declaraciones globales; todas son visibles en todo el módulo, sin importar su orden
+GLOBAL_DECLARATIONS = (TypeDecl, StructDecl, ConstDecl, FunDecl, LetDecl)
+
+# Declaraciones que introducen un tipo; las demás introducen un valor (o un módulo, ImportDecl)
+TYPE_DECLARATIONS = (TypeDecl, StructDecl)
+
+# Método de Resolver de cada clase de nodo; las demás clases sólo se recorren.
+# Resolver.build_dispatch_tables() las resuelve una vez por clase.
+NODE_RESOLVERS = {
+    Program: 'resolve_program',
+    StructDecl: 'resolve_struct_decl',
+    FunDecl: 'resolve_fun_decl',
+    LetDecl: 'resolve_let_decl',
+    Block: 'resolve_block',
+    LazyBlock: 'resolve_block',
+    SimpleType: 'resolve_simple_type',
+    Identifier: 'resolve_identifier',
+    FunctionCall: 'resolve_function_call',
+}
+
+
+@dataclass(slots=True, eq=False)
+class Binding:
+    """Declaración de un nombre en un ámbito; los usos la reciben en su campo binding"""
+    name: str
+    # ImportDecl, TypeDecl, StructDecl, ConstDecl, FunDecl, LetDecl o Param
+    node: ASTNode
+    # 0 en el ámbito global, 1 en los parámetros de una función, y uno más por cada Block anidado
+    depth: int
+    # Declaración del mismo nombre en un ámbito exterior que ésta oculta
+    shadowed: Optional['Binding'] = None
+    
+    @property
+    def is_type(self) -> bool:
+        """Indica si el nombre es un tipo (type o struct)"""
+        return isinstance(self.node, TYPE_DECLARATIONS)
+    
+    def __repr__(self):
+        return f"Binding({self.name}: {self.node.__class__.__name__}, depth={self.depth})"
+
+
+class Resolver:
+    """Resolución de nombres: enlaza cada Identifier, FunctionCall y SimpleType con su declaración.
+    
+    Los ámbitos son el global (imports y declaraciones del Program), el de
+    cada función (sus parámetros y las sentencias de su cuerpo) y el de cada
+    Block anidado, donde un let es visible desde la sentencia siguiente. Cada
+    ámbito es un dict con sus propios nombres, y 'visible' guarda la
+    declaración vigente de cada nombre: buscar un uso es una sola consulta a
+    un dict, sin recorrer la cadena de ámbitos. Al cerrar un ámbito, sus
+    nombres vuelven a la declaración que ocultaban.
+    
+    El árbol se recorre con una pila explícita, como IterativeParser, así que
+    la profundidad no está limitada por la recursión y el costo es lineal en
+    la cantidad de nodos. Los errores se acumulan en lugar de lanzarse.
+    """
+    
+    def __init__(self, tokens=None):
+        # Lista de tokens o TokenBuffer del programa, para la línea y columna de los errores
+        # (a partir del tramo de cada nodo: el Program debe venir de un Parser con spans=True)
+        self.tokens = tokens
+        self.errors: List[ResolutionError] = []
+        self.scopes: List[Dict[str, Binding]] = []
+        self.visible: Dict[str, Binding] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.build_dispatch_tables()
+    
+    @classmethod
+    def build_dispatch_tables(cls):
+        """Resuelve el método de cada clase de nodo para esta clase (respetando los redefinidos en subclases)"""
+        cls.node_dispatch = {node_class: getattr(cls, name) for node_class, name in NODE_RESOLVERS.items()}
+    
+    def resolve(self, program: Program) -> List[ResolutionError]:
+        """Anota los usos de nombres del programa y retorna todos los errores, en orden de aparición"""
+        if isinstance(program, SharedNode):
+            raise ValueError("Un árbol compartido (NodeTable) no se puede anotar: sus nodos aparecen en varios ámbitos")
+        dispatch = self.node_dispatch
+        # Pendientes: nodos por resolver y acciones (método, argumento) en el orden inverso de ejecución
+        pending = [program]
+        pop, extend = pending.pop, pending.extend
+        while pending:
+            item = pop()
+            if item is None:
+                continue
+            if item.__class__ is tuple:
+                method, argument = item
+                method(self, argument)
+                continue
+            method = dispatch.get(item.__class__)
+            if method is None:
+                extend(reversed_children(item))
+                continue
+            # Cada método retorna lo que queda por hacer, en orden
+            work = method(self, item)
+            if work:
+                work.reverse()
+                extend(work)
+        self.errors.sort(key=lambda error: error.node.start)
+        return self.errors
+    
+    # ========================================================================
+    # ÁMBITOS
+    # ========================================================================
+    
+    def enter_scope(self, _=None):
+        """Abre un ámbito vacío"""
+        self.scopes.append({})
+    
+    def exit_scope(self, _=None):
+        """Cierra el ámbito actual: sus nombres vuelven a la declaración que ocultaban"""
+        visible = self.visible
+        for name, binding in self.scopes.pop().items():
+            if binding.shadowed is None:
+                del visible[name]
+            else:
+                visible[name] = binding.shadowed
+    
+    def declare(self, name: str, node: ASTNode):
+        """Declara el nombre en el ámbito actual, o reporta que ya estaba declarado en él"""
+        scope = self.scopes[-1]
+        if name in scope:
+            self.error(f"'{name}' ya está declarado en este ámbito", node)
+            return
+        binding = scope[name] = Binding(name, node, len(self.scopes) - 1, self.visible.get(name))
+        self.visible[name] = binding
+    
+    def declare_node(self, node: ASTNode):
+        """Declara el nombre de una declaración (let o parámetro)"""
+        self.declare(node.name, node)
+    
+    def declare_import(self, node: ImportDecl):
+        """Declara el alias del import, o el primer identificador de su QualID"""
+        name = node.alias or node.qualified_id.identifiers[0]
+        previous = self.scopes[-1].get(name)
+        # 'import A.B;' e 'import A.C;' introducen el mismo nombre A
+        if (previous is not None and node.alias is None and isinstance(previous.node, ImportDecl)
+                and previous.node.alias is None):
+            return
+        self.declare(name, node)
+    
+    def error(self, message: str, node: ASTNode):
+        """Registra un error en la posición del primer token del nodo (si se conocen los tokens)"""
+        line = column = None
+        if self.tokens is not None and 0 <= node.start < len(self.tokens):
+            token = self.tokens[node.start]
+            line, column = token.line, token.column
+        self.errors.append(ResolutionError(message, node, line, column))
+    
+    # ========================================================================
+    # DECLARACIONES
+    # ========================================================================
+    
+    def resolve_program(self, node: Program) -> list:
+        """Declara los imports y las declaraciones globales antes de resolver sus cuerpos"""
+        self.enter_scope()
+        # Con recuperación de errores, un import o declaración inválido es un ErrorNode
+        for declaration in node.imports:
+            if isinstance(declaration, ImportDecl):
+                self.declare_import(declaration)
+        for declaration in node.top_declarations:
+            if isinstance(declaration, GLOBAL_DECLARATIONS):
+                self.declare_node(declaration)
+        return [*node.top_declarations, (Resolver.exit_scope, None)]
+    
+    def resolve_struct_decl(self, node: StructDecl) -> list:
+        """Reporta los campos repetidos y resuelve los tipos de los campos"""
+        names = set()
+        for field in node.fields:
+            if field.name in names:
+                self.error(f"El campo '{field.name}' ya está declarado en '{node.name}'", field)
+            names.add(field.name)
+        return [field.field_type for field in node.fields]
+    
+    def resolve_fun_decl(self, node: FunDecl) -> list:
+        """Los tipos se resuelven afuera; los parámetros y el cuerpo comparten el ámbito de la función"""
+        work = [param.param_type for param in node.parameters]
+        work.append(node.return_type)
+        work.append((Resolver.enter_scope, None))
+        work.extend((Resolver.declare_node, param) for param in node.parameters)
+        work.extend(node.body.statements)
+        work.append((Resolver.exit_scope, None))
+        return work
+    
+    def resolve_let_decl(self, node: LetDecl) -> list:
+        """Un let global ya está declarado; en un bloque se declara después de su valor inicial"""
+        if len(self.scopes) == 1:
+            return [node.var_type, node.initial_value]
+        return [node.var_type, node.initial_value, (Resolver.declare_node, node)]
+    
+    def resolve_block(self, node: Block) -> list:
+        """Las sentencias del bloque van en un ámbito propio"""
+        return [(Resolver.enter_scope, None), *node.statements, (Resolver.exit_scope, None)]
+    
+    # ========================================================================
+    # USOS
+    # ========================================================================
+    
+    def resolve_simple_type(self, node: SimpleType):
+        """Enlaza el tipo con su type o struct, o un QualID con el import de su primer identificador"""
+        name = node.type_name
+        if name in BUILTIN_TYPES:
+            return None
+        head, dot, _ = name.partition('.')
+        binding = self.visible.get(head)
+        if binding is None:
+            self.error(f"El tipo '{name}' no está declarado", node)
+            return None
+        if dot:
+            if not isinstance(binding.node, ImportDecl):
+                self.error(f"'{head}' no es un módulo importado", node)
+        elif not binding.is_type:
+            self.error(f"'{name}' no es un tipo", node)
+        node.binding = binding
+        return None
+    
+    def resolve_identifier(self, node: Identifier):
+        """Enlaza el identificador con la declaración visible de su nombre"""
+        binding = self.visible.get(node.name)
+        if binding is None:
+            self.error(f"'{node.name}' no está declarado", node)
+            return None
+        if binding.is_type:
+            self.error(f"'{node.name}' es un tipo, no un valor", node)
+        node.binding = binding
+        return None
+    
+    def resolve_function_call(self, node: FunctionCall) -> list:
+        """Enlaza el nombre de la función llamada y resuelve los argumentos"""
+        binding = self.visible.get(node.function_name)
+        if binding is None:
+            self.error(f"La función '{node.function_name}' no está declarada", node)
+        else:
+            if binding.is_type:
+                self.error(f"'{node.function_name}' es un tipo, no una función", node)
+            node.binding = binding
+        return list(node.arguments)
+
+
+Resolver.build_dispatch_tables()
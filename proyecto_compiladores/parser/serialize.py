@@ -0,0 +1,364 @@
+import gc
+import hashlib
+import os
+import re
+import struct
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from lexer import Lexer
+from .ast_nodes import ASTNode, Program, NODE, NODES, VALUE, ANNOTATION_FIELDS
+from .arena import NODE_CLASSES, NODE_KINDS, KIND_FIELDS
+from .parser import Parser
+
+
+# ============================================================================
+# FORMATO BINARIO DEL AST
+# ============================================================================
+#
+# Encabezado (HEADER): firma, versión y tamaños de las secciones que siguen.
+#
+# 1. Constantes: un varint por constante (tipo en los 3 bits bajos, dato en el resto).
+#    Los str y los float (como su repr) guardan su longitud en caracteres y su texto
+#    va en la sección 2; los int guardan su valor en zigzag. Están ordenadas de más a
+#    menos usadas, así que las frecuentes se referencian con un solo byte.
+# 2. Texto UTF-8 de los str de la tabla de constantes, uno tras otro.
+# 3. Etiquetas de los nodos en postorden (los hijos antes que el padre), un byte
+#    cada una: código en NODE_CLASSES + 1, o 0 para un hijo None.
+# 4. Tramos, en varints: por nodo, el desplazamiento en zigzag de su start respecto
+#    del nodo anterior y su end - start en zigzag.
+# 5. Campos, en varints, de cada nodo del último campo al primero: un campo de valor
+#    es su índice en la tabla de constantes, una lista de nodos es su cantidad de
+#    hijos y una lista de valores es su cantidad seguida de los índices. Un campo de
+#    nodo no ocupa nada: su hijo es el último nodo pendiente.
+#
+# Las etiquetas dependen del orden de FIELD_SHAPES: cambiarlo, o cambiar los campos
+# de un nodo, exige subir FORMAT_VERSION.
+
+MAGIC = b'ASTB'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBIIII')
+
+# Tipos de constante
+CONST_SPECIAL = 0   # None, False o True (dato 0, 1 o 2)
+CONST_STR = 1
+CONST_INT = 2
+CONST_FLOAT = 3
+SPECIAL_CONSTANTS = (None, False, True)
+
+# Varints de más de un byte: bytes con el bit de continuación seguidos del último byte
+MULTIBYTE_VARINT = re.compile(rb'[\x80-\xff]+[\x00-\x7f]')
+# Codificación precalculada de los varints de uno y dos bytes
+SMALL_VARINTS = tuple(bytes([v]) if v < 0x80 else bytes([v & 0x7f | 0x80, v >> 7]) for v in range(1 << 14))
+
+
+def encode_varint(value: int) -> bytes:
+    """LEB128 de un entero no negativo"""
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def encode_varints(values: list) -> bytes:
+    """Concatenación de los varints de los enteros no negativos"""
+    small = SMALL_VARINTS
+    limit = len(small)
+    return b''.join([small[v] if v < limit else encode_varint(v) for v in values])
+
+
+def decode_varints(data: bytes) -> list:
+    """Enteros de una secuencia de varints"""
+    # Los bytes sueltos son varints de un byte: se copian por tramos y sólo los
+    # varints de varios bytes se decodifican uno por uno
+    values = []
+    position = 0
+    for m in MULTIBYTE_VARINT.finditer(data):
+        values += data[position:m.start()]
+        value = 0
+        shift = 0
+        for byte in m.group():
+            value |= (byte & 0x7f) << shift
+            shift += 7
+        values.append(value)
+        position = m.end()
+    values += data[position:]
+    return values
+
+
+def zigzag(value: int) -> int:
+    """Entero con signo como no negativo: 0, -1, 1, -2... → 0, 1, 2, 3..."""
+    return value << 1 if value >= 0 else (~value << 1) | 1
+
+
+def unzigzag(value: int) -> int:
+    """Inverso de zigzag()"""
+    return (value >> 1) ^ -(value & 1)
+
+
+def node_builder(cls, fields):
+    """Función que crea un nodo 'cls' con los campos de la sección 5, en el orden en que aparecen.
+    
+    Como el __init__ de las dataclasses, se genera el código de cada clase: el
+    nodo se crea sin llamar a __init__ y cada campo se asigna directamente,
+    que es varias veces más rápido que un bucle genérico sobre los campos.
+    """
+    lines = ["def build(pop, next_field, constants, stack, start, end):",
+             "    node = new(cls)",
+             "    node.start = start",
+             "    node.end = end"]
+    # Las anotaciones no se guardan: el nodo queda como recién creado por el parser
+    lines += [f"    node.{name} = None" for name in ANNOTATION_FIELDS[cls]]
+    for name, shape in reversed(fields):
+        if shape == NODE:
+            lines.append(f"    node.{name} = pop()")
+        elif shape == VALUE:
+            lines.append(f"    node.{name} = constants[next_field()]")
+        elif shape == NODES:
+            lines += ["    count = next_field()",
+                      "    if count:",
+                      f"        node.{name} = stack[-count:]",
+                      "        del stack[-count:]",
+                      "    else:",
+                      f"        node.{name} = []"]
+        else:
+            lines.append(f"    node.{name} = [constants[next_field()] for _ in range(next_field())]")
+    lines.append("    return node")
+    namespace = {'new': object.__new__, 'cls': cls}
+    exec('\n'.join(lines), namespace)
+    return namespace['build']
+
+
+# Campos de cada código de NODE_CLASSES del último al primero, en el orden de la sección 5
+REVERSED_FIELDS = tuple(tuple(reversed(fields)) for fields in KIND_FIELDS)
+# Función que crea los nodos de cada etiqueta
+BUILDERS = (None,) + tuple(node_builder(cls, fields) for cls, fields in zip(NODE_CLASSES, KIND_FIELDS))
+
+
+# ============================================================================
+# DUMP / LOAD
+# ============================================================================
+
+def dumps(node: ASTNode) -> bytes:
+    """Serializa el árbol del nodo (normalmente un Program) en el formato binario"""
+    tags = bytearray()
+    spans = []
+    # Los campos de valor se anotan como ~id provisional (negativo) y se renumeran al
+    # final por frecuencia; las cantidades de las listas son >= 0
+    fields = []
+    emit = fields.append
+    constant_ids = {}
+    constants = []
+    previous_start = 0
+    
+    # Pendientes: un nodo por expandir, None (hijo vacío) o (nodo, código) listo para escribirse
+    pending = [node]
+    pop, push, extend = pending.pop, pending.append, pending.extend
+    while pending:
+        item = pop()
+        if item is None:
+            tags.append(0)
+            continue
+        if item.__class__ is not tuple:
+            kind = NODE_KINDS[item.__class__]
+            push((item, kind))
+            # Los hijos se apilan del último al primero para escribirse en orden
+            for name, shape in REVERSED_FIELDS[kind]:
+                if shape == NODE:
+                    push(getattr(item, name))
+                elif shape == NODES:
+                    extend(reversed(getattr(item, name)))
+            continue
+        
+        current, kind = item
+        tags.append(kind + 1)
+        start = current.start
+        delta = start - previous_start
+        width = current.end - start
+        spans.append(delta << 1 if delta >= 0 else (~delta << 1) | 1)
+        spans.append(width << 1 if width >= 0 else (~width << 1) | 1)
+        previous_start = start
+        for name, shape in REVERSED_FIELDS[kind]:
+            if shape == NODE:
+                continue
+            value = getattr(current, name)
+            if shape == NODES:
+                emit(len(value))
+                continue
+            if shape == VALUE:
+                values = (value,)
+            else:
+                values = value
+                emit(len(value))
+            for value in values:
+                # Fuera de los str el tipo es parte de la clave: True == 1 pero son constantes distintas
+                key = value if value.__class__ is str else (value.__class__, value)
+                index = constant_ids.get(key)
+                if index is None:
+                    index = constant_ids[key] = len(constants)
+                    constants.append(value)
+                emit(~index)
+    
+    # Tabla de constantes de más a menos usada
+    uses = Counter(fields)
+    order = sorted(range(len(constants)), key=lambda index: uses[~index], reverse=True)
+    renumber = [0] * len(constants)
+    descriptors = []
+    texts = []
+    for new_index, index in enumerate(order):
+        renumber[index] = new_index
+        value = constants[index]
+        if value is None or value is False or value is True:
+            descriptors.append(SPECIAL_CONSTANTS.index(value) << 3 | CONST_SPECIAL)
+        elif value.__class__ is str:
+            descriptors.append(len(value) << 3 | CONST_STR)
+            texts.append(value)
+        elif value.__class__ is int:
+            descriptors.append(zigzag(value) << 3 | CONST_INT)
+        elif value.__class__ is float:
+            text = repr(value)
+            descriptors.append(len(text) << 3 | CONST_FLOAT)
+            texts.append(text)
+        else:
+            raise ValueError(f"No se puede serializar el valor {value!r} de tipo {type(value).__name__}")
+    
+    sections = (
+        encode_varints(descriptors),
+        ''.join(texts).encode('utf-8'),
+        bytes(tags),
+        encode_varints(spans),
+        encode_varints([v if v >= 0 else renumber[~v] for v in fields]),
+    )
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, *[len(section) for section in sections[:4]])
+    return b''.join((header, *sections))
+
+
+def loads(data: bytes) -> ASTNode:
+    """Reconstruye el árbol serializado por dumps()"""
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Los datos no son un AST serializado")
+    _, version, *sizes = HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Versión de formato {version} no soportada (se esperaba {FORMAT_VERSION})")
+    bounds = [HEADER.size]
+    for size in sizes:
+        bounds.append(bounds[-1] + size)
+    if bounds[-1] > len(data):
+        raise ValueError("Datos incompletos: el tamaño no coincide con el encabezado")
+    descriptors, text, tags, spans, fields = [data[a:b] for a, b in zip(bounds, bounds[1:] + [len(data)])]
+    
+    # Tabla de constantes
+    text = text.decode('utf-8')
+    constants = []
+    offset = 0
+    for descriptor in decode_varints(descriptors):
+        kind, payload = descriptor & 7, descriptor >> 3
+        if kind == CONST_SPECIAL:
+            constants.append(SPECIAL_CONSTANTS[payload])
+        elif kind == CONST_INT:
+            constants.append(unzigzag(payload))
+        else:
+            value = text[offset:offset + payload]
+            offset += payload
+            constants.append(value if kind == CONST_STR else float(value))
+    
+    # Nodos: cada uno toma sus hijos del final de la pila
+    stack = []
+    push, pop = stack.append, stack.pop
+    builders = BUILDERS
+    next_span = iter(decode_varints(spans)).__next__
+    next_field = iter(decode_varints(fields)).__next__
+    start = 0
+    # Como en ParallelParser, el recolector de ciclos se detiene mientras se crean los nodos
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for tag in tags:
+            if tag:
+                delta = next_span()
+                start += (delta >> 1) ^ -(delta & 1)
+                width = next_span()
+                push(builders[tag](pop, next_field, constants, stack, start, start + ((width >> 1) ^ -(width & 1))))
+            else:
+                push(None)
+    except (IndexError, StopIteration):
+        raise ValueError("AST serializado corrupto") from None
+    finally:
+        if gc_enabled:
+            gc.enable()
+    if len(stack) != 1:
+        raise ValueError("AST serializado corrupto")
+    return stack[0]
+
+
+def dump(node: ASTNode, file):
+    """Escribe el árbol serializado en un archivo binario abierto"""
+    file.write(dumps(node))
+
+
+def load(file) -> ASTNode:
+    """Lee un árbol serializado de un archivo binario abierto"""
+    return loads(file.read())
+
+
+# ============================================================================
+# CACHÉ EN DISCO
+# ============================================================================
+
+class ASTCache:
+    """Directorio de ASTs serializados indexados por el hash del código fuente.
+    
+    parse() retorna el Program del código: si ya se analizó (en este u otro
+    proceso) lo carga del archivo <sha256>.ast, y si no ejecuta Lexer y
+    Parser y guarda el resultado. Los archivos se escriben en un temporal que
+    luego se renombra, así que varios procesos pueden compartir el directorio.
+    Los ids de símbolo del árbol son los de un Lexer con su tabla de símbolos
+    propia, como en un análisis desde cero. Con spans=True los árboles
+    guardan sus tramos, como Parser(spans=True).
+    """
+    
+    def __init__(self, directory, parser_class=Parser, engine: str = "regex", spans: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.parser_class = parser_class
+        self.engine = engine
+        self.spans = spans
+        self.hits = 0
+        self.misses = 0
+    
+    def path(self, source: str) -> Path:
+        """Archivo del AST del código fuente"""
+        digest = hashlib.sha256(source.encode('utf-8'))
+        # La versión entra en la clave: un formato nuevo no intenta leer archivos viejos
+        digest.update(b'\0%d' % FORMAT_VERSION)
+        # Con y sin tramos son árboles distintos
+        if self.spans:
+            digest.update(b'\0spans')
+        return self.directory / f"{digest.hexdigest()}.ast"
+    
+    def parse(self, source: str) -> Program:
+        """Program del código fuente, cargado de la caché o analizado y guardado en ella"""
+        path = self.path(source)
+        try:
+            program = loads(path.read_bytes())
+        except (OSError, ValueError):
+            # Sin archivo, o un archivo dañado: se analiza de nuevo y se reemplaza
+            pass
+        else:
+            self.hits += 1
+            return program
+        
+        self.misses += 1
+        program = self.parser_class(Lexer(source, engine=self.engine).tokenize_buffer(), spans=self.spans).parse()
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                dump(program, file)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return program
@@ -0,0 +1,54 @@
+from typing import Iterable, Optional
+
+from lexer import Token
+
+
+class TokenLookahead:
+    """Ventana circular de lookahead sobre cualquier iterador de tokens.
+
+    Sólo retiene el token actual y los que se hayan mirado por adelantado
+    (como máximo `size`), de modo que el lexer y el parser avanzan intercalados
+    y los tokens ya consumidos pueden liberarse.
+    """
+
+    def __init__(self, tokens: Iterable[Token], size: int = 4):
+        if size < 1:
+            raise ValueError("El lookahead debe tener al menos un token")
+        self._tokens = iter(tokens)
+        self._ring = [None] * size
+        self._size = size
+        self._head = 0   # Posición del token actual dentro del anillo
+        self._count = 0  # Tokens cargados a partir del actual
+        self._fill(1)
+
+    def _fill(self, count: int):
+        """Carga tokens del iterador hasta tener 'count' disponibles (o agotarlo)"""
+        while self._count < count:
+            token = next(self._tokens, None)
+            if token is None:
+                return
+            self._ring[(self._head + self._count) % self._size] = token
+            self._count += 1
+
+    @property
+    def current(self) -> Optional[Token]:
+        """Token actual, o None si el iterador se agotó"""
+        return self._ring[self._head] if self._count else None
+
+    def peek(self, offset: int = 1) -> Optional[Token]:
+        """Mira el token a 'offset' posiciones del actual sin consumirlo"""
+        if offset >= self._size:
+            raise ValueError(f"El lookahead máximo es {self._size - 1} tokens (se pidió {offset})")
+        self._fill(offset + 1)
+        if offset < self._count:
+            return self._ring[(self._head + offset) % self._size]
+        return None
+
+    def advance(self) -> Optional[Token]:
+        """Descarta el token actual y retorna el siguiente"""
+        if self._count:
+            self._ring[self._head] = None
+            self._head = (self._head + 1) % self._size
+            self._count -= 1
+        self._fill(1)
+        return self.current
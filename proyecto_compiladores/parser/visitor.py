@@ -0,0 +1,151 @@
+from typing import Dict, Iterator, Tuple
+
+from .ast_nodes import ASTNode, Block, LazyBlock, NODE_FIELDS, NODE, NODES
+
+
+# Campos con nodos hijos de cada clase: (nombre, es una lista), en el orden de iter_fields()
+CHILD_FIELDS: Dict[type, Tuple[Tuple[str, bool], ...]] = {
+    cls: tuple((name, shape == NODES) for name, shape in fields if shape in (NODE, NODES))
+    for cls, fields in NODE_FIELDS.items()
+}
+CHILD_FIELDS[LazyBlock] = CHILD_FIELDS[Block]
+
+
+def child_fields(cls: type) -> Tuple[Tuple[str, bool], ...]:
+    """Campos con nodos hijos de la clase; una subclase sin tabla propia usa la de su base"""
+    fields = CHILD_FIELDS.get(cls)
+    if fields is None:
+        base = next((base for base in cls.__mro__ if base in CHILD_FIELDS), None)
+        fields = CHILD_FIELDS[cls] = CHILD_FIELDS[base] if base is not None else ()
+    return fields
+
+
+def iter_child_nodes(node: ASTNode) -> Iterator[ASTNode]:
+    """Genera los hijos directos del nodo en el orden de sus campos"""
+    for name, is_list in child_fields(node.__class__):
+        value = getattr(node, name)
+        if is_list:
+            yield from value
+        elif value is not None:
+            yield value
+
+
+def reversed_children(node: ASTNode) -> list:
+    """Hijos directos del nodo en orden inverso, listos para apilarse"""
+    children = []
+    for name, is_list in CHILD_FIELDS.get(node.__class__) or child_fields(node.__class__):
+        value = getattr(node, name)
+        if is_list:
+            children.extend(value)
+        elif value is not None:
+            children.append(value)
+    children.reverse()
+    return children
+
+
+def walk(node: ASTNode) -> Iterator[ASTNode]:
+    """Genera el nodo y todos sus descendientes en preorden, con una pila en lugar de recursión"""
+    pending = [node]
+    pop, extend = pending.pop, pending.extend
+    while pending:
+        node = pop()
+        yield node
+        extend(reversed_children(node))
+
+
+class NodeVisitor:
+    """Recorre el AST llamando a visit_<Clase>(node) en cada nodo, como ast.NodeVisitor.
+    
+    El método de cada clase de nodo se busca una sola vez por clase de
+    visitante (también en las bases del nodo: visit_Block atiende a
+    LazyBlock) y queda en una tabla de despacho. Los nodos sin método propio
+    pasan por generic_visit(), que visita sus hijos expandiendo con una pila
+    los que tampoco tienen método, así que la profundidad de recursión sólo
+    crece en los visit_ que llaman a generic_visit().
+    """
+    
+    # Tabla de despacho por clase de visitante: clase de nodo → función
+    dispatch: Dict[type, object] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = {}
+    
+    @classmethod
+    def resolve(cls, node_class: type):
+        """Método que atiende a 'node_class': visit_ de la clase o de una base, o generic_visit"""
+        for base in node_class.__mro__:
+            method = getattr(cls, 'visit_' + base.__name__, None)
+            if method is not None:
+                break
+        else:
+            method = cls.generic_visit
+        cls.dispatch[node_class] = method
+        return method
+    
+    def visit(self, node: ASTNode):
+        """Visita un nodo y retorna lo que retorne su método"""
+        method = self.dispatch.get(node.__class__) or self.resolve(node.__class__)
+        return method(self, node)
+    
+    def generic_visit(self, node: ASTNode):
+        """Visita los hijos del nodo"""
+        dispatch, resolve = self.dispatch, self.resolve
+        generic = NodeVisitor.generic_visit
+        pending = reversed_children(node)
+        pop, extend = pending.pop, pending.extend
+        while pending:
+            child = pop()
+            method = dispatch.get(child.__class__) or resolve(child.__class__)
+            if method is generic:
+                extend(reversed_children(child))
+            else:
+                method(self, child)
+
+
+class NodeTransformer(NodeVisitor):
+    """NodeVisitor que reemplaza cada nodo por lo que retorna su método, como ast.NodeTransformer.
+    
+    Retornar None elimina el nodo (en un campo simple queda None) y, dentro de
+    una lista, retornar una lista la reemplaza por varios nodos. generic_visit()
+    transforma los hijos y retorna el mismo nodo con sus campos actualizados.
+    """
+    
+    def generic_visit(self, node: ASTNode) -> ASTNode:
+        """Transforma los hijos del nodo y retorna el nodo"""
+        dispatch, resolve = self.dispatch, self.resolve
+        generic = NodeTransformer.generic_visit
+        # Primero se recorren en preorden los nodos genéricos (que sólo transforman a sus
+        # hijos), llamando a los métodos propios en el mismo orden que una visita recursiva
+        results = {}
+        generic_nodes = [node]
+        pending = reversed_children(node)
+        pop, extend = pending.pop, pending.extend
+        while pending:
+            child = pop()
+            method = dispatch.get(child.__class__) or resolve(child.__class__)
+            if method is generic:
+                generic_nodes.append(child)
+                extend(reversed_children(child))
+            else:
+                results[id(child)] = method(self, child)
+        
+        # Después se actualizan sus campos de abajo hacia arriba
+        for current in reversed(generic_nodes):
+            for name, is_list in child_fields(current.__class__):
+                value = getattr(current, name)
+                if not is_list:
+                    if value is not None:
+                        setattr(current, name, results.get(id(value), value))
+                    continue
+                new_values = []
+                for child in value:
+                    result = results.get(id(child), child)
+                    if result is None:
+                        continue
+                    if isinstance(result, ASTNode):
+                        new_values.append(result)
+                    else:
+                        new_values.extend(result)
+                value[:] = new_values
+        return node
@@ -24,7 +24,11 @@ boton.addEventListener('click', async function() {
         if(data.partial_tokens) {
             showResultsOnTable(data.partial_tokens);
         }
-        appendErrorToTable(data.error);
+        if(data.errors) {
+            data.errors.forEach(error => appendErrorToTable(`${error.message} (línea ${error.line}, columna ${error.column})`));
+        } else {
+            appendErrorToTable(data.error);
+        }
         showLog(data.ast);
     }  
   });
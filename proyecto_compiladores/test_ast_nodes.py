@@ -0,0 +1,83 @@
+import pickle
+
+from lexer import Lexer
+from parser import Parser, ParserError, ASTNode, Block, LazyBlock, iter_fields
+from parser.ast_nodes import BinaryOp, FunDecl, Identifier, NumLiteral
+from ejemplos import PROGRAMA
+
+
+def clases_de_nodos():
+    """Todas las subclases de ASTNode"""
+    clases, pendientes = [], [ASTNode]
+    while pendientes:
+        clase = pendientes.pop()
+        clases.append(clase)
+        pendientes.extend(clase.__subclasses__())
+    return clases
+
+
+def test_nodos_sin_dict():
+    """Ningún nodo tiene __dict__: todos los campos son __slots__"""
+    programa = Parser(Lexer(PROGRAMA).tokenize()).parse()
+    pendientes = [programa]
+    while pendientes:
+        nodo = pendientes.pop()
+        assert not hasattr(nodo, "__dict__"), type(nodo).__name__
+        for _, valor in iter_fields(nodo):
+            pendientes.extend(v for v in (valor if isinstance(valor, list) else [valor]) if isinstance(v, ASTNode))
+    assert not hasattr(LazyBlock(Parser, [], 0, 1), "__dict__")
+    try:
+        Identifier("x").otro = 1
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("Se esperaba AttributeError")
+
+
+def test_campos_y_repr():
+    """Los nombres de los campos y la representación de los nodos se conservan"""
+    nodo = BinaryOp("+", Identifier("a", 7, start=3, end=4), NumLiteral("1"), start=3, end=6)
+    assert [nombre for nombre, _ in iter_fields(nodo)] == ["operator", "left", "right"]
+    assert [nombre for nombre, _ in iter_fields(nodo.left)] == ["name", "symbol"]
+    assert repr(nodo) == "(Id(a) + Num(1))"
+    # La base no define __repr__: usa el de dataclass en lugar de fallar
+    assert repr(ASTNode(start=2, end=5)) == "ASTNode(start=2, end=5)"
+    funcion = Parser(Lexer(PROGRAMA).tokenize()).parse().top_declarations[-1]
+    assert repr(funcion) == "Function(distancia, params=[p1: Punto, p2: Punto], return=int)"
+    assert repr(funcion.body.statements[2]) == (
+        "If((((Id(dx) >= Num(0)) && (Id(dy) <= Num(0))) || !(((Id(dx) == Id(dy))))), "
+        "then=Block(1 statements), else=Block(1 statements))"
+    )
+
+
+def test_serializacion():
+    """pickle conserva campos, tramos e ids de símbolo; un LazyBlock se serializa como Block analizado"""
+    programa = Parser(Lexer(PROGRAMA).tokenize(), spans=True).parse()
+    copia = pickle.loads(pickle.dumps(programa))
+    assert copia == programa
+    original, copiado = programa.top_declarations[-1], copia.top_declarations[-1]
+    assert (copiado.start, copiado.end) == (original.start, original.end)
+    retorno = copiado.body.statements[-1].value
+    assert retorno.symbol == original.body.statements[-1].value.symbol is not None
+
+    esquema = Parser(Lexer(PROGRAMA).tokenize(), spans=True).parse_outline()
+    copia = pickle.loads(pickle.dumps(esquema))
+    cuerpo = copia.top_declarations[-1].body
+    assert type(cuerpo) is Block and cuerpo == original.body and cuerpo.start == original.body.start
+
+    # Un cuerpo con errores se reporta al serializarlo, igual que al consultarlo
+    esquema = Parser(Lexer("module M;\nfn f() { x = ; }").tokenize()).parse_outline()
+    try:
+        pickle.dumps(esquema)
+    except ParserError:
+        pass
+    else:
+        raise AssertionError("Se esperaba ParserError")
+    assert all("__slots__" in vars(clase) for clase in clases_de_nodos())
+
+
+if __name__ == "__main__":
+    test_nodos_sin_dict()
+    test_campos_y_repr()
+    test_serializacion()
+    print("Nodos del AST correctos")
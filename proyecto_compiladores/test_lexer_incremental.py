@@ -0,0 +1,101 @@
+import random
+
+from lexer import Lexer, LexerError, TokenType, relex
+from ejemplos import programa_grande
+
+
+FRAGMENTOS = ['"', '//', '/', ' ', '\n', 'x', '1', '.', 'e', '=', '==', '-', '>', ';', '{', '}',
+              'let', 'fn', '"texto"', '// nota //', '12.5e3', 'é']
+
+
+def columnas(buffer):
+    return list(buffer.kinds), list(buffer.starts), list(buffer.lengths)
+
+
+def lex_completo(fuente):
+    try:
+        return Lexer(fuente, engine="regex").tokenize_buffer()
+    except LexerError as e:
+        return e
+
+
+def test_ediciones_aleatorias_igual_a_relex_completo():
+    """Cada edición incremental produce exactamente los tokens de re-tokenizar todo"""
+    rng = random.Random(2025)
+    fuente = programa_grande(10) + '// comentario\n largo //\nlet s: string = "a // b";\n'
+    buffer = Lexer(fuente).tokenize_buffer()
+    aplicadas = 0
+    for _ in range(1500):
+        inicio = rng.randint(0, len(fuente))
+        borrados = rng.choice([0, 0, 1, 2, 5, 20]) if inicio < len(fuente) else 0
+        borrados = min(borrados, len(fuente) - inicio)
+        insertado = "".join(rng.choice(FRAGMENTOS) for _ in range(rng.choice([0, 1, 1, 2, 3])))
+        nueva = fuente[:inicio] + insertado + fuente[inicio + borrados:]
+
+        esperado = lex_completo(nueva)
+        try:
+            obtenido = relex(buffer, inicio, borrados, insertado)
+        except LexerError as e:
+            assert isinstance(esperado, LexerError), repr(nueva)
+            assert (e.message, e.line, e.column) == (esperado.message, esperado.line, esperado.column)
+            continue
+        assert not isinstance(esperado, LexerError), repr(nueva)
+        assert obtenido.source == nueva
+        assert columnas(obtenido) == columnas(esperado), (inicio, borrados, insertado)
+        fuente, buffer = nueva, obtenido
+        aplicadas += 1
+    assert aplicadas > 500
+
+
+def test_ediciones_con_recuperacion():
+    """Con recover=True ninguna edición lanza LexerError y los tokens (con los ERROR) son los de re-tokenizar todo"""
+    rng = random.Random(2027)
+    fuente = programa_grande(10)
+    buffer = Lexer(fuente, recover=True).tokenize_buffer()
+    errores = 0
+    for _ in range(1000):
+        inicio = rng.randint(0, len(fuente))
+        borrados = min(rng.choice([0, 0, 1, 2, 5]), len(fuente) - inicio)
+        insertado = "".join(rng.choice(FRAGMENTOS) for _ in range(rng.choice([0, 1, 1, 2])))
+        nueva = fuente[:inicio] + insertado + fuente[inicio + borrados:]
+        buffer = relex(buffer, inicio, borrados, insertado, recover=True)
+        esperado = Lexer(nueva, engine="regex", recover=True).tokenize_buffer()
+        assert columnas(buffer) == columnas(esperado), repr(nueva)
+        errores += TokenType.ERROR.value in buffer.kinds
+        fuente = nueva
+    assert errores > 100
+
+
+def test_abrir_y_cerrar_string_y_comentario():
+    """Ediciones que cierran y reabren strings y comentarios cambian el tramo afectado"""
+    fuente = 'a = "x y";\n// nota larga //\nb = 2;'
+    buffer = Lexer(fuente).tokenize_buffer()
+    # Cerrar el string y abrir otro dentro del literal
+    editado = relex(buffer, fuente.index(" y"), 0, '" + "')
+    assert [editado.value_at(i) for i in range(5)] == ['a', '=', '"x"', '+', '" y"']
+    # Cerrar el comentario y abrir otro dentro de su texto
+    editado = relex(editado, editado.source.index(" larga"), 0, "// c = 3; //")
+    assert columnas(editado) == columnas(Lexer(editado.source).tokenize_buffer())
+    assert [editado.value_at(i) for i in range(6, 10)] == ['c', '=', '3', ';']
+    # Borrar los delimitadores intermedios vuelve a unir el string
+    inicio = editado.source.index('" + "')
+    editado = relex(editado, inicio, 5, '')
+    assert editado.value_at(2) == '"x y"'
+    assert columnas(editado) == columnas(Lexer(editado.source).tokenize_buffer())
+
+
+def test_edicion_local_reutiliza_la_cola():
+    fuente = programa_grande(500)
+    buffer = Lexer(fuente).tokenize_buffer()
+    inicio = fuente.index("f250(a - 1)")
+    editado = relex(buffer, inicio, 4, "g9")
+    assert columnas(editado) == columnas(Lexer(editado.source).tokenize_buffer())
+    assert editado.value_at(len(editado) - 2) == '}'
+
+
+if __name__ == "__main__":
+    test_ediciones_aleatorias_igual_a_relex_completo()
+    test_ediciones_con_recuperacion()
+    test_abrir_y_cerrar_string_y_comentario()
+    test_edicion_local_reutiliza_la_cola()
+    print("Re-tokenización incremental correcta")
@@ -0,0 +1,105 @@
+import os
+import random
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from lexer import Lexer, LexerError
+from ejemplos import programa_grande, FRAGMENTOS_LEXICOS
+
+
+UNICODE = """
+// comentario con acentos: ñandú, 漢字 y emoji 🚀 //
+let café: string = "día 🚀 año";
+let 変数: int = ٣٤ + x²;
+fn ñ() { return "λ" ; }
+"""
+
+ERRORES = [
+    'let s: string = "sin cerrar ñ',
+    "// ñ sin cerrar",
+    'let ñ = "é";\n  let x = 1e+;',
+    'let ñ = "é"; x = a & b;',
+    'let ñ = "é"; x = a | b;',
+    'let ñ = "é"; x = a € b;',
+    "let x = 1;\r\nlet ñ = #;",
+]
+
+
+def en_archivo(contenido):
+    """Escribe el contenido en un archivo temporal UTF-8 y retorna su ruta"""
+    descriptor, ruta = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(descriptor, "w", encoding="utf-8", newline="") as archivo:
+        archivo.write(contenido)
+    return ruta
+
+
+def lex(construir):
+    """Tokens o error (mensaje, línea, columna) de un lexer"""
+    with redirect_stdout(StringIO()):
+        try:
+            with construir() as lexer:
+                return [(t.type, t.value, t.line, t.column) for t in lexer.tokenize()]
+        except LexerError as e:
+            return (e.message, e.line, e.column)
+
+
+def comparar(contenido):
+    ruta = en_archivo(contenido)
+    try:
+        esperado = lex(lambda: Lexer(contenido, engine="regex"))
+        assert lex(lambda: Lexer.from_path(ruta)) == esperado
+        return esperado
+    finally:
+        os.remove(ruta)
+
+
+def test_from_path_igual_a_str():
+    """Tokens y posiciones idénticos al escanear el archivo mapeado y el texto decodificado"""
+    for contenido in (UNICODE, programa_grande(100), UNICODE * 50, ""):
+        comparar(contenido)
+
+
+def test_errores_con_misma_posicion():
+    for contenido in ERRORES:
+        assert isinstance(comparar(contenido), tuple)
+
+
+def test_fuzz_bytes_igual_a_str():
+    """Escanear los bytes UTF-8 equivale a escanear el texto, incluidos los casos Unicode y los errores"""
+    rng = random.Random(7)
+    for _ in range(2000):
+        fuente = "".join(rng.choice(FRAGMENTOS_LEXICOS) for _ in range(rng.randint(0, 25)))
+        assert lex(lambda: Lexer(fuente.encode("utf-8"), engine="regex")) == \
+               lex(lambda: Lexer(fuente, engine="regex")), repr(fuente)
+
+
+def test_buffer_desde_archivo():
+    """El TokenBuffer sobre el archivo mapeado decodifica sólo los lexemas consultados"""
+    ruta = en_archivo(UNICODE)
+    try:
+        with Lexer.from_path(ruta) as lexer:
+            buffer = lexer.tokenize_buffer()
+            esperado = Lexer(UNICODE, engine="regex").tokenize()
+            assert [(t.type, t.value, t.line, t.column) for t in buffer] == \
+                   [(t.type, t.value, t.line, t.column) for t in esperado]
+    finally:
+        os.remove(ruta)
+
+
+def test_bytes_solo_con_motor_regex():
+    try:
+        Lexer(b"let x = 1;")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Se esperaba ValueError")
+
+
+if __name__ == "__main__":
+    test_from_path_igual_a_str()
+    test_errores_con_misma_posicion()
+    test_fuzz_bytes_igual_a_str()
+    test_buffer_desde_archivo()
+    test_bytes_solo_con_motor_regex()
+    print("Lexer sobre archivos mapeados en memoria correcto")
@@ -0,0 +1,100 @@
+import pytest
+
+from lexer import Lexer, LexerError, TokenType
+from parser import Parser, IterativeParser, ParserError, ErrorNode
+from parser.ast_nodes import ConstDecl, FunDecl
+from ejemplos import PROGRAMA
+
+
+CON_ERRORES_LEXICOS = """module M;
+fn f() { x = 1e+ + 2; y = a & b | c; let z: int = $; }
+fn g() { return "abc
+; }
+// sin cerrar
+const K: int = 3;
+"""
+
+
+def tokens_y_errores(fuente, engine):
+    """Tokens (tipo, valor, línea, columna) y errores (mensaje, línea, columna) en modo recuperación"""
+    lexer = Lexer(fuente, engine=engine, recover=True)
+    tokens = [(t.type, t.value, t.line, t.column) for t in lexer.tokenize()]
+    return tokens, [(e.message, e.line, e.column) for e in lexer.errors]
+
+
+def test_tokens_error_y_diagnosticos():
+    """Cada lexema inválido produce un token ERROR con su texto y un diagnóstico, y el escaneo continúa"""
+    tokens, errores = tokens_y_errores(CON_ERRORES_LEXICOS, "regex")
+    assert [(valor, linea, columna) for tipo, valor, linea, columna in tokens if tipo is TokenType.ERROR] == [
+        ("1e+", 2, 14), ("&", 2, 29), ("|", 2, 33), ("$", 2, 51), ('"abc', 3, 17), ("// sin cerrar", 5, 1),
+    ]
+    assert [mensaje for mensaje, _, _ in errores] == [
+        "Número en notación científica inválido: ' 1e+ '",
+        "Carácter inesperado: '&' (se esperaba ' && ')",
+        "Carácter inesperado: '|' (se esperaba ' || ')",
+        "Carácter no reconocido: ' $ '",
+        "String literal no cerrado (se esperaba ' \" ')",
+        "Comentario no cerrado (se esperaba ' // ')",
+    ]
+    # Lo que sigue a cada error se tokeniza normalmente
+    assert tokens[-8:] == [
+        (TokenType.CONST, "const", 6, 1), (TokenType.ID, "K", 6, 7), (TokenType.COLON, ":", 6, 8),
+        (TokenType.INT, "int", 6, 10), (TokenType.ASSIGN, "=", 6, 14), (TokenType.NUM, "3", 6, 16),
+        (TokenType.SEMICOLON, ";", 6, 17), (TokenType.EOF, "", 7, 1),
+    ]
+
+
+def test_motores_y_bytes_coinciden():
+    """Los dos motores, el buffer columnar y el escaneo sobre bytes dan los mismos tokens y errores"""
+    fuentes = (CON_ERRORES_LEXICOS, "a ñ@ 3e 1.5E- é# \"x\n//", "&", "x |", "€ π ∑", PROGRAMA)
+    for fuente in fuentes:
+        esperado = tokens_y_errores(fuente, "regex")
+        assert tokens_y_errores(fuente, "char") == esperado, fuente
+        assert tokens_y_errores(fuente.encode("utf-8"), "regex") == esperado, fuente
+        buffer = Lexer(fuente, engine="regex", recover=True).tokenize_buffer()
+        assert [(t.type, t.value, t.line, t.column) for t in buffer] == esperado[0]
+
+
+def test_sin_recuperacion_sigue_fallando():
+    """Por omisión el primer error léxico aborta el análisis"""
+    for engine in Lexer.ENGINES:
+        with pytest.raises(LexerError, match="columna 14"):
+            Lexer(CON_ERRORES_LEXICOS, engine=engine).tokenize()
+    assert Lexer(PROGRAMA, recover=True).errors == []
+
+
+def test_el_parser_consume_los_tokens_error():
+    """El parser reemplaza cada token ERROR por un ErrorNode sin duplicar el diagnóstico léxico"""
+    for clase in (Parser, IterativeParser):
+        lexer = Lexer(CON_ERRORES_LEXICOS, engine="regex", recover=True)
+        programa, errores = clase(lexer.tokenize()).parse_with_recovery()
+        assert len(lexer.errors) == 6
+        # Los errores sintácticos sobre un token ERROR ya están reportados por el lexer
+        assert errores == []
+        f, g, comentario, const = programa.top_declarations
+        assert isinstance(f, FunDecl) and isinstance(g, FunDecl) and isinstance(const, ConstDecl)
+        assert isinstance(comentario, ErrorNode)
+        asignacion, incompleta, let = f.body.statements
+        assert isinstance(asignacion.expression.value.left, ErrorNode)
+        assert isinstance(incompleta, ErrorNode) and isinstance(let.initial_value, ErrorNode)
+        assert isinstance(g.body.statements[0].value, ErrorNode)
+
+    # Los errores sintácticos que no caen sobre un token ERROR se siguen reportando
+    lexer = Lexer("module M;\nfn f() { x = $ y; let = 1; }", recover=True)
+    _, errores = Parser(lexer.tokenize()).parse_with_recovery()
+    assert [(e.line, e.column) for e in lexer.errors] == [(2, 14)]
+    assert [(e.message, e.token.line, e.token.column) for e in errores] == [
+        ("Se esperaba SEMICOLON", 2, 16), ("Se esperaba ID", 2, 23),
+    ]
+
+    # Sin recuperación en el parser, un token ERROR es un error sintáctico
+    with pytest.raises(ParserError, match="Token léxico inválido"):
+        Parser(Lexer(CON_ERRORES_LEXICOS, recover=True).tokenize()).parse()
+
+
+if __name__ == "__main__":
+    test_tokens_error_y_diagnosticos()
+    test_motores_y_bytes_coinciden()
+    test_sin_recuperacion_sigue_fallando()
+    test_el_parser_consume_los_tokens_error()
+    print("Recuperación de errores léxicos correcta")
@@ -0,0 +1,109 @@
+import contextlib
+import io
+import random
+
+from lexer import Lexer, LexerError
+from ejemplos import FRAGMENTOS_LEXICOS
+
+
+PROGRAMA = """
+module Geometria.Plano;
+
+import Math.Avanzado as MA;
+import Sistema;
+
+// comentario
+   de varias líneas //
+type Vector = []int;
+type Operacion = (int, int) -> int;
+
+struct Punto {
+    x: int,
+    y: int
+};
+
+const PI: int = 3.14159;
+const AVOGADRO: int = 6.022e23;
+const MINIMO: int = 1E-9;
+let nombre: string = "ñandú\tcon tabs";
+
+fn distancia(p1: Punto, p2: Punto) -> int {
+    let dx: int = p2.x - p1.x;
+    let dy: int = p2.y - p1.y;
+    if (dx >= 0 && dy <= 0 || !(dx == dy) && dx != 1) {
+        return dx * dx + dy * dy % 2 / 1;
+    } else {
+        while (dx < dy) { dx = dx + 1; }
+    }
+    return MA.raiz(lista[0], -dx);
+}
+"""
+
+def lex(source, engine):
+    """Tokeniza y devuelve la lista de tokens o la tupla del error léxico"""
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tokens = Lexer(source, engine=engine).tokenize()
+        return [(t.type, t.value, t.line, t.column) for t in tokens]
+    except LexerError as e:
+        return ('error', e.message, e.line, e.column)
+
+
+def test_programa_grande_equivalente():
+    """Un programa de cientos de KB produce exactamente los mismos tokens en ambos motores"""
+    fuente = PROGRAMA * 300
+    tokens = lex(fuente, "regex")
+    assert tokens == lex(fuente, "char")
+    assert tokens[-1][0].name == 'EOF'
+
+
+def test_fuentes_aleatorias_equivalentes():
+    """Secuencias aleatorias de fragmentos (incluidos errores y Unicode) coinciden en tokens y errores"""
+    rng = random.Random(2025)
+    for _ in range(3000):
+        fuente = "".join(rng.choice(FRAGMENTOS_LEXICOS) for _ in range(rng.randint(0, 25)))
+        assert lex(fuente, "regex") == lex(fuente, "char"), repr(fuente)
+
+
+def test_errores_en_misma_posicion():
+    casos = [
+        'let x = "abierto\n;',
+        'x = 1;\n  // sin cerrar',
+        'a &b',
+        'a | b',
+        'x = 1e+;',
+        'x = 3 # 4',
+        'y = 2²e;',
+    ]
+    for fuente in casos:
+        resultado = lex(fuente, "regex")
+        assert resultado[0] == 'error'
+        assert resultado == lex(fuente, "char"), repr(fuente)
+
+
+def test_literal_largo_multilinea():
+    """Un string y un comentario de 1 MB se extraen completos y la posición siguiente es correcta"""
+    contenido = ("x" * 63 + "\n") * 16384
+    fuente = f'// {contenido} //\ns = "{contenido}";'
+    for engine in Lexer.ENGINES:
+        tokens = Lexer(fuente, engine=engine).tokenize()
+        assert tokens[2].value == f'"{contenido}"'
+        assert (tokens[3].value, tokens[3].line, tokens[3].column) == (';', 32770, 2)
+
+
+def test_motor_desconocido():
+    try:
+        Lexer("x", engine="otro")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Se esperaba ValueError")
+
+
+if __name__ == "__main__":
+    test_programa_grande_equivalente()
+    test_fuentes_aleatorias_equivalentes()
+    test_errores_en_misma_posicion()
+    test_literal_largo_multilinea()
+    test_motor_desconocido()
+    print("Motores equivalentes")
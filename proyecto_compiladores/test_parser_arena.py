@@ -0,0 +1,76 @@
+import pytest
+
+from lexer import Lexer
+from parser import Parser, IterativeParser, ParserError, Arena, NodeView
+from parser.ast_nodes import BoolLiteral, FunDecl, NumLiteral
+from ejemplos import PROGRAMA, programa_grande, CON_ERRORES, tramos
+
+
+def test_ida_y_vuelta():
+    """to_node() reconstruye el mismo árbol, con sus tramos e ids de símbolo"""
+    for fuente in (PROGRAMA, programa_grande(50)):
+        programa = Parser(Lexer(fuente).tokenize(), spans=True).parse()
+        arena = Arena.from_program(programa)
+        copia = arena.to_node()
+        assert copia == programa and tramos(copia) == tramos(programa)
+        distancia = next(d for d in copia.top_declarations if isinstance(d, FunDecl))
+        assert distancia.body.statements[-1].value.symbol is not None
+        assert [(v.kind.__name__, v.start, v.end) for v in arena.root.walk()] == tramos(programa)
+    # Los valores repetidos se guardan una vez; True y 1 son constantes distintas
+    assert len(arena.constants) < len(arena) / 3
+    arena = Arena.from_program(BoolLiteral(True))
+    assert arena.constant(1) != arena.constant(True) == 0
+
+
+def test_construida_desde_el_parser():
+    """from_tokens() produce el mismo árbol que parse() y parse_with_recovery(), con cualquier entrada"""
+    fuente = programa_grande(30)
+    esperado = Parser(Lexer(fuente).tokenize(), spans=True).parse()
+    for clase in (Parser, IterativeParser):
+        for tokens in (Lexer(fuente).tokenize(), Lexer(fuente).iter_tokens(),
+                       Lexer(fuente, engine="regex").tokenize_buffer()):
+            arena = Arena.from_tokens(tokens, clase)
+            assert arena.to_node() == esperado and tramos(arena.to_node()) == tramos(esperado)
+            assert arena.errors is None
+
+        programa, errores = clase(Lexer(CON_ERRORES).tokenize(), spans=True).parse_with_recovery()
+        arena = Arena.from_tokens(Lexer(CON_ERRORES).tokenize(), clase, recover=True)
+        assert arena.to_node() == programa and tramos(arena.to_node()) == tramos(programa)
+        assert [str(e) for e in arena.errors] == [str(e) for e in errores]
+
+    with pytest.raises(ParserError, match="Se esperaba ID"):
+        Arena.from_tokens(Lexer(CON_ERRORES).tokenize())
+
+
+def test_vistas():
+    """NodeView lee los campos por nombre y navega hijos, padre y subárbol"""
+    tokens = Lexer(PROGRAMA).tokenize()
+    arena = Arena.from_tokens(tokens)
+    programa = arena.root
+    assert programa.module_decl.qualified_id.identifiers == ["Geometria", "Plano"]
+    assert [i.alias for i in programa.imports] == ["MA", None]
+
+    distancia = programa.top_declarations[-1]
+    assert distancia.kind is FunDecl and distancia.name == "distancia"
+    assert [p.name for p in distancia.parameters] == ["p1", "p2"] and distancia.return_type.type_name == "int"
+    assert tokens[distancia.start].value == "fn" and tokens[distancia.end - 1].value == "}"
+    assert distancia.parent == programa and programa.parent is None
+    assert distancia.children()[:2] == distancia.parameters and distancia.children()[-1] == distancia.body
+
+    retorno = distancia.body.statements[-1]
+    assert repr(retorno) == f"ReturnStmt#{retorno.index}" and retorno.value.function_name == "raiz"
+    assert distancia.to_node() == Parser(Lexer(PROGRAMA).tokenize()).parse().top_declarations[-1]
+    numeros = [v for v in distancia.walk() if v.kind is NumLiteral]
+    assert [n.value for n in numeros] == ["0", "0", "2", "1", "0"]
+    assert all(n.parent.index < n.index < arena.subtree_ends[distancia.index] for n in numeros)
+    assert isinstance(retorno.value.arguments[1].operand, NodeView)
+
+    with pytest.raises(AttributeError, match="ReturnStmt no tiene el campo 'name'"):
+        retorno.name
+
+
+if __name__ == "__main__":
+    test_ida_y_vuelta()
+    test_construida_desde_el_parser()
+    test_vistas()
+    print("Arena del AST correcta")
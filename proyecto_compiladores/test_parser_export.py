@@ -0,0 +1,91 @@
+import json
+
+import parser.ast_nodes
+from lexer import Lexer
+from parser import Parser, NodeTable, walk, iter_text, iter_json
+from parser.ast_nodes import NumLiteral, UnaryOp
+from parser.export import chunked, CHUNK_SIZE, MAX_INDENT
+from ejemplos import PROGRAMA, programa_grande, CON_ERRORES, tramos
+
+
+def desde_json(datos):
+    """Reconstruye el árbol a partir de iter_json() (recursivo, sólo para las pruebas)"""
+    if isinstance(datos, list):
+        return [desde_json(d) for d in datos]
+    if not isinstance(datos, dict):
+        return datos
+    campos = {nombre: desde_json(valor) for nombre, valor in datos.items() if nombre not in ("type", "start", "end")}
+    return getattr(parser.ast_nodes, datos["type"])(**campos, start=datos["start"], end=datos["end"])
+
+
+def test_texto_jerarquico():
+    """iter_text() muestra el árbol completo, incluidos los cuerpos de las funciones"""
+    programa = Parser(Lexer(PROGRAMA).tokenize()).parse()
+    lineas = "".join(iter_text(programa)).splitlines()
+    assert lineas[:4] == [
+        "Program",
+        "  module_decl: ModuleDecl",
+        "    qualified_id: QualID(identifiers=['Geometria', 'Plano'])",
+        "  imports[0]: ImportDecl(alias='MA')",
+    ]
+    assert "  top_declarations[5]: FunDecl(name='distancia')" in lineas
+    assert "    body: Block" in lineas and "      statements[0]: LetDecl(name='dx')" in lineas
+
+    # Una línea por nodo más una por lista vacía, y cada hijo un nivel más adentro que su padre
+    vacias = [linea for linea in lineas if linea.endswith(": []")]
+    assert len(lineas) == sum(1 for _ in walk(programa)) + len(vacias)
+    niveles = [(len(linea) - len(linea.lstrip())) // 2 for linea in lineas]
+    assert niveles[0] == 0 and all(b <= a + 1 for a, b in zip(niveles, niveles[1:]))
+
+    # El AST parcial con errores también se exporta completo
+    con_errores, _ = Parser(Lexer(CON_ERRORES).tokenize()).parse_with_recovery()
+    assert any("ErrorNode(message=" in linea for linea in iter_text(con_errores, indent="\t"))
+
+
+def test_json_completo():
+    """iter_json() genera JSON válido con todos los campos y tramos de cada nodo"""
+    buffer = Lexer(programa_grande(50), engine="regex").tokenize_buffer()
+    con_errores, _ = Parser(Lexer(CON_ERRORES).tokenize(), spans=True).parse_with_recovery()
+    for programa in (Parser(buffer, spans=True).parse(), con_errores):
+        datos = json.loads("".join(iter_json(programa)))
+        assert datos["type"] == "Program" and isinstance(datos["top_declarations"], list)
+        copia = desde_json(datos)
+        assert copia == programa and tramos(copia) == tramos(programa)
+
+    # Los esquemas y los árboles compartidos se exportan igual que el árbol normal
+    esperado = Parser(buffer).parse()
+    for programa in (Parser(buffer).parse_outline(), Parser(buffer, nodes=NodeTable()).parse()):
+        assert "".join(iter_text(programa)) == "".join(iter_text(esperado))
+        assert desde_json(json.loads("".join(iter_json(programa)))) == esperado
+
+
+def test_sin_recursion_y_por_trozos():
+    """Un árbol muy profundo se exporta sin recursión, con líneas acotadas, y chunked() entrega trozos acotados"""
+    profundo = NumLiteral("1")
+    for _ in range(100_000):
+        profundo = UnaryOp("-", profundo)
+    # Se cuentan las líneas a medida que se generan, sin guardarlas
+    lineas = 0
+    mas_larga = 0
+    for linea in iter_text(profundo):
+        lineas += 1
+        mas_larga = max(mas_larga, len(linea))
+        ultima = linea
+    assert lineas == 100_001 and mas_larga < 2 * MAX_INDENT + 50
+    assert ultima == "  " * MAX_INDENT + "[100000] operand: NumLiteral(value='1')\n"
+    llaves = 0
+    for fragmento in iter_json(profundo):
+        llaves += fragmento.count("{")
+    assert llaves == 100_001 and fragmento == "}"
+
+    programa = Parser(Lexer(programa_grande(500), engine="regex").tokenize_buffer()).parse()
+    trozos = list(chunked(iter_text(programa)))
+    assert len(trozos) > 1 and all(CHUNK_SIZE <= len(t) < CHUNK_SIZE + 200 for t in trozos[:-1])
+    assert "".join(trozos) == "".join(iter_text(programa))
+
+
+if __name__ == "__main__":
+    test_texto_jerarquico()
+    test_json_completo()
+    test_sin_recursion_y_por_trozos()
+    print("Todas las pruebas de exportación pasaron")
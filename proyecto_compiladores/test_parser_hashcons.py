@@ -0,0 +1,99 @@
+import pickle
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from lexer import Lexer
+from parser import (Parser, IterativeParser, ParallelParser, NodeTable, SharedNode, NodeVisitor, Arena,
+                    walk)
+from parser.ast_nodes import BinaryOp, Identifier, NumLiteral, SimpleType
+from parser.serialize import dumps, loads
+from ejemplos import PROGRAMA, programa_grande, CON_ERRORES
+
+
+def buffer(fuente):
+    return Lexer(fuente, engine="regex").tokenize_buffer()
+
+
+def test_subarboles_compartidos():
+    """Con una NodeTable cada estructura repetida existe una sola vez y el árbol es igual al normal"""
+    tokens = buffer(programa_grande(50))
+    esperado = Parser(tokens).parse()
+    tabla = NodeTable()
+    programa = Parser(tokens, nodes=tabla).parse()
+    assert programa == esperado and esperado == programa
+
+    nodos = list(walk(programa))
+    assert all(isinstance(n, SharedNode) and n in tabla for n in nodos)
+    assert len({id(n) for n in nodos}) == len(tabla) < len(nodos) / 2 and tabla.reused > 0
+    enteros = [n for n in nodos if n == SimpleType("int")]
+    assert len(enteros) > 50 and all(n is enteros[0] for n in enteros)
+
+    # Con la misma tabla, otro análisis (con cualquier parser) entrega los mismos objetos
+    for clase, opciones in ((Parser, {}), (IterativeParser, {}), (ParallelParser, {"workers": 2})):
+        assert clase(buffer(programa_grande(50)), nodes=tabla, **opciones).parse() is programa
+    assert Parser(Lexer(programa_grande(50)).iter_tokens(), nodes=tabla).parse() is programa
+
+    # También con recuperación de errores y con declaraciones entregadas una a una
+    con_errores, errores = Parser(Lexer(CON_ERRORES).tokenize()).parse_with_recovery()
+    compartido, errores_compartido = Parser(Lexer(CON_ERRORES).tokenize(), nodes=tabla).parse_with_recovery()
+    assert compartido == con_errores and [str(e) for e in errores_compartido] == [str(e) for e in errores]
+    normal = Parser(Lexer(PROGRAMA).tokenize()).parse()
+    declaraciones = list(Parser(Lexer(PROGRAMA).tokenize(), nodes=tabla).iter_top_decls())
+    assert declaraciones == [normal.module_decl, *normal.imports, *normal.top_declarations]
+    assert all(d in tabla for d in declaraciones)
+
+
+def test_inmutables_con_hash_estructural():
+    """Los nodos compartidos no se modifican, sirven de clave y se comparan en O(1)"""
+    tabla = NodeTable()
+    suma = tabla.intern(BinaryOp("+", Identifier("a", 0), NumLiteral("1")))
+    with pytest.raises(FrozenInstanceError):
+        suma.operator = "-"
+    with pytest.raises(FrozenInstanceError):
+        del suma.left
+    programa = Parser(buffer(PROGRAMA), nodes=tabla).parse()
+    assert isinstance(programa.top_declarations, tuple) and (programa.start, programa.end) == (-1, -1)
+
+    # Misma estructura: mismo objeto en la tabla; igual y con el mismo hash en otra tabla
+    assert tabla.intern(BinaryOp("+", Identifier("a", 0), NumLiteral("1"))) is suma
+    otra = NodeTable().intern(BinaryOp("+", Identifier("a", 0), NumLiteral("1")))
+    assert otra is not suma and otra == suma and hash(otra) == hash(suma)
+    assert suma != tabla.intern(BinaryOp("+", Identifier("a", 0), NumLiteral("2")))
+    assert suma == BinaryOp("+", Identifier("a", 0), NumLiteral("1")) != tabla.intern(NumLiteral("1"))
+
+    # Claves de memorización: el resultado de un subárbol se reutiliza en todas sus apariciones
+    memoria = {}
+    for nodo in walk(Parser(buffer(programa_grande(20)), nodes=tabla).parse()):
+        memoria[nodo] = memoria.get(nodo, 0) + 1
+    assert memoria[tabla.intern(SimpleType("int"))] > 20
+
+
+def test_compatible_con_el_resto_del_parser():
+    """Visitantes, Arena, el formato binario y pickle aceptan árboles compartidos"""
+    tokens = buffer(programa_grande(20))
+    esperado = Parser(tokens).parse()
+    programa = Parser(tokens, nodes=NodeTable()).parse()
+
+    class Contar(NodeVisitor):
+        def __init__(self):
+            self.identificadores = 0
+
+        def visit_Identifier(self, node):
+            self.identificadores += 1
+
+    contar, contar_esperado = Contar(), Contar()
+    contar.visit(programa)
+    contar_esperado.visit(esperado)
+    assert contar.identificadores == contar_esperado.identificadores > 0
+    assert Arena.from_program(programa).to_node() == esperado
+    assert loads(dumps(programa)) == esperado
+    copia = pickle.loads(pickle.dumps(programa))
+    assert copia == esperado and not isinstance(copia, SharedNode)
+
+
+if __name__ == "__main__":
+    test_subarboles_compartidos()
+    test_inmutables_con_hash_estructural()
+    test_compatible_con_el_resto_del_parser()
+    print("Todas las pruebas de hash-consing pasaron")
@@ -0,0 +1,78 @@
+import random
+
+from lexer import Lexer, TokenType
+from parser import Parser, IterativeParser, IncrementalParse
+from ejemplos import programa_grande, CON_ERRORES, FRAGMENTOS_EDICION, tramos
+
+
+def analizar(fuente):
+    """Tokens, Program y errores (como texto) de analizar todo el código fuente, recuperándose de todo error"""
+    buffer = Lexer(fuente, engine="regex", recover=True).tokenize_buffer()
+    programa, errores = Parser(buffer, spans=True).parse_with_recovery()
+    return buffer, programa, [str(e) for e in errores]
+
+
+def test_ediciones_aleatorias_igual_a_analisis_completo():
+    """Cada edición incremental produce el mismo Program, tramos y errores que analizar todo, aun a medio escribir"""
+    rng = random.Random(2026)
+    for clase in (Parser, IterativeParser):
+        fuente = programa_grande(8) + CON_ERRORES.replace("module M;\n", "")
+        incremental = IncrementalParse(Lexer(fuente, engine="regex").tokenize_buffer(), clase)
+        lexicos = 0
+        for _ in range(400):
+            inicio = rng.randint(0, len(fuente))
+            borrados = min(rng.choice([0, 0, 1, 3, 10]), len(fuente) - inicio)
+            insertado = "".join(rng.choice(FRAGMENTOS_EDICION) for _ in range(rng.choice([0, 1, 1, 2])))
+            nueva = fuente[:inicio] + insertado + fuente[inicio + borrados:]
+            buffer, programa, errores = analizar(nueva)
+            incremental.edit(inicio, borrados, insertado)
+            assert incremental.program == programa, repr(nueva)
+            assert tramos(incremental.program) == tramos(programa), repr(nueva)
+            assert [str(e) for e in incremental.errors] == errores, repr(nueva)
+            assert incremental.buffer.line_index.line_starts == buffer.line_index.line_starts
+            fuente = nueva
+            lexicos += TokenType.ERROR.value in buffer.kinds
+        assert lexicos > 50
+
+
+def test_reutiliza_las_declaraciones_no_editadas():
+    """Editar el cuerpo de una función sólo crea un FunDecl nuevo; el resto son los mismos objetos"""
+    fuente = programa_grande(200)
+    incremental = IncrementalParse(Lexer(fuente, engine="regex").tokenize_buffer())
+    anteriores = list(incremental.program.top_declarations)
+    posicion = fuente.index("fn f100(")
+    inicio = fuente.index("return", posicion)
+
+    incremental.edit(inicio, 0, "b = b + 1; ")
+    programa = incremental.program
+    nuevas = [i for i, (antes, ahora) in enumerate(zip(anteriores, programa.top_declarations)) if antes is not ahora]
+    assert len(programa.top_declarations) == len(anteriores) and len(nuevas) == 1
+    assert programa.top_declarations[nuevas[0]].name == "f100"
+    assert programa == Parser(Lexer(incremental.buffer.source).tokenize()).parse()
+
+    # Los tramos de las declaraciones posteriores se desplazan con la edición
+    fin = incremental.buffer.source
+    assert fin[incremental.span_starts[-1]:incremental.span_ends[-1]].startswith("fn f199(")
+    assert fin[incremental.span_ends[-1] - 1] == "}"
+
+
+def test_string_a_medio_escribir():
+    """Escribir una comilla deja un token ERROR y un ErrorNode; cerrarla o borrarla quita el error"""
+    fuente = programa_grande(20)
+    incremental = IncrementalParse(Lexer(fuente, engine="regex").tokenize_buffer())
+    esperado = incremental.program
+    posicion = fuente.index("return", fuente.index("fn f10("))
+    incremental.edit(posicion, 0, '"')
+    assert incremental.program == analizar(incremental.buffer.source)[1]
+    assert TokenType.ERROR.value in incremental.buffer.kinds and len(incremental.errors) == 1
+    incremental.edit(posicion + 1, 0, 'x"; ')
+    assert incremental.program == analizar(incremental.buffer.source)[1] and incremental.errors == []
+    incremental.edit(posicion, 5, '')
+    assert incremental.program == esperado and incremental.errors == []
+
+
+if __name__ == "__main__":
+    test_ediciones_aleatorias_igual_a_analisis_completo()
+    test_reutiliza_las_declaraciones_no_editadas()
+    test_string_a_medio_escribir()
+    print("Análisis incremental correcto")
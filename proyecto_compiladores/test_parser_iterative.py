@@ -0,0 +1,122 @@
+import random
+import sys
+
+from lexer import Lexer
+from parser import Parser, IterativeParser, ParserError
+from parser.ast_nodes import ArrayType, Assignment, Block, IfStmt, ParenExpr, SimpleType, UnaryOp, WhileStmt
+from ejemplos import (PROGRAMA, programa_grande, CON_ERRORES, OPERANDOS, BINARIOS, PREFIJOS, expresion_aleatoria,
+                      programa)
+
+
+PROFUNDIDAD = 100_000
+
+
+def analizar(clase, fuente):
+    """AST o error (mensaje, línea, columna) del parser indicado"""
+    try:
+        return clase(Lexer(fuente, engine="regex").tokenize()).parse()
+    except ParserError as e:
+        return (e.message, e.token.line, e.token.column)
+
+
+def cuerpo(fuente):
+    """Sentencias de la primera función del programa, analizado con el parser iterativo"""
+    return IterativeParser(Lexer(fuente, engine="regex").tokenize()).parse().top_declarations[0].body.statements
+
+
+def test_igual_al_parser_recursivo():
+    """Mismos árboles y mismos errores que el parser recursivo"""
+    for fuente in (PROGRAMA, programa_grande(100)):
+        assert analizar(IterativeParser, fuente) == analizar(Parser, fuente)
+
+    rng = random.Random(11)
+    for _ in range(300):
+        fuente = programa(expresion_aleatoria(rng, rng.randint(1, 8)) for _ in range(3))
+        assert analizar(IterativeParser, fuente) == analizar(Parser, fuente), fuente
+
+    piezas = OPERANDOS + BINARIOS + PREFIJOS + ['(', ')', ',', '[', ']', '.', 'x']
+    sentencias = ['if (a) ', 'else ', 'while (b) ', '{ ', '} ', 'x = 1; ', 'return; ', 'let v: (int)[] = 2; ']
+    for _ in range(600):
+        expresion = " ".join(rng.choice(piezas) for _ in range(rng.randint(1, 7)))
+        bloque = "".join(rng.choice(sentencias) for _ in range(rng.randint(1, 8)))
+        for fuente in (programa([expresion]), f"module M;\nfn f() {{ {bloque} }}"):
+            assert analizar(IterativeParser, fuente) == analizar(Parser, fuente), fuente
+
+
+def recuperar(clase, fuente):
+    """Programa parcial y errores (como texto) de parse_with_recovery()"""
+    programa, errores = clase(Lexer(fuente, engine="regex").tokenize()).parse_with_recovery()
+    return programa, [str(e) for e in errores]
+
+
+def test_recuperacion_igual_al_parser_recursivo():
+    """Con recuperación, los errores dentro de bloques se sincronizan igual que en Parser"""
+    assert recuperar(IterativeParser, CON_ERRORES) == recuperar(Parser, CON_ERRORES)
+    rng = random.Random(5)
+    piezas = ['if (a) ', 'else ', 'while (b) ', '{ ', '} ', 'x = 1; ', 'return; ', 'let v: int = 2; ',
+              'x = ;', '(', 'fn g() ', 'struct ', ';', 'y', '+']
+    for _ in range(1000):
+        bloque = "".join(rng.choice(piezas) for _ in range(rng.randint(1, 12)))
+        fuente = f"module M;\nfn f() {{ {bloque} }}\nconst K: int = 1;"
+        assert recuperar(IterativeParser, fuente) == recuperar(Parser, fuente), fuente
+
+
+def test_parentesis_anidados():
+    """100 000 paréntesis anidados sin tocar el límite de recursión"""
+    limite = sys.getrecursionlimit()
+    fuente = "module M;\nfn f() { return " + "(" * PROFUNDIDAD + "1" + ")" * PROFUNDIDAD + "; }"
+    expresion = cuerpo(fuente)[0].value
+    for _ in range(PROFUNDIDAD):
+        assert isinstance(expresion, ParenExpr)
+        expresion = expresion.expression
+    assert expresion.value == "1"
+    assert sys.getrecursionlimit() == limite
+
+
+def test_cadena_else_if():
+    """Una cadena de 100 000 'if ... else if ...'"""
+    fuente = "module M;\nfn f() {\n" + "if (x) { y = 1; } else " * PROFUNDIDAD + "{ y = 2; }\n}"
+    sentencia = cuerpo(fuente)[0]
+    for _ in range(PROFUNDIDAD):
+        assert isinstance(sentencia, IfStmt) and len(sentencia.then_stmt.statements) == 1
+        sentencia = sentencia.else_stmt
+    assert isinstance(sentencia, Block)
+
+
+def test_otros_anidamientos():
+    """Bloques, while, prefijos, asignaciones y tipos anidados a gran profundidad"""
+    n = PROFUNDIDAD // 10
+    bloques, ciclos, prefijos, asignaciones = cuerpo(
+        "module M;\nfn f() {\n"
+        + "{" * n + "}" * n + "\n"
+        + "while (x) " * n + "x = 1;\n"
+        + "-!" * n + "x;\n"
+        + "a = " * n + "b;\n"
+        + "}"
+    )
+    prefijos, asignaciones = prefijos.expression, asignaciones.expression
+    for _ in range(n - 1):
+        bloques = bloques.statements[0]
+        ciclos = ciclos.body
+        prefijos = prefijos.operand.operand
+        asignaciones = asignaciones.value
+    assert isinstance(bloques, Block) and bloques.statements == []
+    assert isinstance(ciclos, WhileStmt)
+    assert isinstance(prefijos, UnaryOp) and prefijos.operand.operand.name == "x"
+    assert isinstance(asignaciones, Assignment) and asignaciones.value.name == "b"
+
+    fuente = "module M;\nlet v: " + "(" * n + "int" + ")[]" * n + ";"
+    tipo = IterativeParser(Lexer(fuente, engine="regex").tokenize()).parse().top_declarations[0].var_type
+    for _ in range(n):
+        assert isinstance(tipo, ArrayType)
+        tipo = tipo.element_type
+    assert isinstance(tipo, SimpleType)
+
+
+if __name__ == "__main__":
+    test_igual_al_parser_recursivo()
+    test_recuperacion_igual_al_parser_recursivo()
+    test_parentesis_anidados()
+    test_cadena_else_if()
+    test_otros_anidamientos()
+    print("Parser iterativo correcto")
@@ -0,0 +1,66 @@
+from lexer import Lexer
+from parser import Parser, IterativeParser, ParserError, Block, LazyBlock
+from parser.ast_nodes import FunDecl
+from ejemplos import PROGRAMA, programa_grande
+
+
+def tokens_de(fuente, columnar):
+    lexer = Lexer(fuente, engine="regex")
+    return lexer.tokenize_buffer() if columnar else lexer.tokenize()
+
+
+def test_esquema_igual_al_analisis_completo():
+    """Las firmas coinciden y cada cuerpo, al consultarse, es el Block del análisis completo"""
+    for clase in (Parser, IterativeParser):
+        for columnar in (False, True):
+            fuente = programa_grande(30)
+            esquema = clase(tokens_de(fuente, columnar)).parse_outline()
+            funciones = [d for d in esquema.top_declarations if isinstance(d, FunDecl)]
+            assert all(isinstance(f.body, LazyBlock) and not f.body.parsed for f in funciones)
+            assert esquema == clase(tokens_de(fuente, columnar)).parse()
+            assert all(f.body.parsed for f in funciones)
+
+
+def test_cuerpo_analizado_al_consultarlo():
+    """Sólo se analiza el cuerpo consultado; un error dentro de él aparece al consultarlo"""
+    fuente = "module M;\nfn f() { return 1; }\nfn g(a: int) -> int { if (a) { a = ; } }\nconst K: int = 2;"
+    esquema = Parser(Lexer(fuente).tokenize()).parse_outline()
+    f, g, _ = esquema.top_declarations
+    assert (g.name, [p.name for p in g.parameters], repr(g.body)) == ("g", ["a"], "Block(sin analizar)")
+    assert isinstance(f.body.statements[0].value.value, str) and f.body.parsed and not g.body.parsed
+    try:
+        g.body.statements
+    except ParserError as e:
+        assert (e.message, e.token.line, e.token.column) == (
+            "Se esperaba una expresión primaria (ID, número, string, true, false, o '(')", 3, 36)
+    else:
+        raise AssertionError("Se esperaba ParserError")
+
+    # Asignar las sentencias reemplaza el análisis pendiente
+    g.body.statements = []
+    assert g.body == Block([]) and repr(g.body) == "Block(0 statements)"
+
+
+def test_cuerpo_sin_cerrar_y_streaming():
+    """Un cuerpo sin '}' se analiza completo para reportar el error; un flujo de tokens no admite esquema"""
+    fuente = "module M;\nfn f() { x = 1;\n"
+    for columnar in (False, True):
+        try:
+            Parser(tokens_de(fuente, columnar)).parse_outline()
+        except ParserError as e:
+            assert e.message == "Se esperaba RBRACE"
+        else:
+            raise AssertionError("Se esperaba ParserError")
+    try:
+        Parser(Lexer(PROGRAMA).iter_tokens()).parse_outline()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Se esperaba ValueError")
+
+
+if __name__ == "__main__":
+    test_esquema_igual_al_analisis_completo()
+    test_cuerpo_analizado_al_consultarlo()
+    test_cuerpo_sin_cerrar_y_streaming()
+    print("Análisis de esquema correcto")
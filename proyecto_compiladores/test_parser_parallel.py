@@ -0,0 +1,96 @@
+import gc
+import multiprocessing
+import os
+import tempfile
+
+from lexer import Lexer
+from parser import Parser, ParallelParser, ParserError
+from ejemplos import programa_grande, CON_ERRORES
+
+
+def buffer(fuente):
+    return Lexer(fuente, engine="regex").tokenize_buffer()
+
+
+def resultado(clase, fuente, recuperar, **opciones):
+    """Program (y errores como texto) con los nombres de la tabla de símbolos, o el error de parse()"""
+    tokens = buffer(fuente)
+    parser = clase(tokens, **opciones)
+    try:
+        if recuperar:
+            programa, errores = parser.parse_with_recovery()
+            salida = programa, [str(e) for e in errores]
+        else:
+            salida = parser.parse()
+    except ParserError as e:
+        # Un análisis interrumpido no llega a registrar los identificadores siguientes
+        return str(e)
+    return salida, tokens.symbols.names
+
+
+def test_igual_al_parser_secuencial():
+    """El Program reensamblado y los ids de los identificadores son los del análisis en secuencia"""
+    fuente = programa_grande(300)
+    for recuperar in (False, True):
+        esperado = resultado(Parser, fuente, recuperar)
+        assert resultado(ParallelParser, fuente, recuperar, workers=3) == esperado
+    parser = ParallelParser(buffer(fuente), workers=3, chunks_per_worker=2)
+    parser.parse_module_decl()
+    parser.parse_import_list()
+    bloques = parser.split_top_decls(parser.pos)
+    assert len(bloques) == 6 and bloques[-1][1] == len(parser.tokens) - 1
+    assert all(fin == inicio for (_, fin), (inicio, _) in zip(bloques, bloques[1:]))
+
+
+def test_errores_en_cualquier_bloque():
+    """Con errores, el resultado y las posiciones de los errores coinciden con el análisis en secuencia"""
+    base = programa_grande(200)
+    fuentes = [
+        base.replace("fn f10(", "fn f10() { x = ; }\nfn g10("),
+        base.replace("fn f100(", "const K: int = 3\nfn f100("),
+        base.replace("fn f150(", "} fn f150("),
+        base.replace("return b + f199(a - 1); }", "return b + f199(a - 1);"),
+        base + CON_ERRORES.replace("module M;", ""),
+    ]
+    for fuente in fuentes:
+        for recuperar in (False, True):
+            esperado = resultado(Parser, fuente, recuperar)
+            assert resultado(ParallelParser, fuente, recuperar, workers=2) == esperado
+
+
+def test_programas_pequenos_y_entradas_invalidas():
+    """Sin declaraciones suficientes se analiza en secuencia; sólo se acepta un TokenBuffer"""
+    for fuente in ("module M;", "module M;\nfn f() { }", "module M;\nimport A;\n"):
+        assert ParallelParser(buffer(fuente), workers=4).parse() == Parser(buffer(fuente)).parse()
+    try:
+        ParallelParser(Lexer("module M;").tokenize())
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Se esperaba ValueError")
+
+
+def test_archivo_mapeado_con_spawn():
+    """Los trabajadores no reciben el buffer (un mmap no se serializa) y el recolector sigue activo entre entregas"""
+    fuente = programa_grande(100) + "fn ñandú() { return \"día\"; }\n"
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "programa.txt")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(fuente)
+        spawn = multiprocessing.get_context("spawn")
+        with Lexer.from_path(ruta) as lexer:
+            activo = []
+            for _ in ParallelParser(lexer.tokenize_buffer(), workers=2, mp_context=spawn).iter_top_decls():
+                activo.append(gc.isenabled())
+            assert len(activo) > 100 and all(activo)
+        with Lexer.from_path(ruta) as lexer:
+            tokens = lexer.tokenize_buffer()
+            assert ParallelParser(tokens, workers=2, mp_context=spawn).parse() == Parser(buffer(fuente)).parse()
+
+
+if __name__ == "__main__":
+    test_igual_al_parser_secuencial()
+    test_errores_en_cualquier_bloque()
+    test_programas_pequenos_y_entradas_invalidas()
+    test_archivo_mapeado_con_spawn()
+    print("Parser paralelo correcto")
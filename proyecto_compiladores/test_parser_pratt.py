@@ -0,0 +1,49 @@
+import random
+
+from lexer import Lexer
+from parser import Parser, ParserError
+from parser.ast_nodes import Assignment, BinaryOp, UnaryOp
+from ejemplos import PROGRAMA, ParserCascada, OPERANDOS, BINARIOS, PREFIJOS, expresion_aleatoria, programa
+
+
+def analizar(clase, fuente):
+    """AST o error (mensaje, línea, columna) del parser indicado"""
+    try:
+        return clase(Lexer(fuente, engine="regex").tokenize()).parse()
+    except ParserError as e:
+        return (e.message, e.token.line, e.token.column)
+
+
+def test_mismo_arbol_que_la_cascada():
+    """Mismos BinaryOp/UnaryOp/Assignment, asociatividad y precedencia que la cascada original"""
+    rng = random.Random(9)
+    for _ in range(400):
+        fuente = programa(expresion_aleatoria(rng, rng.randint(1, 8)) for _ in range(3))
+        assert analizar(Parser, fuente) == analizar(ParserCascada, fuente), fuente
+    assert analizar(Parser, PROGRAMA) == analizar(ParserCascada, PROGRAMA)
+
+
+def test_mismos_errores_que_la_cascada():
+    """Expresiones mal formadas fallan con el mismo mensaje y en el mismo token"""
+    rng = random.Random(10)
+    piezas = OPERANDOS + BINARIOS + PREFIJOS + ['(', ')', ',', ']']
+    for _ in range(400):
+        expresion = " ".join(rng.choice(piezas) for _ in range(rng.randint(1, 7)))
+        fuente = programa([expresion])
+        assert analizar(Parser, fuente) == analizar(ParserCascada, fuente), fuente
+
+
+def test_asociatividad():
+    cuerpo = analizar(Parser, programa(["a = b = c", "a - b - c", "-a * b + c", "x || y && z == w"]))
+    asignacion, resta, suma, logica = (s.expression for s in cuerpo.top_declarations[0].body.statements)
+    assert isinstance(asignacion, Assignment) and isinstance(asignacion.value, Assignment)
+    assert isinstance(resta.left, BinaryOp) and resta.left.operator == "-"
+    assert isinstance(suma.left, BinaryOp) and isinstance(suma.left.left, UnaryOp)
+    assert logica.operator == "||" and logica.right.operator == "&&" and logica.right.right.operator == "=="
+
+
+if __name__ == "__main__":
+    test_mismo_arbol_que_la_cascada()
+    test_mismos_errores_que_la_cascada()
+    test_asociatividad()
+    print("Parser de expresiones por precedencia correcto")
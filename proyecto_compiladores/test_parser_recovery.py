@@ -0,0 +1,89 @@
+from lexer import Lexer
+from parser import Parser, ErrorNode
+from parser.ast_nodes import ConstDecl, FunDecl, ImportDecl
+from ejemplos import PROGRAMA, programa_grande, CON_ERRORES, errores_repetidos
+
+
+def recuperar(fuente):
+    return Parser(Lexer(fuente, engine="regex").tokenize()).parse_with_recovery()
+
+
+def test_sin_errores_igual_a_parse():
+    for fuente in (PROGRAMA, programa_grande(50)):
+        programa, errores = recuperar(fuente)
+        assert errores == []
+        assert programa == Parser(Lexer(fuente).tokenize()).parse()
+
+
+def test_todos_los_errores_en_una_pasada():
+    programa, errores = recuperar(CON_ERRORES)
+    assert [(e.message, e.token.line, e.token.column) for e in errores] == [
+        ("Se esperaba ID", 2, 15),
+        ("Se esperaba una expresión primaria (ID, número, string, true, false, o '(')", 4, 23),
+        ("Se esperaba RPAREN", 4, 38),
+        ("Se esperaba SEMICOLON", 4, 49),
+        ("Se esperaba RBRACE", 5, 19),
+        ("Se esperaba RBRACE", 8, 1),
+    ]
+    # El primer error corresponde a lo que parse() habría reportado
+    try:
+        Parser(Lexer(CON_ERRORES).tokenize()).parse()
+    except Exception as e:
+        assert str(e) == str(errores[0])
+
+    assert isinstance(programa.imports[0], ErrorNode) and isinstance(programa.imports[1], ImportDecl)
+    f, struct, const, h, k = programa.top_declarations
+    assert isinstance(f, FunDecl) and isinstance(f.body.statements[0], ErrorNode)
+    assert [type(s).__name__ for s in f.body.statements] == ["ErrorNode", "ExprStmt", "ErrorNode", "ErrorNode"]
+    assert isinstance(struct, ErrorNode) and isinstance(const, ConstDecl)
+    assert isinstance(h, ErrorNode) and isinstance(k, FunDecl)
+
+
+class ParserContado(Parser):
+    """Parser que cuenta los tokens consumidos, los retrocesos y las sincronizaciones"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.avances = self.retrocesos = self.sincronizaciones = self.descartados = 0
+    
+    def advance(self):
+        self.avances += 1
+        return super().advance()
+    
+    def seek(self, pos):
+        self.retrocesos += pos < self.pos
+        super().seek(pos)
+    
+    def synchronize(self, *args):
+        self.sincronizaciones += 1
+        inicio = self.pos
+        super().synchronize(*args)
+        self.descartados += self.pos - inicio
+
+
+def test_miles_de_errores_en_trabajo_lineal():
+    """Un archivo con miles de errores: se reportan todos, cada token se consume una sola vez y cada
+    error sincroniza una vez descartando los mismos tokens. El tiempo se mide en
+    bench_parser.bench_recuperacion()"""
+    for n in (1000, 4000):
+        tokens = Lexer(errores_repetidos(n), engine="regex").tokenize()
+        parser = ParserContado(tokens)
+        programa, errores = parser.parse_with_recovery()
+        assert len(errores) == 3 * n
+        assert len(programa.top_declarations) == 2 * n
+        # Todos los tokens menos EOF, sin volver atrás
+        assert (parser.avances, parser.retrocesos) == (len(tokens) - 1, 0)
+        assert parser.sincronizaciones == len(errores) and parser.descartados == 5 * n
+
+
+def test_recuperacion_en_streaming():
+    programa, errores = Parser(Lexer(CON_ERRORES).iter_tokens()).parse_with_recovery()
+    assert len(errores) == 6 and len(programa.top_declarations) == 5
+
+
+if __name__ == "__main__":
+    test_sin_errores_igual_a_parse()
+    test_todos_los_errores_en_una_pasada()
+    test_miles_de_errores_en_trabajo_lineal()
+    test_recuperacion_en_streaming()
+    print("Recuperación de errores sintácticos correcta")
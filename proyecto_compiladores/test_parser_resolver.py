@@ -0,0 +1,171 @@
+import pytest
+
+from lexer import Lexer
+from parser import Parser, IterativeParser, NodeTable, Resolver, walk
+from parser.ast_nodes import FunDecl, FunctionCall, Identifier, LetDecl, SimpleType
+from parser.serialize import dumps, loads
+from ejemplos import PROGRAMA, programa_grande, CON_ERRORES, declaraciones_globales
+
+
+AMBITOS = """
+module Demo;
+import Math.Avanzado as MA;
+
+fn doble(x: int) -> int { return siguiente(x) + x; }
+fn siguiente(x: int) -> int { return x + LIMITE; }
+
+const LIMITE: int = 10;
+type Lista = Punto[];
+struct Punto { x: int, y: int };
+let origen: Punto = crear();
+let externo: MA.Vector = origen;
+
+fn crear() -> Punto {
+    let x: int = 1;
+    {
+        let x: bool = x > 0;
+        x = !x;
+    }
+    let lista: Lista = x;
+    return origen;
+}
+"""
+
+
+def analizar(fuente, clase=Parser):
+    tokens = Lexer(fuente, engine="regex").tokenize()
+    programa = clase(tokens, spans=True).parse()
+    return programa, tokens, Resolver(tokens).resolve(programa)
+
+
+def usos(programa, clase, nombre):
+    """Usos del nombre en el programa, en preorden"""
+    campo = {Identifier: "name", FunctionCall: "function_name", SimpleType: "type_name"}[clase]
+    return [n for n in walk(programa) if isinstance(n, clase) and getattr(n, campo) == nombre]
+
+
+def test_enlaces_y_ambitos():
+    """Cada uso queda enlazado con su declaración según los ámbitos"""
+    programa, _, errores = analizar(AMBITOS)
+    assert errores == []
+    doble, siguiente, limite, lista, punto, origen, externo, crear = programa.top_declarations
+
+    # Las declaraciones globales se ven desde antes de su posición; los parámetros, sólo en su función
+    assert [u.binding.node for u in usos(programa, FunctionCall, "siguiente")] == [siguiente]
+    assert [u.binding.node for u in usos(programa, Identifier, "LIMITE")] == [limite]
+    assert [u.binding.node for u in usos(doble, Identifier, "x")] == [doble.parameters[0]] * 2
+    assert [u.binding.node for u in usos(programa, Identifier, "origen")] == [origen, origen]
+    assert usos(programa, FunctionCall, "crear")[0].binding.node is crear
+
+    # Un let se ve desde la sentencia siguiente y un bloque anidado lo oculta mientras está abierto
+    x_entero, bloque, x_lista, _ = crear.body.statements
+    x_booleano = bloque.statements[0]
+    inicial, asignado, negado, usado = usos(crear, Identifier, "x")
+    assert inicial.binding.node is x_entero
+    assert asignado.binding.node is negado.binding.node is x_booleano
+    assert usado.binding.node is x_entero and x_lista.initial_value is usado
+    assert asignado.binding.shadowed is inicial.binding and asignado.binding.depth == 2
+
+    # Los tipos se enlazan con su type o struct, y un QualID con el import de su primer nombre
+    assert [t.binding.node for t in usos(programa, SimpleType, "Punto")] == [punto] * 3
+    assert usos(programa, SimpleType, "Lista")[0].binding.node is lista
+    assert usos(programa, SimpleType, "MA.Vector")[0].binding.node is programa.imports[0]
+    assert all(t.binding is None for t in usos(programa, SimpleType, "int"))
+
+    # Los enlaces no cambian la igualdad; serializar un árbol da nodos sin anotar
+    copia, _, _ = analizar(AMBITOS, IterativeParser)
+    assert copia == programa
+    assert all(getattr(n, "binding", None) is None for n in walk(loads(dumps(programa))))
+
+
+def test_errores_en_una_pasada():
+    """Los nombres no declarados, duplicados o del tipo incorrecto se reportan todos, en orden"""
+    fuente = """
+module M;
+import A.B;
+import A.C;
+struct S { x: int, x: bool };
+fn f(a: int, a: int) -> T {
+    let b: int = c;
+    let b: S = S;
+    return g(b);
+}
+const f: int = 1;
+let v: S.X = 0;
+let w: f = 0;
+"""
+    programa, _, errores = analizar(fuente)
+    assert [(e.line, e.message) for e in errores] == [
+        (5, "El campo 'x' ya está declarado en 'S'"),
+        (6, "'a' ya está declarado en este ámbito"),
+        (6, "El tipo 'T' no está declarado"),
+        (7, "'c' no está declarado"),
+        (8, "'b' ya está declarado en este ámbito"),
+        (8, "'S' es un tipo, no un valor"),
+        (9, "La función 'g' no está declarada"),
+        (11, "'f' ya está declarado en este ámbito"),
+        (12, "'S' no es un módulo importado"),
+        (13, "'f' no es un tipo"),
+    ]
+    assert str(errores[0]) == "Error semántico en línea 5, columna 20: El campo 'x' ya está declarado en 'S'"
+
+    # Los imports de un mismo paquete comparten su nombre; el primer let sigue vigente
+    funcion = programa.top_declarations[1]
+    assert isinstance(funcion.body.statements[2].value.arguments[0].binding.node, LetDecl)
+    assert usos(programa, FunctionCall, "g")[0].binding is None
+
+    # Con recuperación de errores, los ErrorNode se ignoran; sin tokens no hay línea ni columna
+    con_errores, _ = Parser(Lexer(CON_ERRORES).tokenize()).parse_with_recovery()
+    assert all(e.line is None and str(e).startswith("Error semántico: ") for e in Resolver().resolve(con_errores))
+
+    # Los programas de las demás pruebas sólo usan funciones y arrays que no declaran
+    _, _, errores = analizar(programa_grande(20))
+    assert {e.message for e in errores} == {"La función 'raiz' no está declarada", "'lista' no está declarado"}
+    with pytest.raises(ValueError, match="compartido"):
+        Resolver().resolve(Parser(Lexer(PROGRAMA).tokenize(), nodes=NodeTable()).parse())
+
+
+class Consultas(dict):
+    """dict que cuenta las llamadas a get()"""
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.consultas = 0
+    
+    def get(self, *args):
+        self.consultas += 1
+        return super().get(*args)
+
+
+class ResolverContado(Resolver):
+    """Resolver que cuenta las búsquedas de nombres y los nodos que despacha"""
+    
+    def __init__(self, tokens=None):
+        super().__init__(tokens)
+        self.visible = Consultas()
+        self.node_dispatch = Consultas(self.node_dispatch)
+
+
+def test_trabajo_lineal_en_las_declaraciones():
+    """Cada nodo se despacha una vez y cada nombre se busca con una consulta a un dict, sin recorrer
+    la cadena de ámbitos: el trabajo por declaración no depende de cuántas hay.
+    El tiempo con 100k declaraciones se mide en bench_parser.bench_resolucion()"""
+    trabajo = []
+    for n in (1_000, 4_000):
+        programa = Parser(Lexer(declaraciones_globales(n), engine="regex").tokenize_buffer()).parse()
+        resolver = ResolverContado()
+        assert resolver.resolve(programa) == [] and len(programa.top_declarations) == 2 * n
+        assert resolver.node_dispatch.consultas <= sum(1 for _ in walk(programa))
+        trabajo.append((resolver.node_dispatch.consultas, resolver.visible.consultas))
+    assert trabajo[1] == (4 * trabajo[0][0] - 3, 4 * trabajo[0][1])
+
+    llamadas = [n for n in walk(programa) if isinstance(n, FunctionCall)]
+    assert all(isinstance(llamada.binding.node, FunDecl) for llamada in llamadas)
+    assert programa.top_declarations[-1].body.statements[-1].value.binding.node is programa.top_declarations[1]
+
+
+if __name__ == "__main__":
+    test_enlaces_y_ambitos()
+    test_errores_en_una_pasada()
+    test_trabajo_lineal_en_las_declaraciones()
+    print("Todas las pruebas de resolución de nombres pasaron")
@@ -0,0 +1,109 @@
+import io
+import pickle
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from lexer import Lexer
+from parser import Parser, ASTCache, walk, iter_fields
+from parser.ast_nodes import BoolLiteral, ErrorNode, Identifier, NumLiteral
+from parser.serialize import dumps, loads, dump, load, FORMAT_VERSION, HEADER
+from ejemplos import PROGRAMA, programa_grande, CON_ERRORES, tramos
+
+
+def simbolos(nodo):
+    """Ids de símbolo de los identificadores del árbol, en preorden"""
+    return [n.symbol for n in walk(nodo) if isinstance(n, Identifier)]
+
+
+def test_ida_y_vuelta():
+    """loads(dumps()) reconstruye el mismo árbol, con sus tramos e ids de símbolo"""
+    buffer = Lexer(programa_grande(50), engine="regex").tokenize_buffer()
+    programa_con_errores, _ = Parser(Lexer(CON_ERRORES).tokenize(), spans=True).parse_with_recovery()
+    for programa in (Parser(Lexer(PROGRAMA).tokenize(), spans=True).parse(), Parser(buffer, spans=True).parse(),
+                     programa_con_errores):
+        copia = loads(dumps(programa))
+        assert copia == programa and repr(copia) == repr(programa)
+        assert tramos(copia) == tramos(programa) and simbolos(copia) == simbolos(programa)
+    assert any(isinstance(n, ErrorNode) for n in walk(copia))
+
+    # Los cuerpos de un esquema se guardan como Block ya analizados
+    assert loads(dumps(Parser(buffer).parse_outline())) == Parser(buffer).parse()
+
+    # Cualquier nodo sirve de raíz y los valores conservan su tipo (True y 1 son distintos)
+    for nodo in (BoolLiteral(True), NumLiteral(1), NumLiteral(-2.5, start=3, end=2), ErrorNode("ñandú", 7, 1)):
+        copia = loads(dumps(nodo))
+        assert copia == nodo and (copia.start, copia.end) == (nodo.start, nodo.end)
+        assert [type(v) for _, v in iter_fields(copia)] == [type(v) for _, v in iter_fields(nodo)]
+
+    archivo = io.BytesIO()
+    dump(programa, archivo)
+    archivo.seek(0)
+    assert load(archivo) == programa
+
+
+def test_datos_invalidos():
+    """Firma, versión o contenido inválidos producen ValueError"""
+    datos = dumps(Parser(Lexer(PROGRAMA).tokenize()).parse())
+    with pytest.raises(ValueError, match="no son un AST"):
+        loads(b"no es un AST")
+    otra_version = bytearray(datos)
+    otra_version[4] = FORMAT_VERSION + 1
+    with pytest.raises(ValueError, match="Versión de formato"):
+        loads(bytes(otra_version))
+    with pytest.raises(ValueError):
+        loads(datos[:-5])
+    # Sin las etiquetas de los hijos, los nodos no encuentran sus campos
+    _, _, constantes, texto, etiquetas, _ = HEADER.unpack_from(datos)
+    inicio = HEADER.size + constantes + texto
+    with pytest.raises(ValueError, match="corrupto"):
+        loads(datos[:inicio] + bytes(etiquetas) + datos[inicio + etiquetas:])
+
+
+def test_mas_pequeno_que_pickle():
+    """El formato binario ocupa una fracción de pickle y ambos reconstruyen el mismo árbol.
+    Los tiempos de escritura y lectura se comparan en bench_parser.bench_serializacion()"""
+    programa = Parser(Lexer(programa_grande(3000), engine="regex").tokenize_buffer(), spans=True).parse()
+    datos_pickle = pickle.dumps(programa, pickle.HIGHEST_PROTOCOL)
+    datos = dumps(programa)
+    assert len(datos) * 3 < len(datos_pickle)
+    for copia in (loads(datos), pickle.loads(datos_pickle)):
+        assert copia == programa and tramos(copia) == tramos(programa) and simbolos(copia) == simbolos(programa)
+
+
+def test_cache(tmp_path):
+    """La caché analiza cada código fuente una vez y después carga el AST del disco"""
+    fuente = programa_grande(20)
+    cache = ASTCache(tmp_path / "asts", spans=True)
+    primero = cache.parse(fuente)
+    assert (cache.hits, cache.misses) == (0, 1) and cache.path(fuente).exists()
+
+    # Otra instancia (u otro proceso) sobre el mismo directorio reutiliza el archivo
+    otra = ASTCache(tmp_path / "asts", spans=True)
+    segundo = otra.parse(fuente)
+    assert (otra.hits, otra.misses) == (1, 0)
+    assert segundo == primero and tramos(segundo) == tramos(primero) and simbolos(segundo) == simbolos(primero)
+    assert segundo == Parser(Lexer(fuente).tokenize()).parse()
+
+    # Otro código fuente es otra entrada; un archivo dañado se vuelve a generar
+    otra.parse(PROGRAMA)
+    assert otra.misses == 1 and len(list((tmp_path / "asts").glob("*.ast"))) == 2
+    cache.path(fuente).write_bytes(b"basura")
+    assert cache.parse(fuente) == primero and cache.misses == 2
+    assert loads(cache.path(fuente).read_bytes()) == primero
+    assert not list((tmp_path / "asts").glob("*.tmp"))
+
+    # Sin tramos es otro archivo: no se entrega un árbol con tramos a quien no los pidió ni al revés
+    sin_tramos = ASTCache(tmp_path / "asts")
+    assert sin_tramos.path(fuente) != cache.path(fuente)
+    assert {(inicio, fin) for _, inicio, fin in tramos(sin_tramos.parse(fuente))} == {(-1, -1)}
+
+
+if __name__ == "__main__":
+    test_ida_y_vuelta()
+    test_datos_invalidos()
+    test_mas_pequeno_que_pickle()
+    with tempfile.TemporaryDirectory() as directorio:
+        test_cache(Path(directorio))
+    print("Todas las pruebas de serialización pasaron")
@@ -0,0 +1,95 @@
+import random
+
+from lexer import Lexer
+from parser import Parser, IterativeParser, ParallelParser, IncrementalParse, iter_child_nodes
+from ejemplos import PROGRAMA, programa_grande, CON_ERRORES, FRAGMENTOS_EDICION, tramos
+
+
+def test_tramos_anidados_y_texto():
+    """Cada tramo está dentro del de su padre y cubre exactamente el texto de la construcción"""
+    tokens = Lexer(PROGRAMA).tokenize()
+    programa = Parser(tokens, spans=True).parse()
+
+    def revisar(nodo, inicio, fin):
+        assert inicio <= nodo.start < nodo.end <= fin, nodo
+        for hijo in iter_child_nodes(nodo):
+            revisar(hijo, nodo.start, nodo.end)
+
+    revisar(programa, 0, len(tokens))
+    assert (programa.start, programa.end) == (0, len(tokens) - 1)
+
+    def texto(nodo):
+        return " ".join(t.value for t in tokens[nodo.start:nodo.end])
+
+    tipo_matriz = programa.top_declarations[1].type_expr
+    distancia = programa.top_declarations[-1]
+    condicion = distancia.body.statements[2].condition
+    retorno = distancia.body.statements[-1]
+    assert texto(programa.imports[0]) == "import Math . Avanzado as MA ;"
+    assert texto(tipo_matriz) == "Vector ) [ ]" and texto(tipo_matriz.element_type) == "Vector"
+    assert texto(condicion.right) == "! ( dx == dy )"
+    assert texto(retorno.value) == "raiz ( lista [ 0 ] , - dx )"
+    assert texto(retorno.value.arguments[0].array) == "lista"
+    assert tokens[distancia.start].value == "fn" and tokens[distancia.end - 1].value == "}"
+
+
+def test_mismos_tramos_en_todos_los_parsers():
+    """Parser, IterativeParser, ParallelParser, el modo streaming y el esquema producen los mismos tramos"""
+    fuente = programa_grande(60)
+    esperado = tramos(Parser(Lexer(fuente).tokenize(), spans=True).parse())
+    assert tramos(IterativeParser(Lexer(fuente).tokenize(), spans=True).parse()) == esperado
+    assert tramos(Parser(Lexer(fuente).iter_tokens(), spans=True).parse()) == esperado
+    buffer = Lexer(fuente, engine="regex").tokenize_buffer()
+    assert tramos(ParallelParser(buffer, workers=2, spans=True).parse()) == esperado
+    esquema = Parser(buffer, spans=True).parse_outline()
+    for decl in esquema.top_declarations:
+        getattr(decl, "body", None) and decl.body.statements
+    assert [(clase.replace("LazyBlock", "Block"), inicio, fin) for clase, inicio, fin in tramos(esquema)] == esperado
+
+    # Con recuperación, cada ErrorNode cubre los tokens descartados
+    for clase in (Parser, IterativeParser):
+        tokens = Lexer(CON_ERRORES).tokenize()
+        programa, _ = clase(tokens, spans=True).parse_with_recovery()
+        assert tramos(programa) == tramos(Parser(tokens, spans=True).parse_with_recovery()[0])
+    errores = [(inicio, fin) for clase, inicio, fin in tramos(programa) if clase == "ErrorNode"]
+    assert [" ".join(t.value for t in tokens[inicio:fin]) for inicio, fin in errores] == [
+        "import A . B as ;", "let x : int = ;", "y = ( 2 ;", "return x", "struct S { a : int b : int } ;",
+        "fn h ( ) { { x = 1 ;",
+    ]
+
+
+def test_sin_tramos_por_omision():
+    """Sin spans=True los nodos quedan con -1, también en modo esquema, y el árbol es el mismo"""
+    tokens = Lexer(PROGRAMA).tokenize()
+    con_tramos = Parser(tokens, spans=True).parse()
+    for programa in (Parser(tokens).parse(), IterativeParser(tokens).parse(), Parser(tokens).parse_outline()):
+        assert programa == con_tramos
+        assert {(inicio, fin) for _, inicio, fin in tramos(programa)} == {(-1, -1)}
+
+
+def test_tramos_tras_ediciones_incrementales():
+    """Tras aplicar los desplazamientos pendientes, los tramos son los de analizar todo de nuevo"""
+    rng = random.Random(18)
+    fuente = programa_grande(20)
+    incremental = IncrementalParse(Lexer(fuente, engine="regex").tokenize_buffer())
+    for _ in range(150):
+        inicio = rng.randint(len(PROGRAMA), len(fuente))
+        insertado = rng.choice(FRAGMENTOS_EDICION)
+        borrados = min(rng.choice([0, 1, 4]), len(fuente) - inicio)
+        fuente = fuente[:inicio] + insertado + fuente[inicio + borrados:]
+        incremental.edit(inicio, borrados, insertado)
+        if rng.random() < 0.3:
+            indice = rng.randrange(len(incremental.declarations))
+            esperado = Parser(incremental.buffer, spans=True).parse_with_recovery()[0].top_declarations[indice]
+            assert tramos(incremental.declaration(indice)) == tramos(esperado)
+    esperado = Parser(incremental.buffer, spans=True).parse_with_recovery()[0]
+    assert tramos(incremental.update_spans()) == tramos(esperado)
+    assert not any(incremental.token_shifts)
+
+
+if __name__ == "__main__":
+    test_tramos_anidados_y_texto()
+    test_mismos_tramos_en_todos_los_parsers()
+    test_sin_tramos_por_omision()
+    test_tramos_tras_ediciones_incrementales()
+    print("Tramos de los nodos correctos")
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import tracemalloc
+
+from lexer import Lexer
+from parser import Parser, ParserError, TokenLookahead, ErrorNode
+from ejemplos import programa_grande
+
+
+def test_streaming_igual_a_lista():
+    """El parser sobre Lexer.iter_tokens() produce el mismo AST que sobre la lista de tokens"""
+    fuente = programa_grande(200)
+    for engine in Lexer.ENGINES:
+        esperado = Parser(Lexer(fuente, engine=engine).tokenize()).parse()
+        assert Parser(Lexer(fuente, engine=engine).iter_tokens()).parse() == esperado
+
+
+def test_lexer_y_parser_intercalados():
+    """Nunca hay más tokens leídos por adelantado que el tamaño de la ventana"""
+    fuente = programa_grande(50)
+    leidos = 0
+    maximo_adelanto = 0
+    parser = None
+
+    def contar(tokens):
+        nonlocal leidos, maximo_adelanto
+        for token in tokens:
+            leidos += 1
+            maximo_adelanto = max(maximo_adelanto, leidos - (parser.pos if parser else 0))
+            yield token
+
+    parser = Parser(contar(Lexer(fuente).iter_tokens()), lookahead=2)
+    parser.parse()
+    assert leidos == len(Lexer(fuente).tokenize())
+    assert maximo_adelanto <= 2
+
+
+def test_error_sintactico_en_streaming():
+    fuente = "module M;\nfn f() { return 1 }"
+    for tokens in (Lexer(fuente).tokenize(), Lexer(fuente).iter_tokens()):
+        try:
+            Parser(tokens).parse()
+        except ParserError as e:
+            assert (e.token.value, e.token.line, e.token.column) == ("}", 2, 19)
+        else:
+            raise AssertionError("Se esperaba ParserError")
+
+
+def test_lookahead_peek():
+    ventana = TokenLookahead(Lexer("a b c").iter_tokens(), size=3)
+    assert ventana.current.value == "a"
+    assert ventana.peek(2).value == "c"
+    assert ventana.advance().value == "b"
+    assert ventana.peek(2).type.name == "EOF"
+    ventana.advance()
+    ventana.advance()
+    assert ventana.peek(1) is None
+    assert ventana.advance() is None
+    try:
+        ventana.peek(3)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Se esperaba ValueError")
+
+
+def test_iter_top_decls_igual_a_parse():
+    """iter_top_decls() entrega, en orden, el módulo, los imports y las declaraciones de parse()"""
+    fuente = programa_grande(20)
+    programa = Parser(Lexer(fuente).tokenize()).parse()
+    for tokens in (Lexer(fuente).tokenize(), Lexer(fuente, engine="regex").iter_tokens()):
+        assert list(Parser(tokens).iter_top_decls()) == [
+            programa.module_decl, *programa.imports, *programa.top_declarations
+        ]
+
+    # Las declaraciones previas al primer error se entregan antes de que se lance
+    declaraciones = Parser(Lexer("module M;\nconst A: int = 1;\nfn f() { x = ; }").iter_tokens()).iter_top_decls()
+    assert [type(d).__name__ for d in (next(declaraciones), next(declaraciones))] == ["ModuleDecl", "ConstDecl"]
+    try:
+        next(declaraciones)
+    except ParserError as e:
+        assert (e.token.line, e.token.column) == (3, 14)
+    else:
+        raise AssertionError("Se esperaba ParserError")
+
+
+def test_iter_top_decls_con_recuperacion():
+    """Con recover=True los errores se acumulan a medida que se entregan las declaraciones"""
+    fuente = "module M;\nimport A.;\nfn f() { x = ; }\nconst K: int = 3;"
+    parser = Parser(Lexer(fuente).iter_tokens())
+    declaraciones = parser.iter_top_decls(recover=True)
+    assert next(declaraciones).qualified_id.identifiers == ["M"] and parser.errors == []
+    assert isinstance(next(declaraciones), ErrorNode) and len(parser.errors) == 1
+    resto = list(declaraciones)
+    assert [type(d).__name__ for d in resto] == ["FunDecl", "ConstDecl"] and len(parser.errors) == 2
+    programa, errores = Parser(Lexer(fuente).tokenize()).parse_with_recovery()
+    assert [str(e) for e in parser.errors] == [str(e) for e in errores]
+
+
+def pico_de_memoria(funciones):
+    """Pico de memoria (bytes) de recorrer con iter_top_decls() un archivo mapeado en memoria"""
+    descriptor, ruta = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(descriptor, "w") as archivo:
+        archivo.write("module M;\nimport A.B;\n")
+        for i in range(funciones):
+            archivo.write(f"fn f{i % 50}(a: int) -> int {{ let b: int = a * {i}; return b + g(a - 1); }}\n")
+    try:
+        tracemalloc.start()
+        with Lexer.from_path(ruta) as lexer:
+            cantidad = sum(1 for _ in Parser(lexer.iter_tokens()).iter_top_decls())
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        os.unlink(ruta)
+    assert cantidad == funciones + 2
+    return pico
+
+
+def test_iter_top_decls_memoria_acotada():
+    """Sin retener las declaraciones, la memoria sólo crece con la tabla de inicios de línea (8 bytes por línea)"""
+    pequeno, grande = pico_de_memoria(1000), pico_de_memoria(8000)
+    assert grande - pequeno < 7000 * 8 * 2
+
+
+if __name__ == "__main__":
+    test_streaming_igual_a_lista()
+    test_lexer_y_parser_intercalados()
+    test_error_sintactico_en_streaming()
+    test_lookahead_peek()
+    test_iter_top_decls_igual_a_parse()
+    test_iter_top_decls_con_recuperacion()
+    test_iter_top_decls_memoria_acotada()
+    print("Parser en streaming correcto")
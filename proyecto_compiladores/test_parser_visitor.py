@@ -0,0 +1,134 @@
+from lexer import Lexer
+from parser import (Parser, IterativeParser, NodeVisitor, NodeTransformer, walk, iter_child_nodes,
+                    iter_fields, ASTNode)
+from parser.ast_nodes import (Block, ExprStmt, Identifier, LazyBlock, NumLiteral, ParenExpr, ReturnStmt,
+                              UnaryOp)
+from ejemplos import PROGRAMA, programa_grande, CON_ERRORES
+
+
+def preorden(nodo):
+    """Recorrido recursivo de referencia a partir de iter_fields()"""
+    salida = [nodo]
+    for _, valor in iter_fields(nodo):
+        for hijo in (valor if isinstance(valor, list) else [valor]):
+            if isinstance(hijo, ASTNode):
+                salida.extend(preorden(hijo))
+    return salida
+
+
+def analizar(fuente, clase=Parser):
+    return clase(Lexer(fuente, engine="regex").tokenize()).parse()
+
+
+class ContarIdentificadores(NodeVisitor):
+    def __init__(self):
+        self.nombres = []
+        self.bloques = 0
+
+    def visit_Identifier(self, node):
+        self.nombres.append(node.name)
+
+    def visit_Block(self, node):
+        self.bloques += 1
+        self.generic_visit(node)
+
+
+def test_walk_y_hijos():
+    """walk() recorre en preorden los mismos nodos que un recorrido recursivo por los campos"""
+    for programa in (analizar(PROGRAMA), analizar(programa_grande(20)),
+                     Parser(Lexer(CON_ERRORES).tokenize()).parse_with_recovery()[0]):
+        assert [id(n) for n in walk(programa)] == [id(n) for n in preorden(programa)]
+    funcion = analizar(PROGRAMA).top_declarations[-1]
+    assert [type(n).__name__ for n in iter_child_nodes(funcion)] == ["Param", "Param", "SimpleType", "Block"]
+    # Los cuerpos sin analizar se analizan al recorrerlos
+    esquema = Parser(Lexer(PROGRAMA).tokenize()).parse_outline()
+    assert len(list(walk(esquema))) == len(list(walk(analizar(PROGRAMA))))
+
+
+def test_despacho_cacheado():
+    """Cada método visit_ se busca una vez por clase de nodo y por clase de visitante"""
+    resoluciones = []
+
+    class Contador(ContarIdentificadores):
+        @classmethod
+        def resolve(cls, node_class):
+            resoluciones.append(node_class)
+            return super().resolve(node_class)
+
+    programa = analizar(programa_grande(30))
+    for _ in range(2):
+        visitante = Contador()
+        visitante.visit(programa)
+    clases = {type(n) for n in walk(programa)}
+    assert sorted(resoluciones, key=str) == sorted(clases, key=str) and set(Contador.dispatch) == clases
+    assert visitante.nombres == [n.name for n in walk(programa) if isinstance(n, Identifier)]
+    assert visitante.bloques == sum(isinstance(n, Block) for n in walk(programa))
+    assert Contador.dispatch[Identifier] is Contador.visit_Identifier
+    assert NodeVisitor.dispatch is not Contador.dispatch and Identifier not in NodeVisitor.dispatch
+
+    # visit_Block también atiende a los LazyBlock del modo esquema
+    visitante = ContarIdentificadores()
+    visitante.visit(Parser(Lexer(PROGRAMA).tokenize()).parse_outline())
+    assert visitante.bloques == 4
+    assert ContarIdentificadores.dispatch[LazyBlock] is ContarIdentificadores.visit_Block
+
+
+def test_transformador():
+    """Reemplaza, elimina y expande nodos, como ast.NodeTransformer"""
+
+    class Plegar(NodeTransformer):
+        def visit_BinaryOp(self, node):
+            self.generic_visit(node)
+            if isinstance(node.left, NumLiteral) and isinstance(node.right, NumLiteral) and node.operator == "+":
+                return NumLiteral(str(int(node.left.value) + int(node.right.value)), start=node.start, end=node.end)
+            return node
+
+        def visit_ExprStmt(self, node):
+            # Las sentencias 'x;' se eliminan y 'x = y;' se duplica
+            if isinstance(node.expression, Identifier):
+                return None
+            return [node, node]
+
+    programa = analizar("module M;\nfn f() { x; return 1 + 2 + y; x = 3; if (1 + 1) { z; } }")
+    resultado = Plegar().visit(programa)
+    assert resultado is programa
+    retorno, asignacion, asignacion_2, condicional = programa.top_declarations[0].body.statements
+    assert isinstance(retorno, ReturnStmt) and repr(retorno.value) == "(Num(3) + Id(y))"
+    assert asignacion is asignacion_2 and isinstance(asignacion, ExprStmt)
+    assert repr(condicional.condition) == "Num(2)" and condicional.then_stmt.statements == []
+
+    # Sin métodos propios el árbol queda igual
+    esperado = analizar(programa_grande(20))
+    programa = analizar(programa_grande(20))
+    assert NodeTransformer().visit(programa) == esperado
+
+
+def test_arboles_profundos():
+    """walk(), generic_visit() y el transformador no recurren en los nodos sin método propio"""
+    profundidad = 50_000
+    fuente = "module M;\nfn f() { return " + "-(" * profundidad + "a" + ")" * profundidad + "; }"
+    programa = analizar(fuente, IterativeParser)
+    assert sum(1 for _ in walk(programa)) == 2 * profundidad + 7
+
+    visitante = ContarIdentificadores()
+    visitante.visit(programa)
+    assert visitante.nombres == ["a"]
+
+    class Renombrar(NodeTransformer):
+        def visit_Identifier(self, node):
+            return Identifier("b", start=node.start, end=node.end)
+
+    Renombrar().visit(programa)
+    expresion = programa.top_declarations[0].body.statements[0].value
+    while not isinstance(expresion, Identifier):
+        assert isinstance(expresion, (UnaryOp, ParenExpr))
+        expresion = expresion.operand if isinstance(expresion, UnaryOp) else expresion.expression
+    assert expresion.name == "b"
+
+
+if __name__ == "__main__":
+    test_walk_y_hijos()
+    test_despacho_cacheado()
+    test_transformador()
+    test_arboles_profundos()
+    print("Visitantes y recorridos correctos")
@@ -0,0 +1,55 @@
+from lexer import Lexer, SymbolTable, TokenType, FIXED_TEXT
+from parser import Parser
+from parser.ast_nodes import Identifier, FunctionCall
+from ejemplos import PROGRAMA
+
+
+def test_identificadores_internalizados():
+    """Cada ocurrencia de un identificador comparte el mismo str y el mismo id"""
+    fuente = "let x: int = y + x;\nx = y * x;"
+    for engine in Lexer.ENGINES:
+        lexer = Lexer(fuente, engine=engine)
+        ids = [t for t in lexer.tokenize() if t.type is TokenType.ID]
+        xs = [t for t in ids if t.value == "x"]
+        assert len(xs) == 4
+        assert all(t.value is xs[0].value and t.symbol == xs[0].symbol for t in xs)
+        assert [t.symbol for t in ids] == [0, 1, 0, 0, 1, 0]
+        assert lexer.symbols.name(1) == "y" and lexer.symbols.lookup("z") is None
+
+
+def test_texto_fijo_compartido():
+    """Palabras reservadas y operadores reutilizan el str de FIXED_TEXT"""
+    for engine in Lexer.ENGINES:
+        for token in Lexer(PROGRAMA, engine=engine).tokenize():
+            if token.type in FIXED_TEXT:
+                assert token.value is FIXED_TEXT[token.type], token
+                assert token.symbol is None
+
+
+def test_tabla_compartida_y_buffer():
+    """Una misma tabla de símbolos da los mismos ids en varios lexers y en el TokenBuffer"""
+    tabla = SymbolTable()
+    primero = Lexer("a b c", engine="regex", symbols=tabla).tokenize()
+    buffer = Lexer("c a d", engine="regex", symbols=tabla).tokenize_buffer()
+    assert [t.symbol for t in primero[:3]] == [0, 1, 2]
+    assert [buffer.symbol_at(i) for i in range(len(buffer))] == [2, 0, 3, None]
+    assert buffer[2].symbol == 3 and buffer[2].value is tabla.name(3)
+    assert len(tabla) == 4 and "d" in tabla
+
+
+def test_simbolos_en_el_ast():
+    """Los nodos Identifier y FunctionCall conservan el id del identificador"""
+    lexer = Lexer("module M;\nfn f(a: int) -> int { return f(a) + a; }", engine="regex")
+    programa = Parser(lexer.tokenize()).parse()
+    retorno = programa.top_declarations[0].body.statements[0].value
+    assert isinstance(retorno.left, FunctionCall) and isinstance(retorno.right, Identifier)
+    assert retorno.left.symbol == lexer.symbols.lookup("f")
+    assert retorno.left.arguments[0].symbol == retorno.right.symbol == lexer.symbols.lookup("a")
+
+
+if __name__ == "__main__":
+    test_identificadores_internalizados()
+    test_texto_fijo_compartido()
+    test_tabla_compartida_y_buffer()
+    test_simbolos_en_el_ast()
+    print("Tabla de símbolos correcta")
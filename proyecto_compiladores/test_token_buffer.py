@@ -0,0 +1,68 @@
+import random
+
+from lexer import Lexer, LineIndex, TokenBuffer, TokenType
+from parser import Parser
+from ejemplos import programa_grande
+
+
+def test_buffer_igual_a_lista():
+    """El buffer columnar reproduce exactamente la lista de tokens en ambos motores"""
+    fuente = programa_grande(100) + "// comentario\nfinal //"
+    for engine in Lexer.ENGINES:
+        tokens = Lexer(fuente, engine=engine).tokenize()
+        buffer = Lexer(fuente, engine=engine).tokenize_buffer()
+        assert isinstance(buffer, TokenBuffer)
+        assert len(buffer) == len(tokens)
+        assert list(buffer) == tokens
+        assert buffer[-1].type is TokenType.EOF
+        assert buffer[3:6] == tokens[3:6]
+        assert [buffer.type_at(i) for i in range(len(buffer))] == [t.type for t in tokens]
+        assert [buffer.value_at(i) for i in range(len(buffer))] == [t.value for t in tokens]
+
+
+def test_parser_sobre_buffer():
+    fuente = programa_grande(100)
+    esperado = Parser(Lexer(fuente).tokenize()).parse()
+    assert Parser(Lexer(fuente).tokenize_buffer()).parse() == esperado
+
+
+def test_buffer_compacto():
+    """Cada token ocupa 13 bytes en las columnas"""
+    buffer = Lexer("let x: int = 1;").tokenize_buffer()
+    assert buffer.nbytes() == 13 * len(buffer)
+
+
+def test_line_index_posiciones():
+    """La búsqueda binaria coincide con contar líneas y columnas carácter por carácter"""
+    fuente = "ab\n\ncd\r\n efg\n"
+    esperado = []
+    line, column = 1, 1
+    for char in fuente + " ":
+        esperado.append((line, column))
+        if char == "\n":
+            line, column = line + 1, 1
+        else:
+            column += 1
+    indice = LineIndex(fuente)
+    offsets = list(range(len(fuente) + 1))
+    random.Random(5).shuffle(offsets)
+    for offset in offsets:
+        assert indice.position(offset) == esperado[offset]
+        assert indice.offset(*esperado[offset]) == offset
+    assert len(indice) == 5
+
+
+def test_posiciones_perezosas_del_buffer():
+    fuente = "module M;\n\n  let x: int = 1;"
+    buffer = Lexer(fuente).tokenize_buffer()
+    assert buffer.position_at(3) == (3, 3)
+    assert buffer.position_at(len(buffer) - 1) == (3, 18)
+
+
+if __name__ == "__main__":
+    test_buffer_igual_a_lista()
+    test_parser_sobre_buffer()
+    test_buffer_compacto()
+    test_line_index_posiciones()
+    test_posiciones_perezosas_del_buffer()
+    print("TokenBuffer correcto")